@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
 
     'webpack_loader',
     'crispy_forms',
@@ -148,6 +149,21 @@ LANGUAGES = [
     ('zh-hans', _('Chinese')),
 ]
 
+# The languages tried in order when a multilingual field has no translation
+# in the active language, keyed by the active language or 'default'. Any
+# other existing translation is used at last.
+MULTILINGUAL_FALLBACK_LANGUAGES = {
+    'zh-hans': ['en'],
+    'default': ['en'],
+}
+
+# The postgres text search configuration used for each language of the work
+# experience translations, 'simple' is used for the others.
+RESUME_SEARCH_CONFIGS = {
+    'en': 'english',
+    'zh-hans': 'simple',
+}
+
 
 TIME_ZONE = 'UTC'
 
@@ -178,6 +194,22 @@ STATICFILES_FINDERS = [
 MEDIA_ROOT = os.path.join(HOST_DIR, 'www', 'media')
 MEDIA_URL = '/media/'
 
+# The uploads waiting for their import, see `resume.imports`, out of
+# MEDIA_ROOT as they are not public
+RESUME_IMPORT_ROOT = os.path.join(HOST_DIR, 'www', 'imports')
+
+# The TF-IDF indexes of `resume.similarity`, built by the
+# `build_similarity_index` command and memory-mapped by the workers
+RESUME_SIMILARITY_DIR = os.path.join(HOST_DIR, 'www', 'similarity')
+
+# The threads of each web process running the tasks of `resume.background`,
+# e.g. the imports of the uploaded archives
+RESUME_BACKGROUND_WORKERS = 2
+
+# The batches of work experiences above this size are deleted, published or
+# unpublished in the background, see `resume.batch`
+RESUME_BATCH_BACKGROUND_THRESHOLD = 500
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
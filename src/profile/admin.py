@@ -2,11 +2,19 @@
 
 from django.contrib import admin
 
-from .models import Profile
+from .models import Profile, ProfileTranslation
+
+
+class ProfileTranslationInline(admin.StackedInline):
+    model = ProfileTranslation
+    extra = 1
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
+    inlines = [
+        ProfileTranslationInline
+    ]
     list_display = ('user', 'wechat', 'short_description')
     
     def short_description(self, obj):
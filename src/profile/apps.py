@@ -2,6 +2,7 @@
 
 from django.apps import AppConfig
 from django.db.models.signals import (
+    post_delete,
     post_save,
 )
 from django.utils.translation import gettext_lazy as _
@@ -13,7 +14,9 @@ class ProfileConfig(AppConfig):
 
     def ready(self):
         from django.contrib.auth import get_user_model
+        from resume.multilingual import post_change_translation_handler
         from .models import (
+            ProfileTranslation,
             post_create_profile_handler,
             post_update_profile_handler
         )
@@ -27,3 +30,11 @@ class ProfileConfig(AppConfig):
         post_save.connect(
             post_update_profile_handler, sender=User,
             dispatch_uid='profile-post-update-user')
+
+        post_save.connect(
+            post_change_translation_handler, sender=ProfileTranslation,
+            dispatch_uid='profile-post-save-profile_translation')
+
+        post_delete.connect(
+            post_change_translation_handler, sender=ProfileTranslation,
+            dispatch_uid='profile-post-delete-profile_translation')
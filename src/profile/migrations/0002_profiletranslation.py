@@ -0,0 +1,31 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileTranslation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('', '*--- select language ---'), ('en', 'English'), ('zh-hans', 'Chinese')], db_index=True, max_length=30, verbose_name='Language')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('related_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='profile.Profile')),
+            ],
+            options={
+                'ordering': ('language',),
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='profiletranslation',
+            unique_together={('related_model', 'language')},
+        ),
+    ]
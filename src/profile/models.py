@@ -10,6 +10,12 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse_lazy
 
+from resume.multilingual import (
+    MultilingualModel,
+    MultilingualQuerySet,
+    TranslationModel,
+)
+
 from .countries import country_dict, country_list
 from .utils import (
     create_thumbnail,
@@ -30,9 +36,29 @@ def str_contain_chinese(check_str):
     return False
 
 
-class Profile(models.Model):
+class ProfileTranslation(TranslationModel):
+    # deleted by the database, see resume.cascades
+    related_model = models.ForeignKey(
+        'profile.Profile',
+        on_delete=models.DO_NOTHING, related_name='translations')
+    description = models.TextField(_('Description'), blank=True)
+
+    class Meta(TranslationModel.Meta):
+        app_label = 'profile'
+        unique_together = (('related_model', 'language'),)
+
+    def __unicode__(self):
+        return '[profile:{0}]-[pk:{1}]:[lang:{2}]'.format(
+            self.related_model_id, self.id, self.language)
+
+    def __str__(self):
+        return self.__unicode__()
+
+
+class Profile(MultilingualModel):
+    # deleted by the database, see resume.cascades
     user = models.OneToOneField(
-        User, on_delete=models.CASCADE, related_name='profile')
+        User, on_delete=models.DO_NOTHING, related_name='profile')
 
     GENDER_CHOICES = (
         ('M', _('Male')),
@@ -77,9 +103,15 @@ class Profile(models.Model):
 
     is_public = models.BooleanField(_('Public it?'), default=False)
 
+    objects = MultilingualQuerySet.as_manager()
+
     class Meta:
         app_label = 'profile'
         ordering = ['id']
+        # `description` is the value of the default language, the translated
+        # one is read with `description_translated`
+        multilingual = ('description',)
+        translation = ProfileTranslation
 
     def __unicode__(self):
         full_name = self.full_user_name()
@@ -121,11 +153,16 @@ class Profile(models.Model):
             thumbnail_file_name, thumbnail_upload_handler, save=False)
 
     def save(self, *args, **kwargs):
-        if self._check_upload_file_exist('avatar'):
-            self._convert_to_png_photo()
-            self._generate_thumbnail()
-        else:
-            self.photo_upload_name = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'avatar' in update_fields:
+            if self._check_upload_file_exist('avatar'):
+                self._convert_to_png_photo()
+                self._generate_thumbnail()
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {
+                        'avatar_crop', 'avatar_upload_name'}
+            else:
+                self.photo_upload_name = ''
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -140,6 +177,9 @@ def post_create_profile_handler(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 
-def post_update_profile_handler(sender, instance, **kwargs):
+def post_update_profile_handler(sender, instance, update_fields=None,
+                                **kwargs):
     assert sender == User
-    instance.profile.save()
+    # the partial saves of the user do not concern the profile
+    if update_fields is None:
+        instance.profile.save()
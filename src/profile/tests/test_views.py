@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from profile.models import Profile
+
+from testings.factory import Factory
+
+
+class ProfileUpdateViewTestCase(TestCase):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.user = self.factory.make_user(
+            full_name='Alice', country='DE', city='Berlin',
+            **self.credentials)
+        self.client.login(**self.credentials)
+        self._url = reverse('profile-edit', args=(self.user.email,))
+
+    def get_data(self, **changes):
+        form = self.client.get(self._url).context['form']
+        data = {}
+        for field in form:
+            if field.name == 'avatar':
+                continue
+            value = field.value()
+            data[field.html_name] = '' if value is None else value
+        data.update(changes)
+        return data
+
+    def post(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(self._url, data)
+        self.assertRedirects(resp, reverse(
+            'profile-detail', args=(self.user.email,)),
+            fetch_redirect_response=False)
+        return [x['sql'] for x in queries.captured_queries
+                if x['sql'].startswith('UPDATE')]
+
+    def test_unchanged_profile_is_not_written(self):
+        updates = self.post(self.get_data())
+        self.assertFalse([x for x in updates if 'profile_profile' in x])
+        self.assertFalse([x for x in updates if 'full_name' in x])
+
+    def test_changed_fields_only_are_written(self):
+        updates = self.post(self.get_data(city='Paris', full_name='Alice B'))
+
+        profile_update, = [x for x in updates
+                           if x.startswith('UPDATE "profile_profile"')]
+        self.assertIn('"city"', profile_update)
+        self.assertNotIn('"github"', profile_update)
+        user_update, = [x for x in updates if '"full_name"' in x]
+        self.assertNotIn('"mobile"', user_update)
+
+        profile = Profile.objects.select_related('user').get(user=self.user)
+        self.assertEqual(profile.city, 'Paris')
+        self.assertEqual(profile.user.full_name, 'Alice B')
@@ -15,14 +15,19 @@ from allauth.socialaccount.signals import social_account_added
 
 from profile.models import Profile
 from profile.forms import ProfileForm
+from resume.changes import ChangedFieldsMixin, save_changes
+from resume.models import Project, WorkExperience
+from resume.multilingual import TranslationLoader
+from resume.timeline import get_career_stats
 
 
 logger = logging.getLogger(__name__)
 
 
-class ProfileUpdateView(UpdateView):
+class ProfileUpdateView(ChangedFieldsMixin, UpdateView):
     model = Profile
     form_class = ProfileForm
+    template_name = 'profile_edit.html'
 
     def get_success_url(self):
         return reverse(
@@ -52,13 +57,13 @@ class ProfileUpdateView(UpdateView):
         context = self.get_context_data(object=self.object)
         return self.render_to_response(context)
 
-    def form_valid(self, form):
-        """If the form is valid, save the associated model."""
-        self.object = form.save()
-        self.request.user.first_name = form.cleaned_data['first_name']
-        self.request.user.last_name = form.cleaned_data['last_name']
-        self.request.user.save()
-        return super().form_valid(form)
+    def save_form(self, form):
+        """Save the changes of the profile and of its user."""
+        save_changes(self.request.user, {
+            'full_name': form.cleaned_data['full_name'],
+            'mobile': form.cleaned_data['mobile'],
+        })
+        super().save_form(form)
 
 
 edit_profile = login_required(ProfileUpdateView.as_view())
@@ -84,6 +89,36 @@ class ProfileDetailView(DetailView):
                 return None
         return None
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.object is None:
+            return context
+
+        work_experience_list = WorkExperience.objects.filter(
+            user=self.object.user).order_by('-date_start')
+        project_list = Project.objects.filter(user=self.object.user)
+        if self.object.user != self.request.user:
+            work_experience_list = work_experience_list.filter(is_public=True)
+            project_list = project_list.filter(is_public=True)
+        work_experience_list = list(work_experience_list)
+        project_list = list(project_list)
+
+        # one translation query per model for the whole page
+        TranslationLoader()\
+            .add(self.object)\
+            .add_all(work_experience_list)\
+            .add_all(project_list)\
+            .load()
+
+        context.update({
+            'work_experience_list': work_experience_list,
+            'project_list': project_list,
+            'career_stats': get_career_stats(
+                self.object.user,
+                public_only=self.object.user != self.request.user),
+        })
+        return context
+
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from django import forms
 from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 
@@ -7,15 +8,29 @@ from resume.models import (
     WorkExperienceTranslation,
     WorkExperience,
     Project,
+    ProjectTranslation,
 )
+from resume.versioning import VersionedFormMixin
+
+
+class VersionedAdminForm(VersionedFormMixin, forms.ModelForm):
+    # declared to be part of the admin fieldsets
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput())
+    check_version_on_clean = True
+
+    class Meta:
+        # the model field is not editable
+        exclude = ['version']
 
 
 class WorkExperienceTranslationInline(admin.StackedInline):
     model = WorkExperienceTranslation
+    form = VersionedAdminForm
     extra = 1
 
 
 class WorkExperienceAdmin(admin.ModelAdmin):
+    form = VersionedAdminForm
     inlines = [
         WorkExperienceTranslationInline
     ]
@@ -41,8 +56,16 @@ class WorkExperienceAdmin(admin.ModelAdmin):
         return obj.location
     show_location.short_description = _('Location')
 
+
+class ProjectTranslationInline(admin.StackedInline):
+    model = ProjectTranslation
+    extra = 1
+
+
 class ProjectAdmin(admin.ModelAdmin):
-    pass
+    inlines = [
+        ProjectTranslationInline
+    ]
 
 
 admin.site.register(WorkExperience, WorkExperienceAdmin)
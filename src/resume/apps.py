@@ -2,6 +2,8 @@
 
 from django.apps import AppConfig
 from django.db.models.signals import (
+    post_delete,
+    post_save,
     pre_save,
 )
 from django.utils.translation import gettext_lazy as _
@@ -13,11 +15,51 @@ class ResumeConfig(AppConfig):
 
     def ready(self):
         from .models import (
+            ProjectTranslation,
+            WorkExperience,
             WorkExperienceTranslation,
+            post_save_workexperience_translation_handler,
             pre_save_workexperience_translation_handler
         )
+        from .multilingual import post_change_translation_handler
+        from .timeline import post_change_work_experience_handler
 
         pre_save.connect(
             pre_save_workexperience_translation_handler,
             sender=WorkExperienceTranslation,
             dispatch_uid='resume-pre-save-work_experience_translation')
+
+        post_save.connect(
+            post_save_workexperience_translation_handler,
+            sender=WorkExperienceTranslation,
+            dispatch_uid='resume-post-save-work_experience_translation-search')
+
+        post_save.connect(
+            post_change_translation_handler,
+            sender=WorkExperienceTranslation,
+            dispatch_uid='resume-post-save-work_experience_translation')
+
+        post_delete.connect(
+            post_change_translation_handler,
+            sender=WorkExperienceTranslation,
+            dispatch_uid='resume-post-delete-work_experience_translation')
+
+        post_save.connect(
+            post_change_translation_handler,
+            sender=ProjectTranslation,
+            dispatch_uid='resume-post-save-project_translation')
+
+        post_delete.connect(
+            post_change_translation_handler,
+            sender=ProjectTranslation,
+            dispatch_uid='resume-post-delete-project_translation')
+
+        for sender, name in ((WorkExperience, 'work_experience'),
+                             (WorkExperienceTranslation,
+                              'work_experience_translation')):
+            post_save.connect(
+                post_change_work_experience_handler, sender=sender,
+                dispatch_uid='resume-post-save-{}-timeline'.format(name))
+            post_delete.connect(
+                post_change_work_experience_handler, sender=sender,
+                dispatch_uid='resume-post-delete-{}-timeline'.format(name))
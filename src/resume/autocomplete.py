@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""Autocomplete of the company, position and location of the work
+experience translations.
+
+The columns have `pg_trgm` GIN indexes on `UPPER(column)`, which is what the
+`istartswith` lookup compares, so a suggestion lookup is one index scan. The
+results are kept in a short lived in-process cache: a hot prefix costs no
+query, and when a cached shorter prefix already holds all of its matches,
+the longer prefixes typed next are answered from it in memory.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models import Count, Q
+
+from resume.models import WorkExperienceTranslation
+
+
+AUTOCOMPLETE_FIELDS = ('company', 'position', 'location')
+MIN_PREFIX_LENGTH = 2
+SUGGESTION_LIMIT = 10
+
+
+class PrefixCache(object):
+    """A thread safe LRU mapping whose entries expire after `timeout`
+    seconds."""
+
+    def __init__(self, timeout=30, max_entries=2048, timer=time.monotonic):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if expire_at <= self.timer():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.timer() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+prefix_cache = PrefixCache()
+
+
+def query_suggestions(user, field, prefix, limit):
+    """The most used values of `field` starting with `prefix`, among the
+    translations of `user` and of the public work experiences."""
+    visible = Q(related_model__is_public=True)
+    if user is not None:
+        visible |= Q(related_model__user=user)
+    queryset = WorkExperienceTranslation.objects\
+        .filter(visible, **{'{}__istartswith'.format(field): prefix})\
+        .values(field)\
+        .annotate(count=Count('id'))\
+        .order_by('-count', field)
+    return [row[field] for row in queryset[:limit]]
+
+
+def get_suggestions(user, field, prefix, limit=SUGGESTION_LIMIT,
+                    cache=prefix_cache):
+    """Return up to `limit` suggestions of `field` for `prefix`, at most one
+    indexed query per call."""
+    if field not in AUTOCOMPLETE_FIELDS:
+        raise ValueError('Unknown autocomplete field: {}'.format(field))
+
+    prefix = prefix.strip()
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return []
+
+    user_id = user.pk if user is not None else None
+    normalized = prefix.upper()
+
+    def cache_key(value):
+        return user_id, field, value
+
+    # one more row than asked, so a short result is known to be complete
+    fetch_limit = limit + 1
+    suggestions = cache.get(cache_key(normalized))
+    if suggestions is None:
+        for length in range(len(normalized) - 1, MIN_PREFIX_LENGTH - 1, -1):
+            shorter = cache.get(cache_key(normalized[:length]))
+            if shorter is not None and len(shorter) < fetch_limit:
+                suggestions = [value for value in shorter
+                               if value.upper().startswith(normalized)]
+                break
+        if suggestions is None:
+            suggestions = query_suggestions(user, field, prefix, fetch_limit)
+        cache.set(cache_key(normalized), suggestions)
+    return suggestions[:limit]
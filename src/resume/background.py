@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""Run the slow tasks off the request thread.
+
+The tasks run in a small thread pool of the web process, so a large upload
+does not hold a worker for the whole import. A task is submitted once the
+transaction of the request commits, so it sees the rows the request wrote,
+and it closes its database connection when it ends.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RESUME_BACKGROUND_WORKERS,
+                thread_name_prefix='resume-background')
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('background task %s failed', func.__name__)
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Call `func(*args, **kwargs)` in a background thread once the current
+    transaction commits."""
+    transaction.on_commit(
+        lambda: get_executor().submit(_run, func, args, kwargs))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""Operations on a batch of the work experiences of a user.
+
+A batch is the list of ids posted by the user, `select` splits it with one
+query into the ids of the user and the forbidden ones, the ids of other
+users or of no work experience. The operations take one statement per
+table whatever the size of the batch:
+
+- `delete` deletes the work experiences and the rows cascading from them
+  without loading them, see `delete_rows`,
+- `publish` and `unpublish` update their `is_public`,
+- `export` streams them, see `resume.transfer`. It writes nothing and is
+  read by the response as it is sent, so it is not one of the `OPERATIONS`
+  run by `submit`.
+
+`submit` records the batches larger than
+`settings.RESUME_BATCH_BACKGROUND_THRESHOLD` as a `BatchJob` run in
+`resume.background`, so the latency of the request does not depend on their
+size. The jobs lost with their process are run again by the
+`recover_batch_jobs` command, the operations are atomic and idempotent.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from resume.background import run_in_background
+from resume.models import BatchJob, WorkExperience
+from resume.timeline import rebuild_career_timelines
+from resume.transfer import export_lines
+
+
+logger = logging.getLogger(__name__)
+
+DELETE = BatchJob.DELETE
+PUBLISH = BatchJob.PUBLISH
+UNPUBLISH = BatchJob.UNPUBLISH
+OPERATIONS = (DELETE, PUBLISH, UNPUBLISH)
+
+
+def parse_ids(value):
+    """Return the ids of the comma separated `value`, in their order and
+    without the duplicates. Raise ValueError for an invalid id."""
+    ids, seen = [], set()
+    for x in (value or '').split(','):
+        if x.strip():
+            pk = int(x)
+            if pk not in seen:
+                seen.add(pk)
+                ids.append(pk)
+    return ids
+
+
+def get_queryset(user, ids):
+    return WorkExperience.objects.filter(user=user, pk__in=ids).order_by('pk')
+
+
+def select(user, ids):
+    """Return the `(owned, forbidden)` lists of the ids."""
+    owned = set(get_queryset(user, ids).values_list('pk', flat=True))
+    return ([x for x in ids if x in owned],
+            [x for x in ids if x not in owned])
+
+
+def delete_rows(queryset):
+    """Delete the rows of `queryset`, and first the rows cascading from
+    them, with one DELETE per table. The rows are not loaded and the
+    delete signals are not sent. Return the number of deleted rows of
+    `queryset`.
+
+    The relations cascading in the database, see `resume.cascades`, are
+    left to it, so a batch of work experiences is one DELETE."""
+    # the reverse foreign keys, with the ones of the many to many tables,
+    # like the collector of `QuerySet.delete`
+    relations = [
+        x for x in queryset.model._meta.get_fields(include_hidden=True)
+        if x.auto_created and not x.concrete and (
+            x.one_to_one or x.one_to_many)]
+    for relation in relations:
+        related = relation.related_model._base_manager.filter(**{
+            '{}__in'.format(relation.field.name): queryset})
+        if relation.on_delete is models.CASCADE:
+            delete_rows(related)
+        elif relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise ValueError('{} can not be deleted in bulk'.format(
+                relation.name))
+    return queryset._raw_delete(queryset.db)
+
+
+def run(operation, user_id, ids):
+    """Apply the operation to the work experiences `ids` of the user in one
+    transaction, return the number of deleted or updated work
+    experiences."""
+    queryset = WorkExperience.objects.filter(user_id=user_id, pk__in=ids)
+    with transaction.atomic():
+        if operation == DELETE:
+            count = delete_rows(queryset)
+        elif operation in (PUBLISH, UNPUBLISH):
+            count = queryset.set_public(operation == PUBLISH)
+        else:
+            raise ValueError('invalid operation {!r}'.format(operation))
+        if count:
+            # the signals are not sent
+            transaction.on_commit(
+                lambda: rebuild_career_timelines([user_id]))
+    return count
+
+
+def run_batch_job(job_id):
+    job = BatchJob.objects.get(pk=job_id)
+
+    # recorded as well when the operation is interrupted
+    values = {'status': BatchJob.FAILED,
+              'error': 'The operation was interrupted.'}
+    try:
+        BatchJob.objects.filter(pk=job.pk).update(
+            status=BatchJob.RUNNING, started_at=timezone.now())
+        count = run(job.operation, job.user_id, job.ids)
+        values = {'status': BatchJob.DONE, 'count': count, 'error': ''}
+    except Exception:
+        logger.exception('batch job %s failed', job.pk)
+        values['error'] = 'The work experiences could not be changed.'
+    finally:
+        BatchJob.objects.filter(pk=job.pk).update(
+            finished_at=timezone.now(), **values)
+
+
+def recover_batch_job(job_id, stale_after):
+    """Run again the stale job `job_id`. Return its status, None when the
+    job is not stale anymore, e.g. recovered by another process."""
+    if not BatchJob.objects.claim_stale(job_id, stale_after):
+        return None
+    run_batch_job(job_id)
+    return BatchJob.objects.values_list('status', flat=True).get(pk=job_id)
+
+
+def submit(operation, user, ids):
+    """Run the operation on the owned `ids`, or record it as a `BatchJob`
+    run in the background when the batch is large. Return `(count, job)`,
+    the number of deleted or updated work experiences and None, or None and
+    the job."""
+    if operation not in OPERATIONS:
+        raise ValueError('invalid operation {!r}'.format(operation))
+    if len(ids) <= settings.RESUME_BATCH_BACKGROUND_THRESHOLD:
+        return run(operation, user.pk, ids), None
+    with transaction.atomic():
+        job = BatchJob.objects.create(user=user, operation=operation,
+                                      ids=ids)
+        run_in_background(run_batch_job, job.pk)
+    return None, job
+
+
+def export(user, ids, format='jsonl'):
+    """Yield the export lines of the work experiences `ids` of the user."""
+    return export_lines(get_queryset(user, ids), format=format)
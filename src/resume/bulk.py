@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""Bulk writes which Django 2.1 does not provide.
+
+`bulk_update` writes the changes of many objects with a single UPDATE, each
+column is set with a `CASE WHEN id = ... THEN ...` over the objects which
+changed it, the other rows keep their value.
+
+`iter_pk_batches` reads a whole table in batches for the commands
+rebuilding a derived column.
+"""
+
+from django.db.models import Case, F, Q, Value, When
+
+from resume.versioning import VersionConflict
+
+
+def bulk_update(objects, fields_by_object, versioned=False):
+    """Write the `fields_by_object[obj]` fields of each of the objects with
+    one UPDATE, return the number of updated rows.
+
+    Only the rows having changed fields are updated, and only with the
+    fields they changed. The `versioned` objects are only updated at their
+    version, which is incremented, see `resume.versioning`."""
+    objects = [x for x in objects if fields_by_object.get(x)]
+    if not objects:
+        return 0
+    model = objects[0]._meta.model
+    names = sorted({name for x in objects for name in fields_by_object[x]})
+
+    values = {}
+    for name in names:
+        field = model._meta.get_field(name)
+        whens = [When(pk=x.pk, then=Value(getattr(x, field.attname),
+                                          output_field=field))
+                 for x in objects if name in fields_by_object[x]]
+        values[field.attname] = Case(*whens, default=F(field.attname),
+                                     output_field=field)
+    queryset = model._base_manager.filter(pk__in=[x.pk for x in objects])
+    if versioned:
+        condition = Q()
+        for obj in objects:
+            condition |= Q(pk=obj.pk, version=obj.version)
+        queryset = queryset.filter(condition)
+        values['version'] = F('version') + 1
+
+    count = queryset.update(**values)
+    if versioned:
+        if count != len(objects):
+            raise VersionConflict(
+                '{} of the {} {} are not at their version anymore'.format(
+                    len(objects) - count, len(objects), model._meta.label))
+        for obj in objects:
+            obj.version += 1
+    return count
+
+
+def iter_pk_batches(queryset, batch_size):
+    """Yield the rows of `queryset` in lists of `batch_size`, in the order of
+    their primary key. Each list is read after the last primary key of the
+    previous one, so a late batch is read as fast as the first one. The
+    rows are objects, or primary keys for a `values_list('pk', flat=True)`.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else \
+            queryset.filter(pk__gt=last_pk)
+        rows = list(batch[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = getattr(rows[-1], 'pk', rows[-1])
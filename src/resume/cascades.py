@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Foreign keys cascading the deletes in the database.
+
+The rows of the translations, of the work experiences, of the projects and
+of the profile are deleted with the row they refer to by an
+`ON DELETE CASCADE` constraint, their fields are declared
+`on_delete=models.DO_NOTHING` so the collector of `delete()` neither loads
+them nor deletes them one model at a time. Deleting a user takes one
+statement for all of them, and so does `resume.batch.delete_rows` for a
+batch of work experiences.
+
+Their `post_delete` receivers are not called for the rows deleted by the
+database. They only refresh the row they refer to, which is deleted too,
+and the career timeline of the user, refreshed by the receiver of the
+deleted work experience or deleted with the user, see `resume.apps`.
+
+Django recreates the constraint without the cascade when it alters the
+field, a migration altering one of these fields has to run
+`cascade_foreign_key` again, from a copy of this module as
+`0012_database_cascades` does since migrations do not import the app code.
+"""
+
+from django.db import migrations
+
+
+ALTER_FOREIGN_KEY_SQL = """
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN
+        SELECT c.conname, c.confrelid::regclass AS target, a.attname
+        FROM pg_constraint c
+        JOIN pg_attribute a
+            ON a.attrelid = c.confrelid AND a.attnum = c.confkey[1]
+        WHERE c.contype = 'f' AND c.conrelid = '{table}'::regclass
+            AND c.conkey = ARRAY[(
+                SELECT attnum FROM pg_attribute
+                WHERE attrelid = '{table}'::regclass
+                    AND attname = '{column}')]
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE {table} DROP CONSTRAINT %1$I, '
+            'ADD CONSTRAINT %1$I FOREIGN KEY ("{column}") '
+            'REFERENCES %2$s (%3$I) {on_delete} '
+            'DEFERRABLE INITIALLY DEFERRED',
+            fk.conname, fk.target, fk.attname);
+    END LOOP;
+END
+$$;
+"""
+
+
+def alter_foreign_key_sql(table, column, on_delete):
+    """Return the SQL recreating the foreign key constraint of the column
+    with the `on_delete` clause, it keeps its name and its target."""
+    return ALTER_FOREIGN_KEY_SQL.format(
+        table=table, column=column, on_delete=on_delete)
+
+
+def cascade_foreign_key(table, column):
+    """Return the migration operation making the foreign key of the column
+    delete its rows with the row it refers to."""
+    return migrations.RunSQL(
+        alter_foreign_key_sql(table, column, 'ON DELETE CASCADE'),
+        alter_foreign_key_sql(table, column, ''))
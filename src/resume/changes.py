@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""Saves restricted to the changed fields.
+
+The edit views save their instance with the `update_fields` computed from
+`form.changed_data`, and skip the write, and so the `pre_save` and
+`post_save` signals, when nothing changed. The values edited by a form for
+another object, e.g. the dates of the work experience of a translation,
+are saved with `save_changes`.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.http import HttpResponseRedirect
+
+from resume.versioning import VersionConflict
+
+
+def get_update_fields(form):
+    """Return the names of the changed model fields of the model `form`."""
+    opts = form._meta.model._meta
+    names = []
+    for name in form.changed_data:
+        if form._meta.fields is not None and name not in form._meta.fields:
+            continue
+        if form._meta.exclude and name in form._meta.exclude:
+            continue
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            names.append(name)
+    return names
+
+
+def save_form_changes(form):
+    """Save the valid model `form`, return the names of the saved fields.
+
+    A new instance is saved entirely, an existing one only with its changed
+    fields and not at all when none changed."""
+    instance = form.save(commit=False)
+    if instance._state.adding:
+        instance.save()
+        form.save_m2m()
+        return [x.name for x in instance._meta.concrete_fields]
+
+    update_fields = get_update_fields(form)
+    if update_fields:
+        instance.save(update_fields=update_fields)
+    if any(x.name in form.changed_data
+           for x in instance._meta.many_to_many):
+        form.save_m2m()
+    return update_fields
+
+
+def save_changes(instance, values):
+    """Set the `{name: value}` values on `instance` and save the ones which
+    differ from the current ones, return their names."""
+    update_fields = [name for name, value in values.items()
+                     if getattr(instance, name) != value]
+    for name in update_fields:
+        setattr(instance, name, values[name])
+    if update_fields:
+        instance.save(update_fields=update_fields)
+    return update_fields
+
+
+class ChangedFieldsMixin(object):
+    """The `form_valid` of the model form views saving the changed fields
+    only, see `save_form_changes`.
+
+    The writes of `save_form` are done in one transaction, the form of a
+    versioned model is displayed again with the conflicting changes, see
+    `resume.versioning`."""
+
+    def save_form(self, form):
+        self.object = form.instance
+        self.saved_fields = save_form_changes(form)
+
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                self.save_form(form)
+        except VersionConflict:
+            form.add_conflict_errors()
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
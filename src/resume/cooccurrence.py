@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""Keyword co-occurrence of the public work experience translations.
+
+`count_cooccurrences` streams the `(translation, keyword)` links of the
+keyword index with a server-side cursor and sums the keyword pairs of each
+translation into a sparse matrix, a chunk of pairs at a time, so the memory
+is bounded by the size of the result and not by the number of translations.
+
+`rebuild_cooccurrences` keeps the most frequent related keywords of each
+keyword in the `KeywordCooccurrence` table, which `related_keywords` reads
+with an indexed query to suggest the related skills.
+"""
+
+import itertools
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Sum
+from scipy import sparse
+
+from resume.models import (
+    Keyword,
+    KeywordCooccurrence,
+    WorkExperienceTranslation,
+)
+
+
+def count_cooccurrences(chunk_size=2000, flush_size=200000):
+    """Return the symmetric CSR matrix of the number of public translations
+    tagged with both keywords, indexed by the keyword ids.
+
+    The links are fetched `chunk_size` rows at a time, the pairs are summed
+    into the matrix every `flush_size` pairs."""
+    size = (Keyword.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+    matrix = sparse.csr_matrix((size, size), dtype=np.int32)
+
+    through = WorkExperienceTranslation.tags.through
+    links = through.objects\
+        .filter(workexperiencetranslation__related_model__is_public=True)\
+        .order_by('workexperiencetranslation_id')\
+        .values_list('workexperiencetranslation_id', 'keyword_id')\
+        .iterator(chunk_size=chunk_size)
+
+    rows, columns = [], []
+
+    def flush(matrix):
+        if rows:
+            pairs = sparse.coo_matrix(
+                (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                shape=(size, size))
+            matrix = matrix + pairs.tocsr()
+            del rows[:], columns[:]
+        return matrix
+
+    for _, group in itertools.groupby(links, key=lambda link: link[0]):
+        keyword_ids = [keyword_id for _, keyword_id in group]
+        for first, second in itertools.permutations(keyword_ids, 2):
+            rows.append(first)
+            columns.append(second)
+        if len(rows) >= flush_size:
+            matrix = flush(matrix)
+    return flush(matrix)
+
+
+def top_cooccurrences(matrix, limit, min_count=1):
+    """Yield `(keyword_id, related_keyword_id, count)` of the `limit` most
+    frequent related keywords of each keyword."""
+    for keyword_id in np.flatnonzero(np.diff(matrix.indptr)):
+        start, end = matrix.indptr[keyword_id], matrix.indptr[keyword_id + 1]
+        related, counts = matrix.indices[start:end], matrix.data[start:end]
+        if len(counts) > limit:
+            best = np.argpartition(-counts, limit - 1)[:limit]
+            related, counts = related[best], counts[best]
+        for related_id, count in zip(related.tolist(), counts.tolist()):
+            if count >= min_count:
+                yield int(keyword_id), related_id, count
+
+
+def rebuild_cooccurrences(limit=20, min_count=1, chunk_size=2000,
+                          batch_size=1000):
+    """Replace the `KeywordCooccurrence` rows, return how many were
+    created."""
+    matrix = count_cooccurrences(chunk_size=chunk_size)
+    total = 0
+    with transaction.atomic():
+        KeywordCooccurrence.objects.all().delete()
+        rows = top_cooccurrences(matrix, limit, min_count)
+        while True:
+            batch = [KeywordCooccurrence(keyword_id=keyword_id,
+                                         related_keyword_id=related_id,
+                                         count=count)
+                     for keyword_id, related_id, count in
+                     itertools.islice(rows, batch_size)]
+            if not batch:
+                break
+            KeywordCooccurrence.objects.bulk_create(batch)
+            total += len(batch)
+    return total
+
+
+def related_keywords(language, keywords, limit=10):
+    """Return the names of the keywords most often used together with the
+    `keywords` names, the `keywords` themselves excluded."""
+    if not keywords:
+        return []
+    rows = KeywordCooccurrence.objects\
+        .filter(keyword__language=language, keyword__name__in=keywords)\
+        .exclude(related_keyword__name__in=keywords)\
+        .values('related_keyword__name')\
+        .annotate(score=Sum('count'))\
+        .order_by('-score', 'related_keyword__name')
+    return [row['related_keyword__name'] for row in rows[:limit]]
@@ -1,18 +1,31 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import zipfile
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 
-from resume.models import Project, WorkExperience, WorkExperienceTranslation
+from resume.bulk import bulk_update
+from resume.changes import get_update_fields
+from resume.cooccurrence import related_keywords
+from resume.keywords import index_keywords, parse_keywords
+from resume.models import (
+    ImportJob,
+    Project,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+from resume.timeline import rebuild_career_timelines
+from resume.versioning import VersionConflict, VersionedFormMixin
 
 logger = logging.getLogger(__name__)
 
@@ -68,9 +81,27 @@ class WorkExperienceForm(forms.ModelForm):
         self.helper.add_input(Submit('submit', 'Create'))
 
 
-class WorkExperienceTranslationForm(forms.ModelForm):
+class DateRangeFormMixin(object):
+    """A form whose `date_end` can not be earlier than its `date_start`."""
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_start = cleaned_data.get('date_start')
+        date_end = cleaned_data.get('date_end')
+        if date_start and date_end and date_end < date_start:
+            raise ValidationError({
+                'date_end': _(
+                    'End date should not be earlier than start date!')})
+        return cleaned_data
+
+
+class WorkExperienceTranslationForm(DateRangeFormMixin, VersionedFormMixin,
+                                    forms.ModelForm):
     related_model = forms.IntegerField(
         required=False, widget=forms.HiddenInput())
+    # the version of the work experience, whose dates are saved as well
+    work_experience_version = forms.IntegerField(
+        required=False, widget=forms.HiddenInput())
     date_start = forms.DateField(label='', widget=forms.DateInput(
         attrs={
             'placeholder': _('*Start date'),
@@ -111,6 +142,14 @@ class WorkExperienceTranslationForm(forms.ModelForm):
         if override_languages:
             self.fields['language'].choices = override_languages
 
+        for name in ('company', 'position', 'location'):
+            self.fields[name].widget.attrs.update({
+                'autocomplete': 'off',
+                'list': 'id_{}_suggestions'.format(name),
+                'data-autocomplete-url': reverse(
+                    'work-experience-autocomplete', args=(name,)),
+            })
+
         self.helper = FormHelper()
         self.helper.form_id = 'id-new-work-experience-translation-form'
         self.helper.form_class = 'blueForms'
@@ -118,12 +157,205 @@ class WorkExperienceTranslationForm(forms.ModelForm):
         self.helper.add_input(Submit('submit', 'Submit'))
         #self.helper.form_show_labels = False
 
+    def get_related_skills(self, limit=10):
+        """The keywords other people often use together with the keywords
+        of this form, see `resume.cooccurrence`."""
+        language = self['language'].value()
+        keywords = parse_keywords(self['keywords'].value() or '')
+        if not language or not keywords:
+            return []
+        return related_keywords(language, keywords, limit=limit)
+
+    def add_conflict_errors(self, current=None):
+        super().add_conflict_errors(current)
+        work_experience = WorkExperience.objects.filter(
+            pk=self.instance.related_model_id).first()
+        if work_experience is None:
+            return
+        for name in ('date_start', 'date_end'):
+            value = getattr(work_experience, name)
+            if name in self.cleaned_data and value != self.cleaned_data[name]:
+                self.add_error(name, ValidationError(
+                    _('Saved meanwhile as: %(value)s'),
+                    code='conflict', params={'value': value}))
+        self.data = self.data.copy()
+        self.data[self.add_prefix('work_experience_version')] = \
+            work_experience.version
+
+
+class WorkExperienceDatesForm(DateRangeFormMixin, VersionedFormMixin,
+                              forms.ModelForm):
+    class Meta:
+        model = WorkExperience
+        fields = ['date_start', 'date_end']
+        labels = {
+            'date_start': '',
+            'date_end': '',
+        }
+        widgets = {
+            'date_start': forms.DateInput(attrs={
+                'placeholder': _('*Start date'),
+                'class': 'form-control form-start-date'
+            }),
+            'date_end': forms.DateInput(attrs={
+                'placeholder': _('End date'),
+                'class': 'form-control form-end-date'
+            }),
+        }
+
+
+class WorkExperienceTranslationEditorForm(VersionedFormMixin,
+                                          forms.ModelForm):
+    """A translation of the editor, its language can not be changed."""
+
+    class Meta:
+        model = WorkExperienceTranslation
+        fields = ['language', 'position', 'company', 'location',
+                  'contribution', 'keywords']
+        labels = {
+            'company': '',
+            'position': '',
+            'location': '',
+        }
+        widgets = {
+            'language': forms.HiddenInput(),
+            'company': forms.TextInput(attrs={
+                'placeholder': _('*Company name')
+            }),
+            'position': forms.TextInput(attrs={
+                'placeholder': _('*Job position')
+            }),
+            'location': forms.TextInput(attrs={
+                'placeholder': _('*Location')
+            }),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['language'].disabled = True
+
+    def get_language_name(self):
+        return dict(settings.LANGUAGES).get(self['language'].value(), '')
+
+
+WorkExperienceTranslationFormSet = forms.inlineformset_factory(
+    WorkExperience, WorkExperienceTranslation,
+    form=WorkExperienceTranslationEditorForm, extra=0, can_delete=False)
+
+
+class WorkExperienceEditor(object):
+    """The dates of a work experience and a form for each of the languages,
+    the ones without translation yet are only saved when they are filled.
+
+    `save` writes all the changes in one transaction, with one UPDATE for
+    the changed translations, restricted to their changed fields, and one
+    INSERT for the new ones. The rows are only updated at the version they
+    were displayed at, see `resume.versioning`."""
+
+    def __init__(self, work_experience, data=None):
+        self.work_experience = work_experience
+        self.form = WorkExperienceDatesForm(
+            data, instance=work_experience, prefix='work_experience')
+        translations = work_experience.translations.order_by('language')
+        filled_languages = {x.language for x in translations}
+        missing = [x for x, _ in settings.LANGUAGES
+                   if x not in filled_languages]
+        self.formset = WorkExperienceTranslationFormSet(
+            data, instance=work_experience, queryset=translations,
+            initial=[{'language': x} for x in missing])
+        self.formset.extra = len(missing)
+
+    def is_valid(self):
+        return all([self.form.is_valid(), self.formset.is_valid()])
+
+    def save(self):
+        """Write the changes, return the changed translations."""
+        work_experience = self.work_experience
+        dates = {x: getattr(work_experience, x)
+                 for x in get_update_fields(self.form)}
+
+        changed_fields, created = {}, []
+        for form in self.formset.forms:
+            if not form.has_changed():
+                continue
+            translation = form.instance
+            if translation.pk is None:
+                translation.render_contribution()
+                created.append(translation)
+                continue
+            fields = get_update_fields(form)
+            if 'contribution' in fields:
+                fields += translation.render_contribution()
+            changed_fields[translation] = fields
+        translations = list(changed_fields) + created
+
+        with transaction.atomic():
+            bulk_update([work_experience], {work_experience: list(dates)},
+                        versioned=True)
+            bulk_update(changed_fields, changed_fields, versioned=True)
+            if created:
+                try:
+                    with transaction.atomic():
+                        WorkExperienceTranslation.objects.bulk_create(
+                            created)
+                except IntegrityError:
+                    raise VersionConflict(
+                        'a translation was added meanwhile')
+            if translations:
+                WorkExperienceTranslation.objects\
+                    .filter(pk__in=[x.pk for x in translations])\
+                    .update_search_vectors()
+                index_keywords(created + [
+                    x for x, fields in changed_fields.items()
+                    if 'keywords' in fields])
+                WorkExperience.objects.filter(pk=work_experience.pk)\
+                    .rebuild_translation_snapshots()
+            if dates or translations:
+                transaction.on_commit(lambda: rebuild_career_timelines(
+                    [work_experience.user_id]))
+        return translations
+
+    def add_conflict_errors(self):
+        """Report the changes made meanwhile on the forms after a
+        `VersionConflict` of `save`."""
+        conflicts = 0
+        for form in [self.form] + self.formset.initial_forms:
+            current = form.get_current()
+            if form.has_conflict(current):
+                form.add_conflict_errors(current)
+                conflicts += 1
+        existing = set(self.work_experience.translations.values_list(
+            'language', flat=True))
+        for form in self.formset.extra_forms:
+            if form.has_changed() and \
+                    form.cleaned_data.get('language') in existing:
+                form.add_error(None, ValidationError(
+                    _('This translation was added meanwhile.'),
+                    code='conflict'))
+                conflicts += 1
+        if not conflicts:
+            self.form.add_conflict_errors()
+
+
+class ImportJobForm(forms.ModelForm):
+    class Meta:
+        model = ImportJob
+        fields = ['kind', 'language', 'archive']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.form_id = 'id-import-job-form'
+        self.helper.form_class = 'blueForms'
+        self.helper.form_method = 'post'
+        self.helper.add_input(Submit('submit', _('Import')))
+
     def clean(self):
         super().clean()
-        _date_start = self.cleaned_data.get('date_start')
-        _date_end = self.cleaned_data.get('date_end')
-        if _date_end and _date_end and _date_end < _date_start:
-            raise ValidationError({
-                'date_end': _(
-                    'End date should not be earlier than start date!')})
-
+        archive = self.cleaned_data.get('archive')
+        if archive is not None and \
+                self.cleaned_data.get('kind') == ImportJob.LINKEDIN:
+            if not zipfile.is_zipfile(archive):
+                raise ValidationError({
+                    'archive': _('The LinkedIn data export is a ZIP file.')})
+            archive.seek(0)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""The imports of the uploaded files, run in the background.
+
+`start_import_job` saves the upload with its `ImportJob` and returns at
+once, the archive is then imported by `run_import_job` in a thread of
+`resume.background`, which records the counts of the created rows, or the
+error, on the job. The archive is removed once imported.
+
+The thread pool is not durable, the jobs of a process which stops are left
+pending or running: the `recover_import_jobs` command imports them again,
+or marks them as failed.
+"""
+
+import logging
+import zipfile
+
+from django.db import transaction
+from django.utils import timezone
+
+from resume.background import run_in_background
+from resume.jsonresume import JSONResumeError, import_json_resume
+from resume.linkedin import LinkedInError, import_linkedin_archive
+from resume.models import ImportJob
+
+
+logger = logging.getLogger(__name__)
+
+IMPORTERS = {
+    ImportJob.LINKEDIN: import_linkedin_archive,
+    ImportJob.JSON_RESUME: import_json_resume,
+}
+
+IMPORT_ERRORS = (JSONResumeError, LinkedInError, zipfile.BadZipFile,
+                 UnicodeDecodeError)
+
+INTERRUPTED = 'The import was interrupted, please upload the file again.'
+
+
+def delete_archive(job):
+    try:
+        job.archive.delete(save=False)
+    except OSError:
+        logger.exception('the archive of import job %s was not removed',
+                         job.pk)
+
+
+def run_import_job(job_id):
+    job = ImportJob.objects.select_related('user').get(pk=job_id)
+
+    # recorded as well when the import is interrupted
+    values = {'status': ImportJob.FAILED, 'error': INTERRUPTED}
+    try:
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.RUNNING, started_at=timezone.now())
+        with job.archive.open('rb') as f:
+            stats = IMPORTERS[job.kind](f, job.user, language=job.language)
+        values = {'status': ImportJob.DONE, 'stats': dict(stats),
+                  'error': ''}
+    except IMPORT_ERRORS as e:
+        values['error'] = str(e)
+    except Exception:
+        logger.exception('import job %s failed', job.pk)
+        values['error'] = 'The file could not be imported.'
+    finally:
+        delete_archive(job)
+        ImportJob.objects.filter(pk=job.pk).update(
+            archive='', finished_at=timezone.now(), **values)
+
+
+def recover_import_job(job_id, stale_after, resume=True):
+    """Run again the stale job `job_id`, the imports are atomic, or mark it
+    as failed when its archive is gone or not `resume`. Return the status,
+    None when the job is not stale anymore, e.g. recovered by another
+    process."""
+    if not ImportJob.objects.claim_stale(job_id, stale_after):
+        return None
+    job = ImportJob.objects.get(pk=job_id)
+    if resume and job.archive and job.archive.storage.exists(
+            job.archive.name):
+        run_import_job(job.pk)
+    else:
+        delete_archive(job)
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.FAILED, error=INTERRUPTED, archive='',
+            finished_at=timezone.now())
+    return ImportJob.objects.values_list('status', flat=True).get(pk=job_id)
+
+
+def start_import_job(job):
+    """Save the new `job` with its upload and import it in the
+    background."""
+    with transaction.atomic():
+        job.save()
+        run_in_background(run_import_job, job.pk)
+    return job
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+"""Import of the JSON Resume files (https://jsonresume.org/schema/).
+
+The `work` entries become work experiences with a translation in the
+language of the file, and the `projects` entries become projects. A file
+in another language adds its translations to the work experiences of the
+user with the same dates, and to the projects with the same url, which do
+not have this language yet.
+
+The file is parsed as a stream: the `work` and `projects` arrays are read
+an entry at a time, and the entries are written with one `bulk_create` per
+model and per batch, all in one transaction. The memory is bounded by the
+batch size and not by the size of the file.
+"""
+
+import datetime
+import json
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.html import escape
+
+from resume.keywords import index_keywords
+from resume.models import (
+    Project,
+    ProjectTranslation,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+from resume.timeline import rebuild_career_timelines
+
+
+STREAMED_SECTIONS = ('work', 'projects')
+ONGOING = ('present', 'now', 'current')
+
+_DATE = re.compile(r'^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONResumeError(ValueError):
+    """An invalid JSON Resume file."""
+
+
+class _StreamReader(object):
+    """Decode the JSON values of a text file a value at a time, the buffer
+    only holds the value being decoded."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.offset = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        if self.position > self.chunk_size:
+            self.offset += self.position
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        chunk = self.f.read(self.chunk_size)
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8')
+        self.eof = not chunk
+        self.buffer += chunk
+        return not self.eof
+
+    def error(self, message):
+        return JSONResumeError('{} at character {}'.format(
+            message, self.offset + self.position))
+
+    def peek(self):
+        while True:
+            self.position = _WHITESPACE.match(
+                self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise self.error('Unexpected end of file')
+
+    def consume(self, char):
+        if self.peek() == char:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.consume(char):
+            raise self.error('Expecting {!r}'.format(char))
+
+    def is_truncated(self, error):
+        # the error is at the end of the buffer, in an escape sequence
+        # running to it, or in a string not closed before it
+        return error.pos + len('\\uXXXX') >= len(self.buffer) or \
+            error.msg.startswith('Unterminated string')
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(
+                    self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                # only a value cut by the end of the buffer is read further,
+                # a malformed one fails without reading the rest of the file
+                if self.is_truncated(e) and not self.eof and self.fill():
+                    continue
+                raise self.error(e.msg)
+            # a number may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_resume(f, chunk_size=65536):
+    """Yield the `(section, value)` of the JSON Resume file `f`, the entries
+    of the `work` and `projects` arrays one at a time."""
+    reader = _StreamReader(f, chunk_size)
+    reader.expect('{')
+    if reader.consume('}'):
+        return
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise reader.error('Expecting a property name')
+        reader.expect(':')
+        if key in STREAMED_SECTIONS and reader.peek() == '[':
+            reader.expect('[')
+            if not reader.consume(']'):
+                while True:
+                    yield key, reader.decode()
+                    if reader.consume(']'):
+                        break
+                    reader.expect(',')
+        else:
+            yield key, reader.decode()
+        if reader.consume('}'):
+            break
+        reader.expect(',')
+
+
+def parse_date(value):
+    """Return the date of the `2014-06-29`, `2014-06` or `2014` ISO 8601
+    value, the first day of the month or of the year when it is partial."""
+    match = _DATE.match(value) if isinstance(value, str) else None
+    if match is None:
+        raise ValueError('invalid date {!r}'.format(value))
+    year, month, day = (int(x or 1) for x in match.groups())
+    return datetime.date(year, month, day)
+
+
+def _text(entry, *names, max_length=255):
+    for name in names:
+        value = entry.get(name)
+        if isinstance(value, str) and value.strip():
+            return value.strip()[:max_length]
+    return ''
+
+
+def _summary_html(entry):
+    parts = []
+    for name in ('summary', 'description'):
+        value = entry.get(name)
+        if isinstance(value, str) and value.strip():
+            parts.append('<p>{}</p>'.format(
+                escape(value.strip()).replace('\n', '<br>')))
+    highlights = [x.strip() for x in entry.get('highlights') or ()
+                  if isinstance(x, str) and x.strip()]
+    if highlights:
+        parts.append('<ul>{}</ul>'.format(''.join(
+            '<li>{}</li>'.format(escape(x)) for x in highlights)))
+    return ''.join(parts)
+
+
+def _keywords(entry):
+    keywords = entry.get('keywords') or ()
+    if isinstance(keywords, str):
+        return keywords
+    return ', '.join(x for x in keywords if isinstance(x, str))
+
+
+class JSONResumeImporter(object):
+    """Write the entries of a JSON Resume file for `user`, call `import_file`,
+    or `add` then `finish`, inside a transaction."""
+
+    def __init__(self, user, language=None, is_public=False,
+                 batch_size=500):
+        self.user = user
+        self.language = language or settings.LANGUAGE_CODE
+        self.is_public = is_public
+        self.batch_size = batch_size
+        self.stats = Counter()
+        self.counters = Counter()
+        self.batches = {x: [] for x in STREAMED_SECTIONS}
+
+        # the objects still missing a translation in this language
+        self.work_experiences = defaultdict(list)
+        for pk, date_start, date_end in WorkExperience.objects\
+                .filter(user=user)\
+                .exclude(translations__language=self.language)\
+                .order_by('pk')\
+                .values_list('pk', 'date_start', 'date_end'):
+            self.work_experiences[(date_start, date_end)].append(pk)
+        self.projects = defaultdict(list)
+        for pk, live_link in Project.objects\
+                .filter(user=user)\
+                .exclude(live_link='')\
+                .exclude(translations__language=self.language)\
+                .order_by('pk')\
+                .values_list('pk', 'live_link'):
+            self.projects[live_link].append(pk)
+
+    def add(self, section, value):
+        """Queue an entry of the `work` or `projects` section, written with
+        the next batch."""
+        index = self.counters[section]
+        self.counters[section] += 1
+        if not isinstance(value, dict):
+            raise JSONResumeError('{}[{}] should be an object'.format(
+                section, index))
+        self.batches[section].append((index, value))
+        if len(self.batches[section]) >= self.batch_size:
+            self.flush(section)
+
+    def finish(self):
+        """Write the last batches, return the counts of the created rows."""
+        for section in STREAMED_SECTIONS:
+            self.flush(section)
+        return self.stats
+
+    def import_file(self, f):
+        for section, value in iter_json_resume(f):
+            if section in STREAMED_SECTIONS:
+                self.add(section, value)
+        return self.finish()
+
+    def flush(self, section):
+        batch, self.batches[section] = self.batches[section], []
+        if batch:
+            getattr(self, 'write_{}'.format(section))(batch)
+
+    def write_work(self, batch):
+        entries, new_work_experiences = [], []
+        for index, entry in batch:
+            try:
+                date_start = parse_date(entry.get('startDate'))
+                date_end = entry.get('endDate')
+                # an ongoing position has no end date, or 'Present'
+                if not date_end or str(date_end).lower() in ONGOING:
+                    date_end = None
+                else:
+                    date_end = parse_date(date_end)
+            except ValueError as e:
+                raise JSONResumeError('work[{}]: {}'.format(index, e))
+            if date_end is not None and date_end < date_start:
+                raise JSONResumeError(
+                    'work[{}]: endDate is earlier than startDate'.format(
+                        index))
+
+            candidates = self.work_experiences.get((date_start, date_end))
+            if candidates:
+                entries.append((WorkExperience(pk=candidates.pop(0)), entry))
+                continue
+            work_experience = WorkExperience(
+                user=self.user, is_public=self.is_public,
+                date_start=date_start, date_end=date_end,
+                translations_snapshot={})
+            new_work_experiences.append(work_experience)
+            entries.append((work_experience, entry))
+
+        WorkExperience.objects.bulk_create(new_work_experiences)
+        self.stats['work_experiences'] += len(new_work_experiences)
+
+        translations = []
+        for work_experience, entry in entries:
+            translation = WorkExperienceTranslation(
+                related_model_id=work_experience.pk,
+                language=self.language,
+                position=_text(entry, 'position'),
+                company=_text(entry, 'name', 'company'),
+                location=_text(entry, 'location'),
+                contribution=_summary_html(entry),
+                keywords=_keywords(entry))
+            translation.render_contribution()
+            translations.append(translation)
+        WorkExperienceTranslation.objects.bulk_create(translations)
+        self.stats['work_experience_translations'] += len(translations)
+
+        # the save signals are not sent by `bulk_create`
+        WorkExperienceTranslation.objects\
+            .filter(pk__in=[x.pk for x in translations])\
+            .update_search_vectors()
+        index_keywords(translations)
+        WorkExperience.objects\
+            .filter(pk__in=[x.related_model_id for x in translations])\
+            .rebuild_translation_snapshots()
+
+    def write_projects(self, batch):
+        entries, new_projects = [], []
+        for _, entry in batch:
+            title = _text(entry, 'name')
+            description = _text(entry, 'description', max_length=None)
+            url = _text(entry, 'url')
+            candidates = self.projects.get(url) if url else None
+            if candidates:
+                entries.append(
+                    (Project(pk=candidates.pop(0)), title, description))
+                continue
+            project = Project(
+                user=self.user, is_public=self.is_public,
+                title=title, description=description, live_link=url,
+                github=url if 'github.com' in url else '',
+                download_link='')
+            new_projects.append(project)
+            entries.append((project, title, description))
+
+        Project.objects.bulk_create(new_projects)
+        self.stats['projects'] += len(new_projects)
+
+        translations = [
+            ProjectTranslation(related_model_id=project.pk,
+                               language=self.language, title=title,
+                               description=description)
+            for project, title, description in entries]
+        ProjectTranslation.objects.bulk_create(translations)
+        self.stats['project_translations'] += len(translations)
+
+
+def import_json_resume(f, user, language=None, is_public=False,
+                       batch_size=500):
+    """Import the JSON Resume file `f` for `user` in one transaction, return
+    the counts of the created rows."""
+    with transaction.atomic():
+        stats = JSONResumeImporter(
+            user, language=language, is_public=is_public,
+            batch_size=batch_size).import_file(f)
+    if stats['work_experience_translations']:
+        rebuild_career_timelines([user.pk])
+    return stats
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Normalized keyword index of the work experience translations.
+
+The free-form `WorkExperienceTranslation.keywords` text is parsed into
+lowercased, de-duplicated terms, stored once per language in the `Keyword`
+table and linked to the translations by `WorkExperienceTranslation.tags`.
+The link table is indexed on both sides, it is the inverted index used by
+`WorkExperienceQuerySet.tagged` to filter with joins instead of scanning
+the keywords text.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+
+KEYWORD_MAX_LENGTH = 100
+
+_SEPARATORS = re.compile(r'[,;|\n\r]+')
+_WHITESPACES = re.compile(r'\s+')
+
+INSERT_SQL = """
+INSERT INTO {table} ({language}, {name})
+VALUES {values}
+ON CONFLICT ({language}, {name}) DO NOTHING
+"""
+
+
+def normalize_keyword(keyword):
+    return _WHITESPACES.sub(' ', keyword).strip().lower()[:KEYWORD_MAX_LENGTH]
+
+
+def parse_keywords(text):
+    """Split the keywords text into normalized terms, in their order.
+
+    The terms are separated by commas, semicolons, pipes or new lines, a
+    text without any of them is split on the white spaces instead."""
+    if not text:
+        return []
+    if _SEPARATORS.search(text):
+        terms = _SEPARATORS.split(text)
+    else:
+        terms = text.split()
+
+    keywords = []
+    for term in terms:
+        keyword = normalize_keyword(term)
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def get_or_create_keywords(keyword_model, pairs):
+    """Return `{(language, name): keyword_id}` of the `(language, name)`
+    pairs, creating the missing keywords in one statement. The ones created
+    meanwhile by a concurrent save are skipped by the insert, not failing
+    it."""
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+
+    def fetch():
+        names_by_language = {}
+        for language, name in pairs:
+            names_by_language.setdefault(language, []).append(name)
+        condition = Q()
+        for language, names in names_by_language.items():
+            condition |= Q(language=language, name__in=names)
+        return {
+            (language, name): pk for pk, language, name in
+            keyword_model.objects.filter(condition)
+            .values_list('pk', 'language', 'name')}
+
+    keyword_ids = fetch()
+    missing = pairs.difference(keyword_ids)
+    if missing:
+        quote_name = connection.ops.quote_name
+        sql = INSERT_SQL.format(
+            table=quote_name(keyword_model._meta.db_table),
+            language=quote_name(
+                keyword_model._meta.get_field('language').column),
+            name=quote_name(keyword_model._meta.get_field('name').column),
+            values=', '.join(['(%s, %s)'] * len(missing)))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [x for pair in sorted(missing) for x in pair])
+        keyword_ids = fetch()
+    return keyword_ids
+
+
+def index_keywords(translations):
+    """Synchronize the `tags` of the translations with their `keywords`.
+
+    Only the changed links are inserted or deleted, the queries do not
+    depend on the number of translations."""
+    translations = list(translations)
+    if not translations:
+        return
+    tags_field = translations[0]._meta.get_field('tags')
+    keyword_model = tags_field.related_model
+    through = tags_field.remote_field.through
+    source = tags_field.m2m_field_name()
+    target = tags_field.m2m_reverse_field_name()
+
+    parsed = {
+        translation.pk: [(translation.language, name)
+                         for name in parse_keywords(translation.keywords)]
+        for translation in translations}
+    keyword_ids = get_or_create_keywords(
+        keyword_model, (pair for pairs in parsed.values() for pair in pairs))
+    wanted = {(translation_id, keyword_ids[pair])
+              for translation_id, pairs in parsed.items() for pair in pairs}
+
+    existing = {}
+    for pk, translation_id, keyword_id in through.objects.filter(
+            **{'{}__in'.format(source): list(parsed)}).values_list(
+            'pk', '{}_id'.format(source), '{}_id'.format(target)):
+        existing[(translation_id, keyword_id)] = pk
+
+    obsolete = [pk for link, pk in existing.items() if link not in wanted]
+    if obsolete:
+        through.objects.filter(pk__in=obsolete).delete()
+    through.objects.bulk_create([
+        through(**{'{}_id'.format(source): translation_id,
+                   '{}_id'.format(target): keyword_id})
+        for translation_id, keyword_id in sorted(wanted - set(existing))])
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""Import of the LinkedIn data export archives.
+
+The `Positions.csv`, `Projects.csv` and `Profile.csv` entries are read
+straight from the ZIP archive, a row at a time, without extracting them.
+The positions and the projects are converted to JSON Resume entries and
+written in batches by `JSONResumeImporter`, the profile only fills the
+fields the user left empty.
+"""
+
+import csv
+import datetime
+import io
+import posixpath
+import re
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from profile.models import Profile, ProfileTranslation
+from resume.jsonresume import JSONResumeImporter
+from resume.timeline import rebuild_career_timelines
+
+
+User = get_user_model()
+
+POSITIONS_FILE = 'Positions.csv'
+PROJECTS_FILE = 'Projects.csv'
+PROFILE_FILE = 'Profile.csv'
+
+_DATE_FORMATS = ('%b %Y', '%B %Y', '%m/%Y', '%Y-%m', '%Y')
+_URL = re.compile(r'https?://[^\s,\]]+')
+
+
+class LinkedInError(ValueError):
+    """An invalid LinkedIn archive."""
+
+
+def parse_date(value):
+    """Return the ISO `2015-01` of the `Jan 2015` LinkedIn date, `2015` when
+    there is only a year, None when it is empty."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    for date_format in _DATE_FORMATS:
+        try:
+            date = datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        return date.strftime('%Y' if date_format == '%Y' else '%Y-%m')
+    raise LinkedInError('invalid date {!r}'.format(value))
+
+
+def find_entry(archive, name):
+    """Return the archive entry named `name` in any folder, ignoring the
+    case, or None."""
+    for info in archive.infolist():
+        if posixpath.basename(info.filename).lower() == name.lower():
+            return info
+    return None
+
+
+def iter_rows(archive, name):
+    """Yield the rows of the CSV entry `name` as dicts, streamed from the
+    archive."""
+    info = find_entry(archive, name)
+    if info is None:
+        return
+    with archive.open(info) as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(text):
+            yield {(key or '').strip(): (value or '').strip()
+                   for key, value in row.items()}
+
+
+def position_to_work(row):
+    """Return the JSON Resume work entry of a `Positions.csv` row."""
+    return {
+        'name': row.get('Company Name', ''),
+        'position': row.get('Title', ''),
+        'location': row.get('Location', ''),
+        'summary': row.get('Description', ''),
+        'startDate': parse_date(row.get('Started On')),
+        'endDate': parse_date(row.get('Finished On')),
+    }
+
+
+def project_to_json_resume(row):
+    """Return the JSON Resume project entry of a `Projects.csv` row."""
+    return {
+        'name': row.get('Title', ''),
+        'description': row.get('Description', ''),
+        'url': row.get('Url', ''),
+    }
+
+
+def import_profile(user, row, language):
+    """Fill the empty name, city, site and description of `user` from a
+    `Profile.csv` row, return the names of the filled fields."""
+    filled = []
+    full_name = ' '.join(
+        x for x in (row.get('First Name'), row.get('Last Name')) if x)
+    if full_name and not user.full_name.strip():
+        User.objects.filter(pk=user.pk).update(full_name=full_name[:300])
+        filled.append('full_name')
+
+    profile = Profile.objects.get(user=user)
+    values = {}
+    city = (row.get('Geo Location') or '').split(',')[0].strip()
+    if city and not profile.city:
+        values['city'] = city[:80]
+    websites = _URL.findall(row.get('Websites') or '')
+    if websites and not profile.personal_site:
+        values['personal_site'] = websites[0][:255]
+    summary = row.get('Summary') or ''
+    if summary and not profile.description:
+        values['description'] = summary
+    if values:
+        Profile.objects.filter(pk=profile.pk).update(**values)
+        filled.extend(sorted(values))
+
+    if summary and not profile.translations.filter(
+            language=language).exists():
+        ProfileTranslation.objects.create(
+            related_model=profile, language=language, description=summary)
+        filled.append('description_translation')
+    return filled
+
+
+def import_linkedin_archive(f, user, language=None, is_public=False,
+                            batch_size=500):
+    """Import the LinkedIn ZIP archive `f` for `user` in one transaction,
+    return the counts of the created rows."""
+    try:
+        archive = zipfile.ZipFile(f)
+    except zipfile.BadZipFile as e:
+        raise LinkedInError(str(e))
+
+    with archive, transaction.atomic():
+        if find_entry(archive, POSITIONS_FILE) is None and \
+                find_entry(archive, PROJECTS_FILE) is None and \
+                find_entry(archive, PROFILE_FILE) is None:
+            raise LinkedInError('The archive is not a LinkedIn data export.')
+        importer = JSONResumeImporter(user, language=language,
+                                      is_public=is_public,
+                                      batch_size=batch_size)
+        for row in iter_rows(archive, POSITIONS_FILE):
+            importer.add('work', position_to_work(row))
+        for row in iter_rows(archive, PROJECTS_FILE):
+            importer.add('projects', project_to_json_resume(row))
+        stats = importer.finish()
+        for row in iter_rows(archive, PROFILE_FILE):
+            stats['profile_fields'] = len(
+                import_profile(user, row, importer.language))
+            break
+
+    if stats['work_experience_translations']:
+        rebuild_career_timelines([user.pk])
+    return stats
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resume.bulk import iter_pk_batches
+
+
+class BatchCommand(BaseCommand):
+    """A command processing the rows of `get_queryset` in batches, each in a
+    transaction, see `resume.bulk.iter_pk_batches`. It writes the total
+    after each batch, e.g. '1000 translations rebuilt'."""
+    batch_size = 500
+    batch_size_help = 'How many rows are processed per transaction.'
+    progress = 'rows processed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=self.batch_size,
+            help=self.batch_size_help)
+
+    def get_queryset(self, **options):
+        raise NotImplementedError
+
+    def process_batch(self, rows, **options):
+        """Process the rows of a batch, return how many were processed."""
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        total = 0
+        for rows in iter_pk_batches(self.get_queryset(**options),
+                                    options['batch_size']):
+            with transaction.atomic():
+                total += self.process_batch(rows, **options)
+            self.stdout.write('{} {}'.format(total, self.progress))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done, {} {}.'.format(total, self.progress)))
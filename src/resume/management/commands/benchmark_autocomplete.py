@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import random
+import string
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from resume.autocomplete import PrefixCache, get_suggestions, query_suggestions
+from resume.models import WorkExperience, WorkExperienceTranslation
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the autocomplete lookups against a large synthetic '
+            'translation table. Everything is created in a transaction '
+            'which is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=200000,
+            help='How many synthetic translations are created.')
+        parser.add_argument(
+            '--names', type=int, default=20000,
+            help='How many distinct company names are used.')
+        parser.add_argument(
+            '--lookups', type=int, default=200,
+            help='How many names are typed, one keystroke at a time.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='How many rows are inserted per statement.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    @staticmethod
+    def make_name(rand):
+        words = [''.join(rand.choice(string.ascii_lowercase)
+                         for _ in range(rand.randint(3, 9))).capitalize()
+                 for _ in range(rand.randint(1, 3))]
+        return ' '.join(words)
+
+    @staticmethod
+    def pick_name(rand, names):
+        # a skewed distribution, like the real company names
+        return names[(int(rand.paretovariate(1.2)) - 1) % len(names)]
+
+    def populate(self, rand, rows, names, batch_size):
+        user = User.objects.create_user(
+            email='autocomplete-benchmark@example.com', password='benchmark')
+        company_names = [self.make_name(rand) for _ in range(names)]
+        today = timezone.now().date()
+
+        for offset in range(0, rows, batch_size):
+            size = min(batch_size, rows - offset)
+            experiences = WorkExperience.objects.bulk_create([
+                WorkExperience(user=user, is_public=True, date_start=today,
+                               translations_snapshot={})
+                for _ in range(size)])
+            WorkExperienceTranslation.objects.bulk_create([
+                WorkExperienceTranslation(
+                    related_model=experience, language='en',
+                    company=self.pick_name(rand, company_names),
+                    position=self.make_name(rand),
+                    location=self.make_name(rand))
+                for experience in experiences])
+            self.stdout.write('{} rows created'.format(offset + size))
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE resume_workexperiencetranslation')
+        return user, company_names
+
+    def explain(self, prefix):
+        queryset = WorkExperienceTranslation.objects.filter(
+            company__istartswith=prefix)
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ANALYZE ' + sql, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+
+        with transaction.atomic():
+            user, company_names = self.populate(
+                rand, options['rows'], options['names'],
+                options['batch_size'])
+            typed_names = [self.pick_name(rand, company_names)
+                           for _ in range(options['lookups'])]
+
+            self.stdout.write(self.explain(typed_names[0][:3]))
+
+            start = time.perf_counter()
+            for name in typed_names:
+                query_suggestions(user, 'company', name[:3], 11)
+            elapsed = time.perf_counter() - start
+            self.stdout.write('uncached lookup      {:>8.2f} ms/lookup'.format(
+                elapsed / len(typed_names) * 1e3))
+
+            cache = PrefixCache()
+            keystrokes = 0
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for name in typed_names:
+                    for length in range(1, len(name) + 1):
+                        get_suggestions(user, 'company', name[:length],
+                                        cache=cache)
+                        keystrokes += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                'cached keystroke     {:>8.2f} ms/keystroke, '
+                '{} queries for {} keystrokes'.format(
+                    elapsed / keystrokes * 1e3, len(queries), keystrokes))
+
+            transaction.set_rollback(True)
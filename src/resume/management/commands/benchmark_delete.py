@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from resume.models import WorkExperience, WorkExperienceTranslation
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the delete of a user with many work experience '
+            'translations, which the database deletes with the user, '
+            'against collecting them like `delete()` did before, see '
+            'resume.cascades. Everything is created in transactions which '
+            'are rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--translations', type=int, default=5000,
+            help='How many translations the user has.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='How many rows are inserted per statement.')
+
+    def populate(self, translations, batch_size):
+        user = User.objects.create_user(
+            email='delete-benchmark@example.com', password='benchmark')
+        today = timezone.now().date()
+        # a translation in each language for each work experience
+        languages = [code for code, _ in settings.LANGUAGES]
+        experiences = translations // len(languages)
+
+        for offset in range(0, experiences, batch_size):
+            size = min(batch_size, experiences - offset)
+            created = WorkExperience.objects.bulk_create([
+                WorkExperience(user=user, date_start=today,
+                               translations_snapshot={})
+                for _ in range(size)])
+            WorkExperienceTranslation.objects.bulk_create([
+                WorkExperienceTranslation(
+                    related_model=experience, language=language,
+                    position='position', company='company',
+                    location='location')
+                for experience in created for language in languages])
+        return user
+
+    def measure(self, label, delete, options):
+        with transaction.atomic():
+            user = self.populate(options['translations'],
+                                 options['batch_size'])
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                delete(user)
+                # run the deferred constraint checks in the measure
+                with connection.cursor() as cursor:
+                    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            elapsed = time.perf_counter() - start
+            self.stdout.write('{:<20} {:>10.1f} ms, {} queries'.format(
+                label, elapsed * 1e3, len(queries)))
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def delete_cascading(user):
+        user.delete()
+
+    @staticmethod
+    def delete_collecting(user):
+        # the translations loaded, with their signals, and deleted first
+        WorkExperienceTranslation.objects\
+            .filter(related_model__user=user).delete()
+        WorkExperience.objects.filter(user=user).delete()
+        user.delete()
+
+    def handle(self, *args, **options):
+        self.measure('database cascade', self.delete_cascading, options)
+        self.measure('collector', self.delete_collecting, options)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone, translation
+
+from resume.models import WorkExperience
+
+
+class Command(BaseCommand):
+    help = ('Micro-benchmark the multilingual attribute access of the '
+            'work experience model, no database access is needed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--number', type=int, default=100000,
+            help='How many times each statement is executed.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='How many times each timing is repeated, the best is kept.')
+
+    def make_work_experience(self):
+        work_experience = WorkExperience(
+            id=1, date_start=timezone.now().date())
+        # Fill the translation bundle by hand, so only the attribute path
+        # is measured.
+        work_experience.set_translation_bundle({
+            'en': {
+                'position': 'software engineer',
+                'company': 'memodir',
+                'location': 'beijing',
+                'contribution': '<p>contribution</p>',
+            }
+        })
+        return work_experience
+
+    def handle(self, *args, **options):
+        number = options['number']
+        repeat = options['repeat']
+        namespace = {'work_experience': self.make_work_experience()}
+
+        statements = (
+            ('translated field', 'work_experience.position'),
+            ('translated alias', 'work_experience.position_translated'),
+            ('model field', 'work_experience.date_start'),
+            ('missing attribute',
+             "getattr(work_experience, '_prefetched_objects_cache', None)"),
+        )
+
+        with translation.override('en'):
+            for label, statement in statements:
+                best = min(timeit.repeat(
+                    statement, globals=namespace, number=number,
+                    repeat=repeat))
+                self.stdout.write('{:<20} {:>10.1f} ns/access'.format(
+                    label, best / number * 1e9))
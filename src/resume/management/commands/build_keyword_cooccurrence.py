@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+
+from resume.cooccurrence import rebuild_cooccurrences
+
+
+class Command(BaseCommand):
+    help = ('Count the keyword co-occurrences of the public work experience '
+            'translations and keep the most frequent related keywords of '
+            'each keyword for the related skills suggestions.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='How many related keywords are kept per keyword.')
+        parser.add_argument(
+            '--min-count', type=int, default=1,
+            help='The minimum co-occurrence count of a kept pair.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='How many keyword links are fetched per round trip.')
+
+    def handle(self, *args, **options):
+        total = rebuild_cooccurrences(
+            limit=options['limit'], min_count=options['min_count'],
+            chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Done, {} keyword pairs kept.'.format(total)))
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+
+from resume.similarity import build_indexes
+
+
+class Command(BaseCommand):
+    help = ('Build the TF-IDF similarity indexes of the public users, only '
+            'the users whose work experiences changed since the previous '
+            'build are tokenized again. Run it periodically, e.g. by cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Tokenize all the users again and drop the unused terms.')
+
+    def handle(self, *args, **options):
+        results = build_indexes(full=options['full'])
+        for language, build_id in sorted(results.items()):
+            if build_id is None:
+                self.stdout.write('{}: up to date'.format(language))
+            else:
+                self.stdout.write('{}: built {}'.format(language, build_id))
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from resume.models import WorkExperience
+from resume.transfer import FORMATS, export_lines, guess_format
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Export the work experiences with their translations as JSON '
+            'lines or CSV, streamed in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='The file to write, the standard output by default.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='The export format, guessed from the output file name, '
+                 'JSON lines by default.')
+        parser.add_argument(
+            '--user', action='append', default=[],
+            help='Only export the work experiences of this user (email), '
+                 'can be repeated.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='How many work experiences are read per query.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        format = options['format'] or guess_format(
+            None if output == '-' else output)
+
+        queryset = WorkExperience.objects.all()
+        if options['user']:
+            users = User.objects.filter(email__in=options['user'])
+            missing = set(options['user']) - {x.email for x in users}
+            if missing:
+                raise CommandError('Unknown users: {}'.format(
+                    ', '.join(sorted(missing))))
+            queryset = queryset.filter(user__in=users)
+
+        lines = export_lines(queryset, format=format,
+                             batch_size=options['batch_size'])
+        if output == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(
+            'Done, exported to {}.'.format(output)))
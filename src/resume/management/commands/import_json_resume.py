@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from resume.jsonresume import JSONResumeError, import_json_resume
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Import the work experiences and the projects of a JSON Resume '
+            'file for a user, in one transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The JSON Resume file.')
+        parser.add_argument(
+            '--user', required=True, help='The email of the user.')
+        parser.add_argument(
+            '--language', default=settings.LANGUAGE_CODE,
+            choices=[x for x, _ in settings.LANGUAGES],
+            help='The language of the file.')
+        parser.add_argument(
+            '--public', action='store_true',
+            help='Make the imported work experiences and projects public.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='How many entries are written per query.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('Unknown user: {}'.format(options['user']))
+
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                stats = import_json_resume(
+                    f, user, language=options['language'],
+                    is_public=options['public'],
+                    batch_size=options['batch_size'])
+        except (OSError, JSONResumeError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done, {} work experiences, {} work experience translations, '
+            '{} projects and {} project translations created.'.format(
+                stats['work_experiences'],
+                stats['work_experience_translations'],
+                stats['projects'], stats['project_translations'])))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from resume.transfer import (
+    FORMATS,
+    TransferError,
+    guess_format,
+    import_records,
+    read_records,
+)
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Import the work experiences with their translations from JSON '
+            'lines or CSV, upserted in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file to import.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='The file format, guessed from its name, JSON lines by '
+                 'default.')
+        parser.add_argument(
+            '--user',
+            help='Import all the work experiences for this user (email) '
+                 'instead of the users of the records.')
+        parser.add_argument(
+            '--keep-ids', action='store_true',
+            help='Create the new work experiences with the ids of the file '
+                 'when they are free.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='How many work experiences are imported per transaction.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or guess_format(path)
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError('Unknown user: {}'.format(options['user']))
+
+        try:
+            with open(path, encoding='utf-8', newline='') as f:
+                stats = import_records(
+                    read_records(f, format=format), user=user,
+                    keep_ids=options['keep_ids'],
+                    batch_size=options['batch_size'])
+        except (OSError, TransferError) as e:
+            raise CommandError(str(e))
+
+        for name, counts in stats.items():
+            self.stdout.write('{}: {} created, {} updated, {} unchanged'
+                              .format(name, counts['created'],
+                                      counts['updated'], counts['unchanged']))
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth import get_user_model
+
+from resume.management.base import BatchCommand
+from resume.timeline import rebuild_career_timelines
+
+
+User = get_user_model()
+
+
+class Command(BatchCommand):
+    help = ('Compute again the career timeline statistics of the users in '
+            'batches, run it daily to extend the ongoing work experiences.')
+    batch_size_help = 'How many users are computed per transaction.'
+    progress = 'timelines computed'
+
+    def get_queryset(self, **options):
+        return User.objects.values_list('pk', flat=True)
+
+    def process_batch(self, user_ids, **options):
+        rebuild_career_timelines(user_ids)
+        return len(user_ids)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from resume.keywords import index_keywords
+from resume.management.base import BatchCommand
+from resume.models import WorkExperienceTranslation
+
+
+class Command(BatchCommand):
+    help = ('Build the normalized keyword index of the work experience '
+            'translations in batches, e.g. for the rows saved before the '
+            'index existed.')
+    batch_size = 1000
+    batch_size_help = 'How many translations are indexed per batch.'
+    progress = 'translations indexed'
+
+    def get_queryset(self, **options):
+        return WorkExperienceTranslation.objects\
+            .only('pk', 'language', 'keywords')
+
+    def process_batch(self, translations, **options):
+        index_keywords(translations)
+        return len(translations)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from resume.management.base import BatchCommand
+from resume.models import WorkExperienceTranslation
+
+
+class Command(BatchCommand):
+    help = ('Rebuild the full-text search vectors of the work experience '
+            'translations in batches, e.g. after `RESUME_SEARCH_CONFIGS` '
+            'changed.')
+    batch_size = 1000
+    batch_size_help = 'How many translations are updated per statement.'
+    progress = 'translations rebuilt'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='Only rebuild the vectors which were never built.')
+
+    def get_queryset(self, **options):
+        queryset = WorkExperienceTranslation.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+        return queryset.values_list('pk', flat=True)
+
+    def process_batch(self, ids, **options):
+        return WorkExperienceTranslation.objects.filter(pk__in=ids)\
+            .update_search_vectors()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from resume.management.base import BatchCommand
+from resume.models import WorkExperience
+
+
+class Command(BatchCommand):
+    help = ('Rebuild the translations snapshot of the work experiences in '
+            'batches, e.g. for the rows created before the snapshot existed.')
+    batch_size_help = 'How many work experiences are updated per statement.'
+    progress = 'work experiences rebuilt'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='Only rebuild the snapshots which were never built.')
+
+    def get_queryset(self, **options):
+        queryset = WorkExperience.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(translations_snapshot__isnull=True)
+        return queryset.values_list('pk', flat=True)
+
+    def process_batch(self, ids, **options):
+        return WorkExperience.objects.filter(pk__in=ids)\
+            .rebuild_translation_snapshots()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from resume.batch import recover_batch_job
+from resume.models import BatchJob
+
+
+class Command(BaseCommand):
+    help = ('Run again the batches of work experiences left pending or '
+            'running by a process which stopped. Run it when the web '
+            'processes start and from cron, e.g. every 10 minutes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=60,
+            help='How many minutes a job is pending or running before it is '
+                 'recovered.')
+
+    def handle(self, *args, **options):
+        stale_after = datetime.timedelta(minutes=options['stale_after'])
+        job_ids = list(BatchJob.objects.stale(stale_after).order_by('pk')
+                       .values_list('pk', flat=True))
+
+        done = failed = 0
+        for job_id in job_ids:
+            status = recover_batch_job(job_id, stale_after)
+            if status == BatchJob.DONE:
+                done += 1
+            elif status == BatchJob.FAILED:
+                failed += 1
+            if status is not None:
+                self.stdout.write('batch job {} {}'.format(job_id, status))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done, {} jobs run, {} failed.'.format(done, failed)))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from resume.imports import recover_import_job
+from resume.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = ('Import again the uploads left pending or running by a process '
+            'which stopped, or mark them as failed when their file is gone. '
+            'Run it when the web processes start and from cron, e.g. every '
+            '10 minutes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=60,
+            help='How many minutes a job is pending or running before it is '
+                 'recovered.')
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Mark the stale jobs as failed instead of importing them.')
+
+    def handle(self, *args, **options):
+        stale_after = datetime.timedelta(minutes=options['stale_after'])
+        job_ids = list(ImportJob.objects.stale(stale_after).order_by('pk')
+                       .values_list('pk', flat=True))
+
+        done = failed = 0
+        for job_id in job_ids:
+            status = recover_import_job(job_id, stale_after,
+                                        resume=not options['fail'])
+            if status == ImportJob.DONE:
+                done += 1
+            elif status == ImportJob.FAILED:
+                failed += 1
+            if status is not None:
+                self.stdout.write('import job {} {}'.format(job_id, status))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done, {} jobs imported, {} failed.'.format(done, failed)))
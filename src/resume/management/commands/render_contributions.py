@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from django.db.models import Q
+
+from resume.management.base import BatchCommand
+from resume.models import WorkExperience, WorkExperienceTranslation
+from resume.sanitizer import POLICY_VERSION
+
+
+class Command(BatchCommand):
+    help = ('Render again the sanitized HTML and the excerpt of the work '
+            'experience contributions in batches, e.g. after the sanitizer '
+            'policy changed.')
+    batch_size_help = 'How many translations are rendered per transaction.'
+    progress = 'translations rendered'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--outdated-only', action='store_true',
+            help='Only render the translations rendered with another policy '
+                 'version than the current one.')
+
+    def get_queryset(self, **options):
+        queryset = WorkExperienceTranslation.objects\
+            .only('pk', 'related_model_id', 'contribution')
+        if options['outdated_only']:
+            queryset = queryset.filter(
+                Q(contribution_version__isnull=True) |
+                ~Q(contribution_version=POLICY_VERSION))
+        return queryset
+
+    def process_batch(self, translations, **options):
+        for translation in translations:
+            fields = translation.render_contribution()
+            WorkExperienceTranslation.objects\
+                .filter(pk=translation.pk)\
+                .update(**{x: getattr(translation, x) for x in fields})
+        WorkExperience.objects.filter(
+            pk__in={x.related_model_id for x in translations})\
+            .rebuild_translation_snapshots()
+        return len(translations)
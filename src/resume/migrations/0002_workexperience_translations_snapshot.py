@@ -0,0 +1,19 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:31
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workexperience',
+            name='translations_snapshot',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
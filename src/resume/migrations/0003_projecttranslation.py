@@ -0,0 +1,32 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0002_workexperience_translations_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTranslation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('', '*--- select language ---'), ('en', 'English'), ('zh-hans', 'Chinese')], db_index=True, max_length=30, verbose_name='Language')),
+                ('title', models.CharField(max_length=255, verbose_name='Title')),
+                ('description', models.TextField(blank=True, verbose_name='Summary')),
+                ('related_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='resume.Project')),
+            ],
+            options={
+                'ordering': ('language',),
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='projecttranslation',
+            unique_together={('related_model', 'language')},
+        ),
+    ]
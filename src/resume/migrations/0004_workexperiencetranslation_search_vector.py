@@ -0,0 +1,59 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:35
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Case, CharField, Func, Value, When
+
+
+# A copy of the search vector of `resume.search` when the column was added,
+# so this migration keeps building the same vectors when the search changes.
+DEFAULT_SEARCH_CONFIG = 'simple'
+
+
+class StripTags(Func):
+    function = 'REGEXP_REPLACE'
+    template = "%(function)s(%(expressions)s, '<[^>]*>', ' ', 'g')"
+    output_field = CharField()
+
+
+def search_vector_expression():
+    configs = getattr(settings, 'RESUME_SEARCH_CONFIGS', {})
+    config = Case(
+        *[When(language=language, then=Value(config))
+          for language, config in sorted(configs.items())],
+        default=Value(DEFAULT_SEARCH_CONFIG), output_field=CharField())
+    return SearchVector('position', weight='A', config=config) + \
+        SearchVector('company', weight='A', config=config) + \
+        SearchVector('keywords', weight='B', config=config) + \
+        SearchVector('location', weight='C', config=config) + \
+        SearchVector(StripTags('contribution'), weight='D', config=config)
+
+
+def build_search_vectors(apps, schema_editor):
+    WorkExperienceTranslation = apps.get_model(
+        'resume', 'WorkExperienceTranslation')
+    WorkExperienceTranslation.objects.update(
+        search_vector=search_vector_expression())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0003_projecttranslation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='workexperiencetranslation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='resume_wet_search_vector_gin'),
+        ),
+        migrations.RunPython(build_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# `istartswith` compares `UPPER("column"::text)`, so the indexes are built on
+# that expression for the autocomplete lookups to use them.
+TRIGRAM_INDEXED_FIELDS = ('company', 'position', 'location')
+
+
+def create_index_sql(field):
+    return (
+        'CREATE INDEX resume_wet_{0}_trgm '
+        'ON resume_workexperiencetranslation '
+        'USING gin (UPPER("{0}"::text) gin_trgm_ops);'.format(field))
+
+
+def drop_index_sql(field):
+    return 'DROP INDEX IF EXISTS resume_wet_{}_trgm;'.format(field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0004_workexperiencetranslation_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ] + [
+        migrations.RunSQL(create_index_sql(field), drop_index_sql(field))
+        for field in TRIGRAM_INDEXED_FIELDS
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0005_workexperiencetranslation_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=30, verbose_name='Language')),
+                ('name', models.CharField(max_length=100, verbose_name='Keyword')),
+            ],
+            options={
+                'ordering': ('language', 'name'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='keyword',
+            unique_together={('language', 'name')},
+        ),
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='translations', to='resume.Keyword'),
+        ),
+    ]
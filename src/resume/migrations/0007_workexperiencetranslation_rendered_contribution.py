@@ -0,0 +1,120 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:41
+
+import html
+import re
+
+import bleach
+from django.db import migrations, models
+
+
+# A copy of `resume.sanitizer` at policy version 1, so this migration keeps
+# rendering the same HTML when the policy changes.
+POLICY_VERSION = 1
+
+ALLOWED_TAGS = [
+    'a', 'b', 'blockquote', 'br', 'code', 'em', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'i', 'li', 'ol', 'p', 'pre', 's', 'strong', 'sub', 'sup', 'u',
+    'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+}
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+EXCERPT_LENGTH = 300
+
+_UNSAFE_BLOCKS = re.compile(
+    r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_EMPTY_PARAGRAPHS = re.compile(r'<p>(\s|&nbsp;|<br>)*</p>')
+_BLOCK_TAGS = re.compile(
+    r'<(?=/?(p|br|li|hr|h[1-6]|blockquote|pre|ul|ol|div)\b)', re.IGNORECASE)
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+_WHITESPACES = re.compile(r'\s+')
+
+
+def sanitize_contribution(value):
+    if not value:
+        return ''
+    cleaned = bleach.clean(
+        _UNSAFE_BLOCKS.sub('', value), tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES, protocols=ALLOWED_PROTOCOLS,
+        strip=True, strip_comments=True)
+    cleaned = _EMPTY_PARAGRAPHS.sub('', cleaned)
+    cleaned = _BLANK_LINES.sub('\n', cleaned)
+    return cleaned.strip()
+
+
+def make_excerpt(value, length=EXCERPT_LENGTH):
+    if not value:
+        return ''
+    text = bleach.clean(_BLOCK_TAGS.sub(' <', value), tags=[], strip=True,
+                        strip_comments=True)
+    text = _WHITESPACES.sub(' ', html.unescape(text)).strip()
+    if len(text) <= length:
+        return text
+    truncated = text[:length - 1]
+    if ' ' in truncated and not text[length - 1].isspace():
+        truncated = truncated.rsplit(' ', 1)[0]
+    return truncated.rstrip() + '\u2026'
+
+
+def render_contribution(value):
+    sanitized = sanitize_contribution(value)
+    return {
+        'contribution_html': sanitized,
+        'contribution_excerpt': make_excerpt(sanitized),
+        'contribution_version': POLICY_VERSION,
+    }
+
+
+# the multilingual fields of the work experience at this migration
+REBUILD_SNAPSHOTS_SQL = """
+UPDATE resume_workexperience SET translations_snapshot = COALESCE((
+    SELECT jsonb_object_agg(t.language, jsonb_build_object(
+        'position', t.position,
+        'company', t.company,
+        'location', t.location,
+        'contribution', t.contribution,
+        'contribution_html', t.contribution_html,
+        'contribution_excerpt', t.contribution_excerpt))
+    FROM resume_workexperiencetranslation t
+    WHERE t.related_model_id = resume_workexperience.id
+), '{}'::jsonb)
+"""
+
+
+def render_contributions(apps, schema_editor):
+    WorkExperienceTranslation = apps.get_model(
+        'resume', 'WorkExperienceTranslation')
+    for pk, contribution in WorkExperienceTranslation.objects\
+            .values_list('pk', 'contribution').iterator():
+        WorkExperienceTranslation.objects.filter(pk=pk).update(
+            **render_contribution(contribution))
+    # the snapshots miss the new multilingual fields
+    schema_editor.execute(REBUILD_SNAPSHOTS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0006_keyword_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='contribution_excerpt',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='contribution_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='contribution_version',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(render_contributions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0007_workexperiencetranslation_rendered_contribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordCooccurrence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='resume.Keyword')),
+                ('related_keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='resume.Keyword')),
+            ],
+            options={
+                'ordering': ('keyword', '-count'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='keywordcooccurrence',
+            unique_together={('keyword', 'related_keyword')},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:47
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myaccount', '0001_initial'),
+        ('resume', '0008_keywordcooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerTimeline',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='career_timeline', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('stats', django.contrib.postgres.fields.jsonb.JSONField(default=dict, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
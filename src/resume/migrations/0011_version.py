@@ -0,0 +1,23 @@
+# Generated by Django 2.1.2 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0010_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workexperience',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workexperiencetranslation',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
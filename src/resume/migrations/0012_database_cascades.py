@@ -0,0 +1,90 @@
+# Generated by Django 2.1.2 on 2026-10-18 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# A copy of `resume.cascades` when the cascades were added, so this
+# migration keeps altering the same constraints when the module changes.
+ALTER_FOREIGN_KEY_SQL = """
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN
+        SELECT c.conname, c.confrelid::regclass AS target, a.attname
+        FROM pg_constraint c
+        JOIN pg_attribute a
+            ON a.attrelid = c.confrelid AND a.attnum = c.confkey[1]
+        WHERE c.contype = 'f' AND c.conrelid = '{table}'::regclass
+            AND c.conkey = ARRAY[(
+                SELECT attnum FROM pg_attribute
+                WHERE attrelid = '{table}'::regclass
+                    AND attname = '{column}')]
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE {table} DROP CONSTRAINT %1$I, '
+            'ADD CONSTRAINT %1$I FOREIGN KEY ("{column}") '
+            'REFERENCES %2$s (%3$I) {on_delete} '
+            'DEFERRABLE INITIALLY DEFERRED',
+            fk.conname, fk.target, fk.attname);
+    END LOOP;
+END
+$$;
+"""
+
+
+def alter_foreign_key_sql(table, column, on_delete):
+    return ALTER_FOREIGN_KEY_SQL.format(
+        table=table, column=column, on_delete=on_delete)
+
+
+def cascade_foreign_key(table, column):
+    return migrations.RunSQL(
+        alter_foreign_key_sql(table, column, 'ON DELETE CASCADE'),
+        alter_foreign_key_sql(table, column, ''))
+
+
+# altered after the `AlterField`, which recreate the constraints without
+# the cascade
+CASCADED_FOREIGN_KEYS = (
+    ('resume_project', 'user_id'),
+    ('resume_projecttranslation', 'related_model_id'),
+    ('resume_workexperience', 'user_id'),
+    ('resume_workexperiencetranslation', 'related_model_id'),
+    ('resume_workexperiencetranslation_tags', 'workexperiencetranslation_id'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0011_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='projecttranslation',
+            name='related_model',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='translations', to='resume.Project'),
+        ),
+        migrations.AlterField(
+            model_name='workexperience',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='workexperiencetranslation',
+            name='related_model',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='translations', to='resume.WorkExperience'),
+        ),
+    ] + [
+        cascade_foreign_key(table, column)
+        for table, column in CASCADED_FOREIGN_KEYS
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.1.2 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0012_database_cascades'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workexperience',
+            index=models.Index(fields=['user', '-date_start', '-id'], name='resume_we_user_date_start_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.1.2 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0013_workexperience_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='started_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='archive',
+            field=models.FileField(upload_to='', verbose_name='File'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.1.2 on 2026-10-18 19:41
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('resume', '0014_importjob_private_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=20)),
+                ('error', models.TextField(blank=True, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(editable=False, null=True)),
+                ('finished_at', models.DateTimeField(editable=False, null=True)),
+                ('operation', models.CharField(choices=[('delete', 'Delete'), ('publish', 'Publish'), ('unpublish', 'Unpublish')], max_length=20)),
+                ('ids', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('count', models.PositiveIntegerField(editable=False, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'abstract': False,
+            },
+        ),
+    ]
@@ -1,97 +1,131 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import re
+import os
+import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, F, Func, Q
 from django.urls import reverse
-from django.utils.translation import get_language, gettext_lazy as _
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
 from tinymce.models import HTMLField
 
+from resume.keywords import (
+    KEYWORD_MAX_LENGTH,
+    index_keywords,
+    normalize_keyword,
+)
+from resume.sanitizer import render_contribution
+from resume.search import search_translations, update_search_vectors
+from resume.multilingual import (  # noqa
+    get_language_fallback_chain,
+    MultilingualModel,
+    MultilingualQuerySet,
+    TranslatedField,
+    TranslationManager,
+    TranslationModel,
+    TranslationSnapshotField,
+)
+from resume.versioning import VersionedModel
+
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
-models.options.DEFAULT_NAMES += ('translation', 'multilingual')
 
 
-class MultilingualModel(models.Model):
+class Keyword(models.Model):
+    """A normalized term of the translation keywords, see `resume.keywords`.
+    """
+    language = models.CharField(max_length=30, verbose_name=_('Language'))
+    name = models.CharField(max_length=KEYWORD_MAX_LENGTH,
+                            verbose_name=_('Keyword'))
+
+    class Meta:
+        unique_together = (('language', 'name'),)
+        ordering = ('language', 'name')
 
-    _name_regex = re.compile(r'_translated$')
+    def __str__(self):
+        return '{}:{}'.format(self.language, self.name)
+
+
+class KeywordCooccurrence(models.Model):
+    """How many public translations are tagged with both keywords, the most
+    frequent ones of each keyword are rebuilt by the
+    `build_keyword_cooccurrence` command."""
+    keyword = models.ForeignKey(
+        Keyword, on_delete=models.CASCADE, related_name='cooccurrences')
+    related_keyword = models.ForeignKey(
+        Keyword, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField()
 
     class Meta:
-        abstract = True
+        unique_together = (('keyword', 'related_keyword'),)
+        ordering = ('keyword', '-count')
+
+    def __str__(self):
+        return '{} & {}: {}'.format(
+            self.keyword_id, self.related_keyword_id, self.count)
+
+
+class WorkExperienceTranslationQuerySet(models.QuerySet):
+
+    def update_search_vectors(self):
+        return update_search_vectors(self)
+
+    def search(self, text):
+        """Full-text search of `text`, see `resume.search`."""
+        return search_translations(self, text)
+
 
-    def __getattr__(self, attr):
-        """the logic is that:
-        1. all the subClass of this model could have mulitple languages
-        2. first try to find the translation by the current settings lang
-        3. if it can be found, try to get the first language
-        4. if it still cannot be found, try to search in the __dict__ with the
-           name key"""
-        name = self._name_regex.sub('', attr)
-        if name not in self._meta.multilingual:
-            return super().__getattribute__(attr)
-
-        lang = get_language()
-        try:
-            translation = self._meta.translation.objects.get(
-                related_model=self, language=lang)
-            return getattr(translation, name)
-        except self._meta.translation.DoesNotExist:
-            translation = self._meta.translation.objects.filter(
-                related_model=self).first()
-            if translation:
-                return getattr(translation, name)
-            else:
-                try:
-                    return self.__dict__[name]
-                except KeyError:
-                    return ''
-
-
-class WorkExperienceTranslationManager(models.Manager):
-
-    def get_all_existing_languages(self, work_experience_id):
-        return self.get_queryset()\
-            .filter(related_model__exact=work_experience_id)
-
-    def get_all_existing_language_list(self, work_experience_id):
-        return self.get_all_existing_languages(work_experience_id)\
-            .values_list('language', flat=True)
-
-    def is_language_exist(self, work_experience_id, language):
-        return self.get_all_existing_languages(work_experience_id)\
-            .filter(language__iexact=language).exists()
-
-
-class WorkExperienceTranslation(models.Model):
-    LANGUAGES = settings.LANGUAGES.copy()
-    LANGUAGES.insert(0, ('', _('*--- select language ---')))
+WorkExperienceTranslationManager = TranslationManager.from_queryset(
+    WorkExperienceTranslationQuerySet, 'WorkExperienceTranslationManager')
 
+
+class WorkExperienceTranslation(VersionedModel, TranslationModel):
+    # deleted by the database, see resume.cascades
     related_model = models.ForeignKey(
         'resume.WorkExperience',
-        on_delete=models.CASCADE, related_name='translations')
-    language = models.CharField(max_length=30, verbose_name=_('Language'),
-                                choices=LANGUAGES, db_index=True)
+        on_delete=models.DO_NOTHING, related_name='translations')
     position = models.CharField(max_length=255, verbose_name=_('Job position'))
     company = models.CharField(max_length=255, verbose_name=_('Company'))
     location = models.CharField(max_length=255, verbose_name=_('Location'))
 
     contribution = HTMLField(blank=True, default='',
                              verbose_name=_('Highlighted contribution'))
+    # rendered from `contribution` on save, see `resume.sanitizer`
+    contribution_html = models.TextField(
+        blank=True, default='', editable=False)
+    contribution_excerpt = models.TextField(
+        blank=True, default='', editable=False)
+    contribution_version = models.PositiveSmallIntegerField(
+        null=True, editable=False)
     keywords = models.TextField(
         blank=True, default='', verbose_name=_('Keywords'),
         help_text=_('The words that might search for when looking'))
+    # maintained by `post_save_workexperience_translation_handler`
+    search_vector = SearchVectorField(null=True, editable=False)
+    # the parsed `keywords`, maintained by
+    # `post_save_workexperience_translation_handler`
+    tags = models.ManyToManyField(
+        Keyword, related_name='translations', blank=True, editable=False)
 
     objects = WorkExperienceTranslationManager()
 
-    class Meta:
-        ordering = ('language',)
+    class Meta(TranslationModel.Meta):
         unique_together = (('related_model', 'language'),)
+        indexes = [
+            GinIndex(fields=['search_vector'],
+                     name='resume_wet_search_vector_gin'),
+        ]
 
     def __unicode__(self):
         return ('[work-experience:{0}]-[pk:{1}]:[lang:{2}]'
@@ -103,33 +137,103 @@ class WorkExperienceTranslation(models.Model):
     def __str__(self):
         return self.__unicode__()
 
+    def render_contribution(self):
+        rendered = render_contribution(self.contribution)
+        for name, value in rendered.items():
+            setattr(self, name, value)
+        return list(rendered)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.render_contribution()
+        elif 'contribution' in update_fields:
+            kwargs['update_fields'] = \
+                set(update_fields) | set(self.render_contribution())
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('work-experience-translation-new', kwargs={
             'work_experience_id': self.related_model.id
         })
 
-    def get_language(self):
-        _language = [y for x, y in settings.LANGUAGES
-                     if x == self.language]
-        return _(_language[0])
-
 
-class WorkExperience(MultilingualModel):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+class Not(Func):
+    template = 'NOT %(expressions)s'
+    output_field = models.BooleanField()
+
+
+class WorkExperienceQuerySet(MultilingualQuerySet):
+
+    def toggle_public(self):
+        """Flip `is_public` with one `UPDATE ... SET is_public = NOT
+        is_public`, return the number of updated rows."""
+        return self.update(is_public=Not(F('is_public')),
+                           version=F('version') + 1)
+
+    def set_public(self, is_public):
+        """Publish, or unpublish, the work experiences with one UPDATE of
+        the rows which change, return their number."""
+        return self.exclude(is_public=is_public).update(
+            is_public=is_public, version=F('version') + 1)
+
+    def tagged(self, *keywords, language=None):
+        """Filter the work experiences having a translation tagged with each
+        of the keywords, e.g. `tagged('python', 'django')`."""
+        queryset = self
+        for keyword in sorted({normalize_keyword(x) for x in keywords}):
+            if not keyword:
+                continue
+            condition = {'translations__tags__name': keyword}
+            if language is not None:
+                condition['translations__tags__language'] = language
+            queryset = queryset.filter(**condition)
+        return queryset.distinct() if queryset is not self else queryset
+
+    def keyword_facets(self, language=None):
+        """Return the `{'name', 'count'}` of the keywords of these work
+        experiences, the most used first."""
+        keywords = Keyword.objects.filter(
+            translations__related_model__in=self.order_by().values('pk'))
+        if language is not None:
+            keywords = keywords.filter(language=language)
+        return keywords.values('name')\
+            .annotate(count=Count('translations__related_model',
+                                  distinct=True))\
+            .order_by('-count', 'name')
+
+
+class WorkExperience(VersionedModel, MultilingualModel):
+    # deleted by the database, see resume.cascades
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING)
     is_public = models.BooleanField(
         _('Is this experience public?'), default=False)
     date_start = models.DateField(_('Start date'))
     date_end = models.DateField(_('End date'), null=True, blank=True)
+    # {language: {field: value}} of all the translations, maintained by the
+    # translation signals, NULL until it is built
+    translations_snapshot = TranslationSnapshotField(
+        null=True, blank=True, editable=False)
+
+    objects = WorkExperienceQuerySet.as_manager()
 
     class Meta:
         app_label = 'resume'
-        multilingual = ('position', 'company', 'location', 'contribution')
+        multilingual = ('position', 'company', 'location', 'contribution',
+                        'contribution_html', 'contribution_excerpt')
         translation = WorkExperienceTranslation
+        translation_snapshot = 'translations_snapshot'
+        indexes = [
+            # the keyset pagination of the lists, see resume.pagination
+            models.Index(fields=['user', '-date_start', '-id'],
+                         name='resume_we_user_date_start_idx'),
+        ]
 
     def get_filled_languages(self):
-        _languages = set(
-            WorkExperienceTranslation.objects.get_all_existing_language_list(
-                self.id))
+        # annotated by `MultilingualQuerySet.with_filled_languages`
+        if 'filled_languages' in self.__dict__:
+            return set(self.__dict__['filled_languages'] or ())
+        _languages = set(self.get_translation_bundle())
         return _languages
 
     def get_filled_language_list(self):
@@ -146,6 +250,11 @@ class WorkExperience(MultilingualModel):
         return [(x, y) for x, y in settings.LANGUAGES
                 if x in unfilled_languages]
 
+    def get_language_status_list(self):
+        """Return `(language, name, is_filled)` for all the languages."""
+        filled_languages = self.get_filled_languages()
+        return [(x, y, x in filled_languages) for x, y in settings.LANGUAGES]
+
     def clean(self):
         if self.date_end and self.date_end and self.date_end < self.date_start:
             raise ValidationError({
@@ -154,6 +263,8 @@ class WorkExperience(MultilingualModel):
 
     def save(self, *args, **kwargs):
         self.clean()
+        if self._state.adding and self.translations_snapshot is None:
+            self.translations_snapshot = {}
         super().save(*args, **kwargs)
 
     def __unicode__(self):
@@ -179,7 +290,26 @@ class WorkExperience(MultilingualModel):
         return self.__unicode__()
 
 
-class Project(models.Model):
+class ProjectTranslation(TranslationModel):
+    # deleted by the database, see resume.cascades
+    related_model = models.ForeignKey(
+        'resume.Project',
+        on_delete=models.DO_NOTHING, related_name='translations')
+    title = models.CharField(max_length=255, verbose_name=_('Title'))
+    description = models.TextField(blank=True, verbose_name=_('Summary'))
+
+    class Meta(TranslationModel.Meta):
+        unique_together = (('related_model', 'language'),)
+
+    def __unicode__(self):
+        return '[project:{0}]-[pk:{1}]:[lang:{2}]-[title:{3}]'.format(
+            self.related_model_id, self.id, self.language, self.title)
+
+    def __str__(self):
+        return self.__unicode__()
+
+
+class Project(MultilingualModel):
     title = models.CharField(max_length=255, verbose_name=_('Title'))
     download_link = models.CharField(
         max_length=255, verbose_name=_('Download Link'))
@@ -193,10 +323,18 @@ class Project(models.Model):
     is_public = models.BooleanField(
         _('Is this project public?'), default=False)
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # deleted by the database, see resume.cascades
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING)
+
+    objects = MultilingualQuerySet.as_manager()
 
     class Meta:
         app_label = 'resume'
+        # `title` and `description` are the values of the default language,
+        # the translated ones are read with `title_translated` and
+        # `description_translated`
+        multilingual = ('title', 'description')
+        translation = ProjectTranslation
 
     def __unicode__(self):
         return self.title
@@ -205,6 +343,180 @@ class Project(models.Model):
         return self.__unicode__()
 
 
+class CareerTimeline(models.Model):
+    """The career statistics of a user computed from the dates of their work
+    experiences, see `resume.timeline`."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='career_timeline')
+    stats = JSONField(default=dict, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def get_stats(self, public_only=True):
+        return self.stats.get('public' if public_only else 'all') or {}
+
+    def __str__(self):
+        return 'career timeline of {}'.format(self.user_id)
+
+
+class ImportStorage(FileSystemStorage):
+    """The uploads waiting for their import, in `RESUME_IMPORT_ROOT`, out
+    of `MEDIA_ROOT` so they are not served."""
+
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location,
+                                      settings.RESUME_IMPORT_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+def import_archive_path(instance, filename):
+    """A random name, the uploads of the users must not be guessed."""
+    extension = os.path.splitext(filename)[1].lower()
+    return '{:%Y/%m}/{}{}'.format(timezone.now(), uuid.uuid4().hex,
+                                  extension)
+
+
+class ImportArchiveField(models.FileField):
+    """The `FileField` of the uploads, in `ImportStorage` at a random path.
+
+    The storage and the path are not written in the migrations, they do not
+    change the column and a migration must not import this module."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('storage', ImportStorage())
+        kwargs.setdefault('upload_to', import_archive_path)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['upload_to'] = ''
+        kwargs.pop('storage', None)
+        return name, 'django.db.models.FileField', args, kwargs
+
+
+class BackgroundJobQuerySet(models.QuerySet):
+
+    def stale(self, stale_after):
+        """The jobs pending or running for more than `stale_after`, whose
+        thread was lost with its process."""
+        cutoff = timezone.now() - stale_after
+        return self.filter(
+            Q(status=BackgroundJob.PENDING, created_at__lt=cutoff) |
+            Q(status=BackgroundJob.RUNNING, started_at__lt=cutoff) |
+            Q(status=BackgroundJob.RUNNING, started_at=None,
+              created_at__lt=cutoff))
+
+    def claim_stale(self, pk, stale_after):
+        """Mark the stale job `pk` as running again, return whether it was
+        still stale. Moving `started_at` makes it fresh for the other
+        processes recovering the jobs."""
+        return bool(self.stale(stale_after).filter(pk=pk).update(
+            status=BackgroundJob.RUNNING, started_at=timezone.now()))
+
+
+class BackgroundJob(models.Model):
+    """A task of `resume.background` recorded with its status, so the jobs
+    lost with their process can be recovered, see
+    `BackgroundJobQuerySet.stale`."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES,
+                              default=PENDING, editable=False)
+    error = models.TextField(blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, editable=False)
+    finished_at = models.DateTimeField(null=True, editable=False)
+
+    objects = BackgroundJobQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+        ordering = ('-created_at',)
+
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+class ImportJob(BackgroundJob):
+    """An uploaded archive imported in the background, see
+    `resume.imports`."""
+    LINKEDIN = 'linkedin'
+    JSON_RESUME = 'json-resume'
+    KIND_CHOICES = (
+        (LINKEDIN, _('LinkedIn data export (.zip)')),
+        (JSON_RESUME, _('JSON Resume (.json)')),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='import_jobs')
+    kind = models.CharField(_('Format'), max_length=20, choices=KIND_CHOICES)
+    language = models.CharField(
+        _('Language'), max_length=30, choices=settings.LANGUAGES,
+        default=settings.LANGUAGE_CODE)
+    # removed once imported
+    archive = ImportArchiveField(_('File'))
+    stats = JSONField(default=dict, editable=False)
+
+    def get_absolute_url(self):
+        return reverse('import-job-detail', args=(self.pk,))
+
+    def __str__(self):
+        return '{} import {} of {}'.format(self.kind, self.pk, self.user_id)
+
+
+class BatchJob(BackgroundJob):
+    """A large batch of work experiences deleted, published or unpublished
+    in the background, see `resume.batch`."""
+    DELETE = 'delete'
+    PUBLISH = 'publish'
+    UNPUBLISH = 'unpublish'
+    OPERATION_CHOICES = (
+        (DELETE, _('Delete')),
+        (PUBLISH, _('Publish')),
+        (UNPUBLISH, _('Unpublish')),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='batch_jobs')
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES)
+    # the ids of the work experiences of the user
+    ids = JSONField(default=list)
+    count = models.PositiveIntegerField(null=True, editable=False)
+
+    def get_absolute_url(self):
+        return reverse('batch-job-detail', args=(self.pk,))
+
+    def __str__(self):
+        return '{} batch {} of {}'.format(self.operation, self.pk,
+                                          self.user_id)
+
+
 def pre_save_workexperience_translation_handler(sender, instance, **kwargs):
     assert sender == WorkExperienceTranslation
     #instance.clean()
+
+
+def post_save_workexperience_translation_handler(sender, instance,
+                                                 update_fields=None, **kwargs):
+    assert sender == WorkExperienceTranslation
+    sender.objects.filter(pk=instance.pk).update_search_vectors()
+    if update_fields is None or \
+            {'language', 'keywords'}.intersection(update_fields):
+        index_keywords([instance])
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+
+"""The translation framework of the multilingual models.
+
+A multilingual model lists its translated fields in `Meta.multilingual` and
+its translation model in `Meta.translation`. The translation model has a
+`related_model` foreign key and a `language` field, see `TranslationModel`.
+"""
+
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.db.models import (
+    Aggregate,
+    Case,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.base import ModelBase
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils.translation import get_language, gettext_lazy as _
+
+
+logger = logging.getLogger(__name__)
+models.options.DEFAULT_NAMES += (
+    'translation', 'multilingual', 'translation_snapshot')
+
+
+def get_language_fallback_chain(language=None):
+    """Return the languages tried in order for a multilingual field: the
+    language itself (the current one by default), its generic variant (`en`
+    for `en-us`) and then `settings.MULTILINGUAL_FALLBACK_LANGUAGES`.
+
+    Any other existing translation is used after the chain, ordered by the
+    language code."""
+    if language is None:
+        language = get_language()
+    fallbacks = getattr(settings, 'MULTILINGUAL_FALLBACK_LANGUAGES', {})
+    generic_language = language.split('-')[0] if language else language
+
+    candidates = [language, generic_language]
+    candidates.extend(
+        fallbacks.get(language) or fallbacks.get(generic_language) or
+        fallbacks.get('default', ()))
+
+    chain = []
+    for candidate in candidates:
+        if candidate and candidate not in chain:
+            chain.append(candidate)
+    return chain
+
+
+class TranslatedField(object):
+    """Descriptor returning the value of a multilingual field in the current
+    language, see `MultilingualModel.get_translated_value`.
+
+    It doesn't define `__set__`, so a value stored in the instance `__dict__`
+    with the same name (a model field or an assigned value) takes precedence.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.get_translated_value(self.name)
+
+
+class MultilingualModelBase(ModelBase):
+    """Install a `TranslatedField` for each name of `Meta.multilingual` and
+    for its `<name>_translated` alias when the model class is created."""
+
+    def __new__(mcs, name, bases, attrs, **kwargs):
+        new_class = super().__new__(mcs, name, bases, attrs, **kwargs)
+        field_names = {f.attname for f in new_class._meta.local_fields}
+        for field_name in getattr(new_class._meta, 'multilingual', ()):
+            descriptor = TranslatedField(field_name)
+            # never hide a real column of the model
+            if field_name not in field_names:
+                setattr(new_class, field_name, descriptor)
+            setattr(new_class, '{}_translated'.format(field_name), descriptor)
+        return new_class
+
+
+class MultilingualModel(models.Model, metaclass=MultilingualModelBase):
+
+    class Meta:
+        abstract = True
+
+    def get_translated_value(self, name, language=None):
+        """the logic is that:
+        1. all the subClass of this model could have mulitple languages
+        2. first try to find the translation by the fallback chain of the
+           current settings lang, see `get_language_fallback_chain`
+        3. if it can't be found, try to get the first language
+        4. if it still cannot be found, try to search in the __dict__ with the
+           name key"""
+        translation = self.get_translation_values(language)
+        if translation is not None:
+            return translation[name]
+        return self.__dict__.get(name, '')
+
+    def get_translation_values(self, language=None):
+        """Return the multilingual field values of the best translation for
+        `language`, or None if this instance has no translation at all.
+
+        This is the in-memory counterpart of
+        `WorkExperienceTranslationManager.by_language_priority`."""
+        bundle = self.get_translation_bundle()
+        if not bundle:
+            return None
+        for candidate in get_language_fallback_chain(language):
+            if candidate in bundle:
+                return bundle[candidate]
+        # same as the `ordering` of the translation model
+        return bundle[min(bundle)]
+
+    def get_translation_bundle(self):
+        """Return all the translations of this instance keyed by language.
+
+        The translations are loaded with one query on the first access and
+        kept on the instance, later lookups of the multilingual fields are
+        served from memory until `invalidate_translation_bundle` is called.
+        """
+        bundle = self.__dict__.get('_translation_bundle')
+        if bundle is None:
+            bundle = self._load_translation_bundle()
+            if self.pk is not None:
+                self.__dict__['_translation_bundle'] = bundle
+        return bundle
+
+    def _load_translation_bundle(self):
+        if self.pk is None:
+            return {}
+        # a NULL snapshot means it hasn't been built yet for this row
+        snapshot_field = getattr(self._meta, 'translation_snapshot', None)
+        if snapshot_field is not None and \
+                self.__dict__.get(snapshot_field) is not None:
+            return self.__dict__[snapshot_field]
+
+        fields = self._meta.multilingual
+        rows = self._meta.translation.objects\
+            .filter(related_model=self)\
+            .values_list('language', *fields)
+        return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+    def has_translation_bundle(self):
+        """Tell if the translations are available without any query."""
+        if '_translation_bundle' in self.__dict__:
+            return True
+        snapshot_field = getattr(self._meta, 'translation_snapshot', None)
+        return snapshot_field is not None and \
+            self.__dict__.get(snapshot_field) is not None
+
+    def set_translation_bundle(self, bundle):
+        self.__dict__['_translation_bundle'] = bundle
+
+    def invalidate_translation_bundle(self):
+        self.__dict__.pop('_translation_bundle', None)
+        snapshot_field = getattr(self._meta, 'translation_snapshot', None)
+        if snapshot_field is not None:
+            # the in-memory copy might be stale, reload from the translations
+            # until the instance is refreshed
+            self.__dict__[snapshot_field] = None
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.invalidate_translation_bundle()
+        super().refresh_from_db(*args, **kwargs)
+
+
+class JSONBBuildObject(Func):
+    function = 'JSONB_BUILD_OBJECT'
+    output_field = JSONField()
+
+    def __init__(self, **fields):
+        expressions = []
+        for key, value in sorted(fields.items()):
+            expressions.extend([Value(key), value])
+        super().__init__(*expressions)
+
+
+class JSONBObjectAgg(Aggregate):
+    function = 'JSONB_OBJECT_AGG'
+    output_field = JSONField()
+
+
+class TranslationSnapshotField(JSONField):
+    """The `Meta.translation_snapshot` column, written by
+    `MultilingualQuerySet.rebuild_translation_snapshots` only.
+
+    The save of an existing row keeps the stored snapshot, a possibly stale
+    in-memory copy is not written back. It is a `JSONField` for the
+    migrations."""
+
+    def pre_save(self, model_instance, add):
+        if add:
+            return super().pre_save(model_instance, add)
+        return F(self.attname)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return (name, 'django.contrib.postgres.fields.jsonb.JSONField', args,
+                kwargs)
+
+
+class MultilingualQuerySet(models.QuerySet):
+
+    def with_translation(self, language=None):
+        """Annotate the multilingual fields in `language` (the current one by
+        default) with correlated subqueries, so the translated values are
+        fetched in the same SELECT as the objects themselves.
+
+        The fallback is the same as the attribute access, resolved by the
+        database in the same subquery: the fallback chain of the language,
+        then the first translation, then ''.
+        """
+        translations = self.model._meta.translation.objects\
+            .by_language_priority(language)\
+            .filter(related_model=OuterRef('pk'))
+
+        annotations = {
+            name: Coalesce(Subquery(translations.values(name)[:1]), Value(''))
+            for name in self.model._meta.multilingual
+        }
+        return self.annotate(**annotations)
+
+    def with_filled_languages(self):
+        """Annotate `filled_languages`, the list of the existing translation
+        languages of each object, aggregated in the same SELECT."""
+        languages = self.model._meta.translation.objects\
+            .filter(related_model=OuterRef('pk'))\
+            .order_by()\
+            .values('related_model')\
+            .annotate(languages=ArrayAgg('language'))\
+            .values('languages')
+        return self.annotate(filled_languages=Subquery(languages))
+
+    def get_language_status(self):
+        """Return `{pk: (filled languages, unfilled languages)}` for all the
+        objects with one aggregate query."""
+        available_languages = {x for x, _ in settings.LANGUAGES}
+        rows = self.order_by().with_filled_languages()\
+            .values_list('pk', 'filled_languages')
+        status = {}
+        for pk, languages in rows:
+            filled_languages = set(languages or ())
+            status[pk] = (filled_languages,
+                          available_languages - filled_languages)
+        return status
+
+    def rebuild_translation_snapshots(self):
+        """Rebuild the `Meta.translation_snapshot` column of the objects with
+        a single UPDATE, the snapshot maps each language to the values of the
+        multilingual fields. Return the number of updated rows."""
+        snapshot_field = self.model._meta.translation_snapshot
+        translations = self.model._meta.translation.objects\
+            .filter(related_model=OuterRef('pk'))\
+            .order_by()\
+            .values('related_model')\
+            .annotate(snapshot=JSONBObjectAgg('language', JSONBBuildObject(
+                **{name: F(name) for name in self.model._meta.multilingual})))\
+            .values('snapshot')
+        return self.update(**{snapshot_field: Coalesce(
+            Subquery(translations), RawSQL("'{}'::jsonb", []))})
+
+
+class TranslationManager(models.Manager):
+
+    def by_language_priority(self, language=None):
+        """Order the translations by the fallback chain of `language`, the
+        best translation of each related model comes first."""
+        chain = get_language_fallback_chain(language)
+        language_priority = Case(
+            *[When(language=lang, then=Value(index))
+              for index, lang in enumerate(chain)],
+            default=Value(len(chain)), output_field=IntegerField())
+        return self.get_queryset()\
+            .annotate(language_priority=language_priority)\
+            .order_by('language_priority', 'language')
+
+    def get_translation(self, related_model_id, language=None):
+        """Return the best translation for `language` with one query."""
+        return self.by_language_priority(language)\
+            .filter(related_model=related_model_id).first()
+
+    def get_all_existing_languages(self, related_model_id):
+        return self.get_queryset()\
+            .filter(related_model__exact=related_model_id)
+
+    def get_all_existing_language_list(self, related_model_id):
+        return self.get_all_existing_languages(related_model_id)\
+            .values_list('language', flat=True)
+
+    def is_language_exist(self, related_model_id, language):
+        return self.get_all_existing_languages(related_model_id)\
+            .filter(language__iexact=language).exists()
+
+
+class TranslationModel(models.Model):
+    """The base of the translation models, the subclasses define the
+    `related_model` foreign key to their multilingual model."""
+    LANGUAGES = settings.LANGUAGES.copy()
+    LANGUAGES.insert(0, ('', _('*--- select language ---')))
+
+    language = models.CharField(max_length=30, verbose_name=_('Language'),
+                                choices=LANGUAGES, db_index=True)
+
+    objects = TranslationManager()
+
+    class Meta:
+        abstract = True
+        ordering = ('language',)
+
+    def get_language(self):
+        _language = [y for x, y in settings.LANGUAGES
+                     if x == self.language]
+        return _(_language[0])
+
+
+class TranslationLoader(object):
+    """Collect the multilingual objects rendered on a page, then load all
+    their translation bundles with one query per model.
+
+        loader = TranslationLoader()
+        loader.add(profile)
+        loader.add_all(work_experience_list)
+        loader.add_all(project_list)
+        loader.load()
+
+    The objects which already have their translations in memory (loaded
+    bundle or translations snapshot) are skipped.
+    """
+
+    def __init__(self):
+        # {model: {pk: [instances]}}
+        self._pending = OrderedDict()
+
+    def add(self, obj):
+        if obj is None or obj.pk is None or obj.has_translation_bundle():
+            return self
+        model = obj._meta.concrete_model
+        self._pending.setdefault(model, OrderedDict())\
+            .setdefault(obj.pk, []).append(obj)
+        return self
+
+    def add_all(self, objects):
+        for obj in objects:
+            self.add(obj)
+        return self
+
+    def load(self):
+        for model, instances in self._pending.items():
+            fields = model._meta.multilingual
+            bundles = {pk: {} for pk in instances}
+            rows = model._meta.translation.objects\
+                .filter(related_model__in=list(instances))\
+                .values_list('related_model', 'language', *fields)
+            for row in rows:
+                bundles[row[0]][row[1]] = dict(zip(fields, row[2:]))
+
+            for pk, objects in instances.items():
+                for obj in objects:
+                    obj.set_translation_bundle(bundles[pk])
+        self._pending.clear()
+
+
+def post_change_translation_handler(sender, instance, **kwargs):
+    """Rebuild the translations snapshot of the related model (if it has one)
+    and drop its cached translation bundle, so the next multilingual field
+    lookup reloads the translations."""
+    related_field = sender._meta.get_field('related_model')
+    related_class = related_field.related_model
+    if getattr(related_class._meta, 'translation_snapshot', None):
+        related_class._default_manager\
+            .filter(pk=instance.related_model_id)\
+            .rebuild_translation_snapshots()
+
+    if related_field.is_cached(instance):
+        related_model = related_field.get_cached_value(instance)
+        if related_model is not None:
+            related_model.invalidate_translation_bundle()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Keyset pagination of the work experience lists.
+
+The OFFSET pagination reads and skips all the rows before the page, and
+counts the rows for every page. `KeysetPaginator` reads the rows following
+the last one of the previous page instead, e.g. on `(-date_start, -id)`:
+
+    WHERE date_start <= %s AND (date_start < %s OR (date_start = %s AND
+    id < %s)) ORDER BY date_start DESC, id DESC LIMIT 11
+
+so a deep page is the same index scan as the first one. The pages are
+addressed by opaque cursors, the position and the direction of the page
+encoded in base64, and the rows are only counted when `count` is read.
+"""
+
+import base64
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPaginator(object):
+    """Paginate `queryset` on the `ordering` fields, which must identify
+    the rows, e.g. end with the primary key."""
+
+    def __init__(self, queryset, per_page, ordering=('-date_start', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [queryset.model._meta.get_field(x.lstrip('-'))
+                       for x in self.ordering]
+
+    @cached_property
+    def count(self):
+        """The number of rows, one COUNT query read on demand only."""
+        return self.queryset.count()
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, x.attname) for x in self.fields]
+        data = json.dumps([direction] + values, cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the `(direction, values)` of the cursor."""
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, *values = json.loads(data.decode())
+            if direction not in (NEXT, PREVIOUS) or \
+                    len(values) != len(self.fields):
+                raise ValueError(cursor)
+            return direction, [field.to_python(value) for field, value
+                               in zip(self.fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor(_('Invalid cursor.'))
+
+    def get_condition(self, values, reverse):
+        """Return the filter of the rows after `values` in the ordering, or
+        before them when `reverse`."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-') != reverse
+            lookup = '{}__{}'.format(name.lstrip('-'),
+                                     'lt' if descending else 'gt')
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name.lstrip('-'): value})
+        # a range on the first column, for the index scan
+        name = self.ordering[0]
+        lookup = '{}__{}'.format(
+            name.lstrip('-'),
+            'lte' if name.startswith('-') != reverse else 'gte')
+        return Q(**{lookup: values[0]}) & condition
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(x[1:] if x.startswith('-') else '-' + x
+                     for x in self.ordering)
+
+    def page(self, cursor=None):
+        """Return the page of the cursor, the first one when it is empty.
+        Raise `InvalidCursor` for a cursor which was not produced by the
+        paginator."""
+        direction, values = self.decode_cursor(cursor) if cursor \
+            else (NEXT, None)
+        reverse = direction == PREVIOUS
+        queryset = self.queryset.order_by(*self.get_ordering(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.get_condition(values, reverse))
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, has_next=True,
+                              has_previous=has_more)
+        return KeysetPage(object_list, self, has_next=has_more,
+                          has_previous=values is not None)
+
+
+class KeysetPage(Sequence):
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of {} objects>'.format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_cursor(self):
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    def previous_cursor(self):
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+class KeysetPaginationMixin(object):
+    """The keyset pagination of a `ListView`, the page is the `cursor`
+    query parameter, the first page without it. The `page` parameter of the
+    OFFSET pagination is not served."""
+    keyset_ordering = ('-date_start', '-id')
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size,
+                                    ordering=self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
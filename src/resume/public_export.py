@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""Export of all the public resumes, one JSON document per line.
+
+A resume is a public profile with the public work experiences and the
+public projects of its user. The profiles are read with a server-side
+cursor, `chunk_size` at a time, and for each chunk the work experiences,
+the projects and all their translations are fetched with one query per
+model, so the queries depend on the number of chunks only.
+
+Two document formats are available: `ndjson`, with the values of all the
+languages, and `jsonresume` (https://jsonresume.org/schema/), with the
+values of one language.
+"""
+
+import itertools
+import json
+from collections import defaultdict
+
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from profile.models import Profile
+from resume.models import Project, WorkExperience, WorkExperienceTranslation
+from resume.multilingual import TranslationLoader
+
+
+FORMATS = ('ndjson', 'jsonresume')
+
+
+def iter_public_resumes(chunk_size=200):
+    """Yield `(profile, work_experiences, projects, keywords)` of the public
+    profiles, `keywords` maps `(work experience id, language)` to the
+    keywords of the translation."""
+    profiles = Profile.objects\
+        .filter(is_public=True)\
+        .select_related('user')\
+        .order_by('pk')\
+        .iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(profiles, chunk_size))
+        if not chunk:
+            break
+        user_ids = [x.user_id for x in chunk]
+
+        work_experiences = defaultdict(list)
+        for work_experience in WorkExperience.objects\
+                .filter(user_id__in=user_ids, is_public=True)\
+                .order_by('-date_start', '-id'):
+            work_experiences[work_experience.user_id].append(work_experience)
+        projects = defaultdict(list)
+        for project in Project.objects\
+                .filter(user_id__in=user_ids, is_public=True)\
+                .order_by('id'):
+            projects[project.user_id].append(project)
+        keywords = {
+            (related_model_id, language): value
+            for related_model_id, language, value in
+            WorkExperienceTranslation.objects
+            .filter(related_model__user_id__in=user_ids,
+                    related_model__is_public=True)
+            .exclude(keywords='')
+            .values_list('related_model_id', 'language', 'keywords')}
+
+        # the work experiences are served from their translations snapshot
+        loader = TranslationLoader().add_all(chunk)
+        for user_projects in projects.values():
+            loader.add_all(user_projects)
+        for user_work_experiences in work_experiences.values():
+            loader.add_all(user_work_experiences)
+        loader.load()
+
+        for profile in chunk:
+            yield (profile, work_experiences[profile.user_id],
+                   projects[profile.user_id], keywords)
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def profile_url(profile, base_url=''):
+    return base_url + reverse('profile-detail', args=(profile.user.email,))
+
+
+def ndjson_document(profile, work_experiences, projects, keywords,
+                    base_url=''):
+    """Return the resume with the values of all the languages."""
+    return {
+        'url': profile_url(profile, base_url),
+        'full_name': profile.full_user_name(),
+        'country': profile.country,
+        'city': profile.city,
+        'links': {name: getattr(profile, name) for name in (
+            'linkedin', 'github', 'facebook', 'personal_site')
+            if getattr(profile, name)},
+        'description': {
+            language: values['description'] for language, values in
+            profile.get_translation_bundle().items()},
+        'work': [{
+            'id': work_experience.id,
+            'date_start': _date(work_experience.date_start),
+            'date_end': _date(work_experience.date_end),
+            'translations': {
+                language: {
+                    'position': values['position'],
+                    'company': values['company'],
+                    'location': values['location'],
+                    'contribution_html': values['contribution_html'],
+                    'keywords': keywords.get(
+                        (work_experience.id, language), ''),
+                } for language, values in
+                work_experience.get_translation_bundle().items()},
+        } for work_experience in work_experiences],
+        'projects': [{
+            'id': project.id,
+            'live_link': project.live_link,
+            'github': project.github,
+            'download_link': project.download_link,
+            'translations': project.get_translation_bundle() or {
+                '': {'title': project.title,
+                     'description': project.description}},
+        } for project in projects],
+    }
+
+
+def json_resume_document(profile, work_experiences, projects, language,
+                         base_url=''):
+    """Return the JSON Resume of the profile in `language`, the missing
+    translations replaced by the fallback ones."""
+    def translated(obj, name):
+        return obj.get_translated_value(name, language)
+
+    profiles = [{'network': network, 'url': getattr(profile, name)}
+                for name, network in (('linkedin', 'LinkedIn'),
+                                      ('github', 'GitHub'),
+                                      ('facebook', 'Facebook'))
+                if getattr(profile, name)]
+    return {
+        'basics': {
+            'name': profile.full_user_name(),
+            'label': translated(work_experiences[0], 'position')
+            if work_experiences else '',
+            'summary': translated(profile, 'description'),
+            'url': profile.personal_site or profile_url(profile, base_url),
+            'location': {'city': profile.city or '',
+                         'countryCode': profile.country or ''},
+            'profiles': profiles,
+        },
+        'work': [{
+            'name': translated(work_experience, 'company'),
+            'position': translated(work_experience, 'position'),
+            'location': translated(work_experience, 'location'),
+            'startDate': _date(work_experience.date_start),
+            'endDate': _date(work_experience.date_end),
+            'summary': strip_tags(
+                translated(work_experience, 'contribution_html')).strip(),
+        } for work_experience in work_experiences],
+        'projects': [{
+            'name': translated(project, 'title'),
+            'description': translated(project, 'description'),
+            'url': project.live_link or project.github,
+        } for project in projects],
+        'meta': {'language': language},
+    }
+
+
+def export_lines(format='ndjson', language=None, base_url='',
+                 chunk_size=200):
+    """Yield the JSON lines of the public resumes, `base_url` prefixes the
+    profile urls."""
+    for profile, work_experiences, projects, keywords in \
+            iter_public_resumes(chunk_size=chunk_size):
+        if format == 'jsonresume':
+            document = json_resume_document(
+                profile, work_experiences, projects, language, base_url)
+        else:
+            document = ndjson_document(
+                profile, work_experiences, projects, keywords, base_url)
+        yield json.dumps(document, ensure_ascii=False) + '\n'
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""Render-on-write of the work experience contribution.
+
+The contribution is the raw HTML of the TinyMCE editor. It is sanitized,
+normalized and summarized once when a translation is saved, the results are
+stored in `contribution_html` and `contribution_excerpt` and the templates
+only output them.
+
+Bump `POLICY_VERSION` whenever the policy below changes, the
+`render_contributions --outdated-only` command then reprocesses the rows
+rendered with an older policy.
+"""
+
+import html
+import re
+
+import bleach
+
+
+POLICY_VERSION = 1
+
+ALLOWED_TAGS = [
+    'a', 'b', 'blockquote', 'br', 'code', 'em', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'i', 'li', 'ol', 'p', 'pre', 's', 'strong', 'sub', 'sup', 'u',
+    'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+}
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+EXCERPT_LENGTH = 300
+
+_UNSAFE_BLOCKS = re.compile(
+    r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_EMPTY_PARAGRAPHS = re.compile(r'<p>(\s|&nbsp;|<br>)*</p>')
+_BLOCK_TAGS = re.compile(
+    r'<(?=/?(p|br|li|hr|h[1-6]|blockquote|pre|ul|ol|div)\b)', re.IGNORECASE)
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+_WHITESPACES = re.compile(r'\s+')
+
+
+def sanitize_contribution(value):
+    """Return the contribution HTML with only the allowed markup, without
+    the empty paragraphs the editor leaves behind."""
+    if not value:
+        return ''
+    cleaned = bleach.clean(
+        _UNSAFE_BLOCKS.sub('', value), tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES, protocols=ALLOWED_PROTOCOLS,
+        strip=True, strip_comments=True)
+    cleaned = _EMPTY_PARAGRAPHS.sub('', cleaned)
+    cleaned = _BLANK_LINES.sub('\n', cleaned)
+    return cleaned.strip()
+
+
+def make_excerpt(value, length=EXCERPT_LENGTH):
+    """Return the plain text of the contribution HTML, truncated to `length`
+    characters on a word boundary."""
+    if not value:
+        return ''
+    # separate the blocks, so their words are not glued together
+    text = bleach.clean(_BLOCK_TAGS.sub(' <', value), tags=[], strip=True,
+                        strip_comments=True)
+    text = _WHITESPACES.sub(' ', html.unescape(text)).strip()
+    if len(text) <= length:
+        return text
+    # the stored excerpt must not depend on the language active on save
+    truncated = text[:length - 1]
+    if ' ' in truncated and not text[length - 1].isspace():
+        truncated = truncated.rsplit(' ', 1)[0]
+    return truncated.rstrip() + '\u2026'
+
+
+def render_contribution(value):
+    """Return the `contribution_html`, `contribution_excerpt` and
+    `contribution_version` values rendered from the raw contribution."""
+    sanitized = sanitize_contribution(value)
+    return {
+        'contribution_html': sanitized,
+        'contribution_excerpt': make_excerpt(sanitized),
+        'contribution_version': POLICY_VERSION,
+    }
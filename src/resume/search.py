@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""Full-text search over the work experience translations.
+
+Each `WorkExperienceTranslation` keeps a weighted `tsvector` in its
+`search_vector` column, built with the text search configuration of its
+language (`settings.RESUME_SEARCH_CONFIGS`). The column is GIN indexed, so
+the searches are answered by the index without scanning the table.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import (
+    Case,
+    CharField,
+    F,
+    FloatField,
+    Func,
+    Q,
+    Value,
+    When,
+)
+
+
+DEFAULT_SEARCH_CONFIG = 'simple'
+
+
+class StripTags(Func):
+    """Replace the HTML tags of the expression by spaces."""
+    function = 'REGEXP_REPLACE'
+    template = "%(function)s(%(expressions)s, '<[^>]*>', ' ', 'g')"
+    output_field = CharField()
+
+
+def get_search_configs():
+    """Return the `{language: text search configuration}` mapping."""
+    return getattr(settings, 'RESUME_SEARCH_CONFIGS', {})
+
+
+def get_search_config(language):
+    configs = get_search_configs()
+    return configs.get(language, DEFAULT_SEARCH_CONFIG)
+
+
+def search_config_expression():
+    """The text search configuration of each row, picked by its language."""
+    return Case(
+        *[When(language=language, then=Value(config))
+          for language, config in sorted(get_search_configs().items())],
+        default=Value(DEFAULT_SEARCH_CONFIG), output_field=CharField())
+
+
+def search_vector_expression():
+    """The weighted search vector of a translation, computed by the database
+    from the columns of the row."""
+    config = search_config_expression()
+    return SearchVector('position', weight='A', config=config) + \
+        SearchVector('company', weight='A', config=config) + \
+        SearchVector('keywords', weight='B', config=config) + \
+        SearchVector('location', weight='C', config=config) + \
+        SearchVector(StripTags('contribution'), weight='D', config=config)
+
+
+def update_search_vectors(queryset):
+    """Rebuild the search vectors of the translations with one UPDATE."""
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def search_translations(queryset, text):
+    """Filter the translations matching `text` and annotate their `rank`.
+
+    Each translation is matched with the configuration of its language, the
+    conditions are `search_vector @@ query` so the GIN index is used."""
+    languages_by_config = {}
+    for language, config in get_search_configs().items():
+        languages_by_config.setdefault(config, []).append(language)
+    configured_languages = list(get_search_configs())
+
+    conditions = Q()
+    ranks = []
+    for config, languages in sorted(languages_by_config.items()):
+        query = SearchQuery(text, config=config)
+        conditions |= Q(language__in=languages, search_vector=query)
+        ranks.append(When(language__in=languages,
+                          then=SearchRank(F('search_vector'), query)))
+
+    default_query = SearchQuery(text, config=DEFAULT_SEARCH_CONFIG)
+    conditions |= Q(search_vector=default_query) & \
+        ~Q(language__in=configured_languages)
+    rank = Case(*ranks, default=SearchRank(F('search_vector'), default_query),
+                output_field=FloatField())
+
+    return queryset.filter(conditions).annotate(rank=rank)
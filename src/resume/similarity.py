@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+"""TF-IDF similarity of the users by their public work experiences.
+
+`build_similarity_index` (the management command) builds one index per
+language: a row per user with a public profile, made of the position, the
+keywords and the contribution text of their public work experience
+translations in this language. The rows are sublinear TF-IDF weighted and
+L2 normalized, so the cosine similarity of two users is the dot product of
+their rows.
+
+An index is stored as plain `.npy` arrays in its own build directory, the
+`CURRENT` file of the language directory names the build in use::
+
+    RESUME_SIMILARITY_DIR/<language>/CURRENT
+    RESUME_SIMILARITY_DIR/<language>/<build id>/{manifest.json,users.npy,
+        indptr.npy,indices.npy,data.npy,counts.npy,vocabulary.json}
+
+The arrays are memory-mapped read-only by `load_index`, so all the worker
+processes share the page cache instead of holding their own copy. An `.npz`
+archive cannot be memory-mapped, which is why the arrays are separate files.
+
+A build reuses the term counts of the users whose text did not change since
+the previous build, only the changed users are tokenized again, and no new
+build is written when nothing changed.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from resume.models import WorkExperienceTranslation
+
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.json'
+ARRAY_NAMES = ('users', 'indptr', 'indices', 'data', 'counts')
+
+_CJK = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_WORDS = re.compile(r'[^\W\d_][\w+#.-]*[\w+#]|[^\W\d_]{2,}')
+
+
+def get_index_root():
+    return settings.RESUME_SIMILARITY_DIR
+
+
+def tokenize(text):
+    """Return the lowercased words of `text`, the CJK runs, which have no
+    word separators, are split into character bigrams."""
+    tokens = []
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    text = _CJK.sub(' ', text)
+    tokens.extend(word.lower() for word in _WORDS.findall(text))
+    return tokens
+
+
+def iter_documents():
+    """Yield `(language, user_id, text)` of the public users, ordered by
+    language, from one streamed query."""
+    rows = WorkExperienceTranslation.objects\
+        .filter(related_model__is_public=True,
+                related_model__user__profile__is_public=True)\
+        .order_by('language', 'related_model__user_id', 'related_model_id')\
+        .values_list('language', 'related_model__user_id', 'position',
+                     'keywords', 'contribution_html')\
+        .iterator()
+    for (language, user_id), group in itertools.groupby(
+            rows, key=lambda row: (row[0], row[1])):
+        text = '\n'.join(
+            '\n'.join((position, keywords, strip_tags(contribution)))
+            for _, _, position, keywords, contribution in group)
+        yield language, user_id, text
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SimilarityIndex(object):
+    """A read-only TF-IDF matrix, a row per user."""
+
+    def __init__(self, build_id, users, matrix):
+        self.build_id = build_id
+        self.users = users
+        self.matrix = matrix
+        self.row_of = {user_id: row for row, user_id in enumerate(
+            users.tolist())}
+
+    def most_similar(self, user_id, k=10):
+        """Return the `(user_id, score)` of the `k` most similar users, the
+        best first, the users without any common term excluded."""
+        row = self.row_of.get(user_id)
+        if row is None or k <= 0:
+            return []
+        scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+        scores[row] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.users[x]), float(scores[x])) for x in candidates]
+
+
+def read_current_build(language, root=None):
+    path = os.path.join(root or get_index_root(), language, CURRENT_FILE)
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _build_path(language, build_id, root=None):
+    return os.path.join(root or get_index_root(), language, build_id)
+
+
+def load_index(language, build_id, root=None):
+    path = _build_path(language, build_id, root)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+              for name in ('users', 'indptr', 'indices', 'data')}
+    # the arrays are already int32/float32, so they are not copied
+    matrix = sparse.csr_matrix(
+        (arrays['data'], arrays['indices'], arrays['indptr']),
+        shape=tuple(manifest['shape']), copy=False)
+    return SimilarityIndex(build_id, arrays['users'], matrix)
+
+
+_loaded_indexes = {}
+
+
+def get_index(language):
+    """Return the current index of `language` or None, it is loaded again
+    when a new build is published."""
+    build_id = read_current_build(language)
+    if build_id is None:
+        return None
+    index = _loaded_indexes.get(language)
+    if index is None or index.build_id != build_id:
+        index = load_index(language, build_id)
+        _loaded_indexes[language] = index
+    return index
+
+
+def similar_users(user_id, k=10, languages=None):
+    """Return the `(user_id, score)` of the `k` users most similar to
+    `user_id`, the best score of each user over the languages kept."""
+    if languages is None:
+        languages = [x for x, _ in settings.LANGUAGES]
+    best = {}
+    for language in languages:
+        index = get_index(language)
+        if index is None:
+            continue
+        for other_id, score in index.most_similar(user_id, k):
+            best[other_id] = max(score, best.get(other_id, 0))
+    return sorted(best.items(), key=lambda x: (-x[1], x[0]))[:k]
+
+
+def _load_previous_counts(language, root):
+    """Return `(vocabulary, hashes, {user_id: (indices, counts)})` of the
+    current build, empty when there is none."""
+    build_id = read_current_build(language, root)
+    if build_id is None:
+        return [], {}, {}
+    path = _build_path(language, build_id, root)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    with open(os.path.join(path, VOCABULARY_FILE)) as f:
+        vocabulary = json.load(f)
+    arrays = {name: np.load(os.path.join(path, name + '.npy'))
+              for name in ('users', 'indptr', 'indices', 'counts')}
+    rows = {}
+    indptr = arrays['indptr']
+    for row, user_id in enumerate(arrays['users'].tolist()):
+        start, end = indptr[row], indptr[row + 1]
+        rows[user_id] = (arrays['indices'][start:end],
+                         arrays['counts'][start:end])
+    hashes = {int(x): y for x, y in manifest['hashes'].items()}
+    return vocabulary, hashes, rows
+
+
+def build_language_index(language, documents, full=False, root=None):
+    """Build the index of `language` from `(user_id, text)` documents.
+
+    Return the new build id, or None when nothing changed since the current
+    build. A `full` build tokenizes all the documents again and drops the
+    terms no longer used."""
+    root = root or get_index_root()
+    if full:
+        vocabulary, previous_hashes, previous_rows = [], {}, {}
+    else:
+        vocabulary, previous_hashes, previous_rows = \
+            _load_previous_counts(language, root)
+    term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+    users, hashes, row_indices, row_counts = [], {}, [], []
+    tokenized = 0
+    for user_id, text in documents:
+        digest = text_hash(text)
+        if previous_hashes.get(user_id) == digest:
+            indices, counts = previous_rows[user_id]
+        else:
+            tokenized += 1
+            terms = Counter(tokenize(text))
+            if not terms:
+                continue
+            for term in terms:
+                if term not in term_ids:
+                    term_ids[term] = len(vocabulary)
+                    vocabulary.append(term)
+            order = sorted(terms, key=term_ids.get)
+            indices = np.array([term_ids[x] for x in order], dtype=np.int32)
+            counts = np.array([terms[x] for x in order], dtype=np.float32)
+        users.append(user_id)
+        hashes[user_id] = digest
+        row_indices.append(indices)
+        row_counts.append(counts)
+
+    if not full and not tokenized and set(hashes) == set(previous_hashes):
+        return None
+
+    lengths = np.array([len(x) for x in row_indices], dtype=np.int64)
+    indptr = np.zeros(len(users) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if indptr[-1] >= np.iinfo(np.int32).max:
+        raise ValueError('The similarity index is too large for int32.')
+    indptr = indptr.astype(np.int32)
+    indices = np.concatenate(row_indices) if row_indices else \
+        np.zeros(0, dtype=np.int32)
+    counts = np.concatenate(row_counts) if row_counts else \
+        np.zeros(0, dtype=np.float32)
+
+    # sublinear tf, smoothed idf and L2 normalized rows
+    document_frequency = np.bincount(indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(users)) / (1 + document_frequency)) + 1
+    data = ((1 + np.log(counts)) * idf[indices]).astype(np.float32)
+    if len(data):
+        norms = np.sqrt(np.add.reduceat(data * data, indptr[:-1]))
+        data /= np.repeat(norms, lengths).astype(np.float32)
+
+    build_id = '{}-{}'.format(int(time.time() * 1000), uuid.uuid4().hex[:8])
+    path = _build_path(language, build_id, root)
+    os.makedirs(path)
+    arrays = {
+        'users': np.array(users, dtype=np.int64),
+        'indptr': indptr,
+        'indices': indices,
+        'data': data,
+        'counts': counts,
+    }
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(path, name + '.npy'), arrays[name])
+    with open(os.path.join(path, VOCABULARY_FILE), 'w') as f:
+        json.dump(vocabulary, f)
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump({'shape': [len(users), len(vocabulary)],
+                   'hashes': {str(x): y for x, y in hashes.items()}}, f)
+
+    # publish atomically, the workers pick the new build on their next query
+    current = os.path.join(root, language, CURRENT_FILE)
+    with open(current + '.tmp', 'w') as f:
+        f.write(build_id)
+    os.replace(current + '.tmp', current)
+    logger.info('similarity index %s of %s: %s users, %s terms, '
+                '%s tokenized', build_id, language, len(users),
+                len(vocabulary), tokenized)
+    return build_id
+
+
+def remove_old_builds(language, keep=2, root=None):
+    """Remove the builds of `language` but the `keep` most recent ones, the
+    workers still mapping a removed build keep reading it until they
+    reload."""
+    directory = os.path.join(root or get_index_root(), language)
+    current = read_current_build(language, root)
+    builds = sorted(
+        (x for x in os.listdir(directory)
+         if os.path.isdir(os.path.join(directory, x))),
+        key=lambda x: int(x.split('-')[0]), reverse=True)
+    for build_id in builds[keep:]:
+        if build_id != current:
+            shutil.rmtree(os.path.join(directory, build_id))
+
+
+def build_indexes(full=False, root=None):
+    """Build the indexes of all the languages, return
+    `{language: build id or None}`."""
+    root = root or get_index_root()
+    documents = {x: [] for x, _ in settings.LANGUAGES}
+    for language, user_id, text in iter_documents():
+        documents.setdefault(language, []).append((user_id, text))
+
+    results = {}
+    for language, language_documents in documents.items():
+        os.makedirs(os.path.join(root, language), exist_ok=True)
+        results[language] = build_language_index(
+            language, language_documents, full=full, root=root)
+        remove_old_builds(language, root=root)
+    return results
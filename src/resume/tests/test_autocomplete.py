@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..autocomplete import PrefixCache, get_suggestions, prefix_cache
+from ..models import WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class PrefixCacheTestCase(TestCase):
+
+    def test_entries_expire_after_timeout(self):
+        timer = FakeTimer()
+        cache = PrefixCache(timeout=10, timer=timer)
+        cache.set('key', ['value'])
+        timer.now = 9
+        self.assertEqual(cache.get('key'), ['value'])
+        timer.now = 10
+        self.assertIsNone(cache.get('key'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = PrefixCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+
+class AutocompleteMixin(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        prefix_cache.clear()
+        self.user = self.factory.make_user()
+        self.other_user = self.factory.make_user()
+
+    def make_translation(self, user, company, is_public=False):
+        work_experience = self.factory.make_work_experience(
+            user=user, is_public=is_public)
+        return WorkExperienceTranslation.objects.create(
+            related_model=work_experience, language='en', company=company,
+            position='Engineer', location='Berlin')
+
+
+class GetSuggestionsTestCase(AutocompleteMixin):
+
+    def test_suggestions_are_ordered_by_usage(self):
+        self.make_translation(self.user, 'Google')
+        self.make_translation(self.user, 'Goldman Sachs')
+        self.make_translation(self.other_user, 'Goldman Sachs', True)
+        self.make_translation(self.user, 'Amazon')
+
+        self.assertEqual(
+            get_suggestions(self.user, 'company', 'go', cache=PrefixCache()),
+            ['Goldman Sachs', 'Google'])
+
+    def test_private_translations_of_others_are_not_suggested(self):
+        self.make_translation(self.other_user, 'Google')
+        self.make_translation(self.other_user, 'Goldman Sachs', True)
+
+        self.assertEqual(
+            get_suggestions(self.user, 'company', 'go', cache=PrefixCache()),
+            ['Goldman Sachs'])
+
+    def test_short_prefix_returns_nothing(self):
+        self.make_translation(self.user, 'Google')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                get_suggestions(self.user, 'company', ' g '), [])
+        self.assertEqual(len(queries), 0)
+
+    def test_unknown_field_raises_error(self):
+        with self.assertRaises(ValueError):
+            get_suggestions(self.user, 'contribution', 'go')
+
+    def test_longer_prefix_is_answered_from_complete_cached_prefix(self):
+        self.make_translation(self.user, 'Google')
+        self.make_translation(self.user, 'Goldman Sachs')
+        cache = PrefixCache()
+
+        with CaptureQueriesContext(connection) as queries:
+            get_suggestions(self.user, 'company', 'go', cache=cache)
+            self.assertEqual(
+                get_suggestions(self.user, 'company', 'GOO', cache=cache),
+                ['Google'])
+            get_suggestions(self.user, 'company', 'go', cache=cache)
+        self.assertEqual(len(queries), 1)
+
+    def test_truncated_cached_prefix_is_not_reused(self):
+        for company in ('Gold', 'Golf', 'Google'):
+            self.make_translation(self.user, company)
+        cache = PrefixCache()
+
+        self.assertEqual(
+            get_suggestions(self.user, 'company', 'go', limit=1, cache=cache),
+            ['Gold'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                get_suggestions(self.user, 'company', 'goo', limit=1,
+                                cache=cache),
+                ['Google'])
+        self.assertEqual(len(queries), 1)
+
+    def test_lookup_uses_the_trigram_index(self):
+        self.make_translation(self.user, 'Google')
+        queryset = WorkExperienceTranslation.objects.filter(
+            company__istartswith='goo')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute('SET enable_seqscan = on')
+        self.assertIn('resume_wet_company_trgm', plan)
+
+
+class WorkExperienceAutocompleteViewTestCase(AutocompleteMixin):
+    credentials = {
+        'email': 'test@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.factory.make_user(**self.credentials)
+
+    def test_view_requires_login(self):
+        resp = self.client.get(
+            reverse('work-experience-autocomplete', args=('company',)),
+            {'q': 'go'})
+        self.assertEqual(resp.status_code, 302)
+
+    def test_view_returns_json_suggestions(self):
+        self.make_translation(self.user, 'Google')
+        self.client.login(**self.credentials)
+        resp = self.client.get(
+            reverse('work-experience-autocomplete', args=('company',)),
+            {'q': 'go'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json(), {'field': 'company', 'results': ['Google']})
+
+    def test_view_rejects_unknown_field(self):
+        self.client.login(**self.credentials)
+        resp = self.client.get(
+            reverse('work-experience-autocomplete', args=('keywords',)),
+            {'q': 'go'})
+        self.assertEqual(resp.status_code, 400)
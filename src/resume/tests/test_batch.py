@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import batch
+from ..models import (
+    BatchJob,
+    Keyword,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+from ..views import WorkExperienceBatchDeleteView
+
+from testings.background import run_in_foreground
+from testings.factory import Factory
+
+
+class BatchMixin(object):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.user = self.factory.make_user(**self.credentials)
+        self.ids = []
+        for i in range(3):
+            work_experience = self.factory.make_work_experience(user=self.user)
+            self.factory.make_multi_work_experience_translations(
+                work_experience=work_experience)
+            self.ids.append(work_experience.pk)
+        self.other = self.factory.make_work_experience()
+        self.factory.make_multi_work_experience_translations(
+            work_experience=self.other)
+
+
+class BatchTestCase(BatchMixin, TestCase):
+
+    def test_parse_ids(self):
+        self.assertEqual(batch.parse_ids('3, 1,3,,2'), [3, 1, 2])
+        self.assertEqual(batch.parse_ids(None), [])
+        with self.assertRaises(ValueError):
+            batch.parse_ids('1,x')
+
+    def test_select_is_one_query(self):
+        ids = [999, self.ids[1], self.other.pk, self.ids[0]]
+        with self.assertNumQueries(1):
+            owned, forbidden = batch.select(self.user, ids)
+        self.assertEqual(owned, [self.ids[1], self.ids[0]])
+        self.assertEqual(forbidden, [999, self.other.pk])
+
+    def test_delete_rows(self):
+        tags = WorkExperienceTranslation.tags.through.objects
+        self.assertTrue(tags.filter(
+            workexperiencetranslation__related_model=self.ids[0]))
+        queryset = WorkExperience.objects.filter(pk__in=self.ids[:2])
+        # the translations and their tags are deleted by the database
+        with self.assertNumQueries(1):
+            self.assertEqual(batch.delete_rows(queryset), 2)
+
+        self.assertEqual(
+            list(WorkExperience.objects.filter(user=self.user)
+                 .values_list('pk', flat=True)), self.ids[2:])
+        self.assertFalse(WorkExperienceTranslation.objects.filter(
+            related_model__in=self.ids[:2]))
+        self.assertFalse(tags.filter(
+            workexperiencetranslation__related_model__in=self.ids[:2]))
+        self.assertTrue(Keyword.objects.exists())
+        self.assertEqual(self.other.translations.count(),
+                         len(settings.LANGUAGES))
+
+    def test_run_ignores_the_ids_of_other_users(self):
+        count = batch.run(batch.PUBLISH, self.user.pk,
+                          self.ids + [self.other.pk])
+        self.assertEqual(count, 3)
+        self.assertFalse(WorkExperience.objects.get(pk=self.other.pk)
+                         .is_public)
+        self.assertEqual(
+            batch.run(batch.DELETE, self.user.pk, [self.other.pk]), 0)
+        self.assertTrue(WorkExperience.objects.filter(pk=self.other.pk))
+        with self.assertRaises(ValueError):
+            batch.run('export', self.user.pk, self.ids)
+        with self.assertRaises(ValueError):
+            batch.submit('export', self.user, self.ids)
+
+    def test_export(self):
+        lines = list(batch.export(self.user, self.ids[:2] + [self.other.pk]))
+        self.assertEqual(
+            sorted(json.loads(x)['id'] for x in lines), self.ids[:2])
+
+
+class BatchViewsTestCase(BatchMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(**self.credentials)
+
+    def test_batch_delete(self):
+        url = reverse('work-experience-batch-delete')
+        data = {'batch_delete_ids': ','.join(
+            str(x) for x in self.ids[:2] + [self.other.pk])}
+
+        resp = self.client.get(url, data)
+        self.assertEqual(resp.context['delete_ids'],
+                         ','.join(str(x) for x in self.ids[:2]))
+        self.assertEqual(resp.context['delete_count'], 2)
+
+        resp = self.client.post(url, data)
+        self.assertRedirects(resp, reverse('work-experience-list'))
+        self.assertEqual(
+            list(WorkExperience.objects.filter(user=self.user)
+                 .values_list('pk', flat=True)), self.ids[2:])
+        self.assertTrue(WorkExperience.objects.filter(pk=self.other.pk))
+
+    def test_confirmation_displays_the_first_ones(self):
+        with mock.patch.object(
+                WorkExperienceBatchDeleteView, 'displayed_number', 2):
+            resp = self.client.get(reverse('work-experience-batch-delete'), {
+                'batch_delete_ids': ','.join(str(x) for x in self.ids)})
+        self.assertEqual(len(resp.context['delete_object_list']), 2)
+        self.assertContains(resp, '3 work experiences in total')
+
+    def test_export_ids(self):
+        url = reverse('work-experience-export')
+        resp = self.client.get(url, {
+            'ids': '{},{}'.format(self.ids[0], self.other.pk)})
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(x)['id'] for x in lines], [self.ids[0]])
+
+        resp = self.client.get(url, {'ids': 'x'})
+        self.assertEqual(resp.status_code, 400)
+
+
+@override_settings(RESUME_BATCH_BACKGROUND_THRESHOLD=2)
+class BatchBackgroundTestCase(BatchMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(**self.credentials)
+        patcher = run_in_foreground()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_large_batch_is_published_in_the_background(self):
+        resp = self.client.post(reverse('work-experience-bulk-public'), {
+            'ids': ','.join(str(x) for x in self.ids), 'is_public': '1'})
+        self.assertEqual(resp.status_code, 202)
+        job = BatchJob.objects.get(user=self.user)
+        self.assertEqual(resp.json(), {
+            'is_public': True, 'job': job.get_absolute_url(),
+            'forbidden': []})
+        self.assertEqual((job.operation, job.ids, job.status, job.count),
+                         (batch.PUBLISH, self.ids, BatchJob.DONE, 3))
+        self.assertEqual(WorkExperience.objects.filter(
+            user=self.user, is_public=True).count(), 3)
+
+    def test_large_batch_is_deleted_in_the_background(self):
+        resp = self.client.post(
+            reverse('work-experience-batch-delete'),
+            {'batch_delete_ids': ','.join(str(x) for x in self.ids)})
+        job = BatchJob.objects.get(user=self.user)
+        self.assertRedirects(resp, job.get_absolute_url())
+        self.assertFalse(WorkExperience.objects.filter(user=self.user))
+        self.assertFalse(WorkExperienceTranslation.objects.filter(
+            related_model__in=self.ids))
+
+        resp = self.client.get(job.get_absolute_url())
+        self.assertContains(resp, '3 work experiences changed')
+
+    def test_failed_job(self):
+        with mock.patch.object(batch, 'delete_rows',
+                               side_effect=ValueError('x')), \
+                self.assertLogs('resume.batch', 'ERROR'):
+            self.client.post(
+                reverse('work-experience-batch-delete'),
+                {'batch_delete_ids': ','.join(str(x) for x in self.ids)})
+        job = BatchJob.objects.get(user=self.user)
+        self.assertEqual(job.status, BatchJob.FAILED)
+        self.assertEqual(WorkExperience.objects.filter(user=self.user)
+                         .count(), 3)
+
+    def test_detail_of_another_user(self):
+        job = BatchJob.objects.create(user=self.other.user,
+                                      operation=batch.DELETE)
+        resp = self.client.get(job.get_absolute_url())
+        self.assertEqual(resp.status_code, 404)
+
+
+class RecoverBatchJobsTestCase(BatchMixin, TestCase):
+
+    def test_recover_batch_jobs(self):
+        past = timezone.now() - datetime.timedelta(hours=2)
+        stale = BatchJob.objects.create(
+            user=self.user, operation=batch.PUBLISH, ids=self.ids[:2])
+        recent = BatchJob.objects.create(
+            user=self.user, operation=batch.DELETE, ids=self.ids)
+        BatchJob.objects.filter(pk=stale.pk).update(
+            status=BatchJob.RUNNING, created_at=past, started_at=past)
+
+        out = io.StringIO()
+        call_command('recover_batch_jobs', stdout=out)
+        self.assertIn('Done, 1 jobs run, 0 failed.', out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.count), (BatchJob.DONE, 2))
+        self.assertEqual(WorkExperience.objects.filter(
+            user=self.user, is_public=True).count(), 2)
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, BatchJob.PENDING)
+        self.assertEqual(WorkExperience.objects.filter(user=self.user)
+                         .count(), 3)
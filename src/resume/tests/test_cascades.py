@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from profile.models import Profile, ProfileTranslation
+from ..models import (
+    Project,
+    ProjectTranslation,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+
+from testings.factory import Factory
+
+
+User = get_user_model()
+
+
+class DatabaseCascadeTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+        for i in range(3):
+            self.factory.make_multi_work_experience_translations(
+                user=self.user)
+        project = self.factory.make_project(user=self.user)
+        ProjectTranslation.objects.create(
+            related_model=project, language='en', title='Cv')
+        ProfileTranslation.objects.create(
+            related_model=self.user.profile, language='en',
+            description='About me')
+        self.other = self.factory.make_work_experience_translation()
+
+    def get_delete_type(self, table, column):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT confdeltype FROM pg_constraint "
+                "JOIN pg_attribute ON attrelid = conrelid "
+                "AND attnum = conkey[1] "
+                "WHERE contype = 'f' AND conrelid = %s::regclass "
+                "AND attname = %s", [table, column])
+            return [x for x, in cursor.fetchall()]
+
+    def test_constraints_cascade(self):
+        for table, column in (
+                ('resume_workexperience', 'user_id'),
+                ('resume_workexperiencetranslation', 'related_model_id'),
+                ('resume_workexperiencetranslation_tags',
+                 'workexperiencetranslation_id'),
+                ('profile_profiletranslation', 'related_model_id')):
+            self.assertEqual(self.get_delete_type(table, column), ['c'])
+
+    def test_delete_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+        cascaded = ('resume_workexperience', 'resume_project',
+                    'profile_profile')
+        for query in queries.captured_queries:
+            self.assertFalse(
+                any('"{}'.format(x) in query['sql'] for x in cascaded),
+                query['sql'])
+
+        for model in (WorkExperience, Project, Profile):
+            self.assertFalse(model.objects.filter(user=self.user.pk))
+        self.assertFalse(ProjectTranslation.objects.exists())
+        self.assertFalse(ProfileTranslation.objects.exists())
+        self.assertEqual(list(WorkExperienceTranslation.objects.all()),
+                         [self.other])
+        self.assertTrue(WorkExperienceTranslation.tags.through.objects
+                        .filter(workexperiencetranslation=self.other))
+
+    def test_delete_work_experience(self):
+        work_experience = WorkExperience.objects.filter(user=self.user)[0]
+        with CaptureQueriesContext(connection) as queries:
+            work_experience.delete()
+        self.assertFalse([
+            x for x in queries.captured_queries
+            if 'resume_workexperiencetranslation' in x['sql']])
+        self.assertFalse(WorkExperienceTranslation.objects.filter(
+            related_model=work_experience.pk))
+        self.assertEqual(WorkExperience.objects.filter(user=self.user)
+                         .count(), 2)
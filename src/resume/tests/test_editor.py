@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..bulk import bulk_update
+from ..forms import WorkExperienceDatesForm
+from ..models import WorkExperience, WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class WorkExperienceEditorTestCase(TestCase):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.user = self.factory.make_user(**self.credentials)
+        self.client.login(**self.credentials)
+        self.work_experience = self.factory.make_work_experience(
+            user=self.user, date_start=datetime.date(2016, 1, 1),
+            date_end=datetime.date(2017, 1, 1))
+        self.translation = WorkExperienceTranslation.objects.create(
+            related_model=self.work_experience, language='en',
+            position='Engineer', company='Acme', location='Berlin',
+            contribution='<p>Built it</p>', keywords='python')
+        self._url = reverse('work-experience-edit',
+                            args=(self.work_experience.pk,))
+
+    def get_data(self, resp=None, **changes):
+        """The POST data of the unchanged editor, updated with `changes`."""
+        resp = resp or self.client.get(self._url)
+        data = {}
+        for form in [resp.context['form']] + list(resp.context['formset']):
+            for field in form:
+                value = field.value()
+                data[field.html_name] = '' if value is None else value
+        management_form = resp.context['formset'].management_form
+        for field in management_form:
+            data[field.html_name] = field.value()
+        data.update(changes)
+        return data
+
+    def test_one_form_per_language(self):
+        resp = self.client.get(self._url)
+        self.assertEqual(resp.status_code, 200)
+        languages = [x['language'].value() for x in resp.context['formset']]
+        self.assertEqual(languages, ['en', 'zh-hans'])
+        self.assertEqual(resp.context['formset'].initial_form_count(), 1)
+
+    def test_save_the_changes_only(self):
+        data = self.get_data(**{
+            'work_experience-date_end': '2018-01-01',
+            'translations-0-position': 'Lead',
+            'translations-0-keywords': 'python, django',
+        })
+        resp = self.client.post(self._url, data)
+        self.assertRedirects(resp, reverse(
+            'work-experience-translation-list',
+            args=(self.work_experience.pk,)))
+
+        self.work_experience.refresh_from_db()
+        self.assertEqual(self.work_experience.date_end,
+                         datetime.date(2018, 1, 1))
+        translation = self.work_experience.translations.get()
+        self.assertEqual((translation.position, translation.company),
+                         ('Lead', 'Acme'))
+        self.assertEqual(sorted(translation.tags.values_list(
+            'name', flat=True)), ['django', 'python'])
+        self.assertEqual(
+            self.work_experience.translations_snapshot['en']['position'],
+            'Lead')
+
+    def test_save_a_new_translation(self):
+        data = self.get_data(**{
+            'translations-1-position': '工程师',
+            'translations-1-company': 'Acme',
+            'translations-1-location': 'Shanghai',
+            'translations-1-contribution': '<script>x</script><p>做了</p>',
+            # not editable
+            'translations-1-language': 'en',
+        })
+        self.client.post(self._url, data)
+
+        translation = self.work_experience.translations.get(
+            language='zh-hans')
+        self.assertEqual(translation.position, '工程师')
+        self.assertEqual(translation.contribution_html, '<p>做了</p>')
+        self.assertEqual(WorkExperienceTranslation.objects.filter(
+            related_model=self.work_experience).search('shanghai').count(), 1)
+
+    def test_one_update_for_all_the_translations(self):
+        WorkExperienceTranslation.objects.create(
+            related_model=self.work_experience, language='zh-hans',
+            position='工程师', company='Acme', location='柏林')
+        resp = self.client.get(self._url)
+        data = self.get_data(resp, **{
+            'translations-0-position': 'Lead',
+            'translations-1-location': '北京',
+        })
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self._url, data)
+
+        table = WorkExperienceTranslation._meta.db_table
+        updates = [x['sql'] for x in queries.captured_queries
+                   if x['sql'].startswith('UPDATE "{}" SET "location"'
+                                          .format(table))]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"company"', updates[0])
+        self.assertNotIn('"contribution"', updates[0])
+        self.assertFalse([x for x in queries.captured_queries if x['sql']
+                          .startswith('INSERT INTO "{}"'.format(table))])
+        self.assertEqual(
+            dict(self.work_experience.translations.values_list(
+                'language', 'location')),
+            {'en': 'Berlin', 'zh-hans': '北京'})
+        self.assertEqual(self.work_experience.translations.get(
+            language='en').position, 'Lead')
+
+    def test_invalid_dates_save_nothing(self):
+        data = self.get_data(**{
+            'work_experience-date_end': '2015-01-01',
+            'translations-0-position': 'Lead',
+        })
+        resp = self.client.post(self._url, data)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('date_end', resp.context['form'].errors)
+        self.assertEqual(self.work_experience.translations.get().position,
+                         'Engineer')
+
+    def test_dates_form_rejects_an_end_before_the_start(self):
+        form = WorkExperienceDatesForm({
+            'date_start': '2016-01-01', 'date_end': '2015-01-01',
+            'version': self.work_experience.version,
+        }, instance=self.work_experience)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['date_end'],
+                         ['End date should not be earlier than start date!'])
+
+    def test_work_experience_of_another_user(self):
+        work_experience = self.factory.make_work_experience()
+        resp = self.client.get(reverse('work-experience-edit',
+                                       args=(work_experience.pk,)))
+        self.assertEqual(resp.status_code, 404)
+
+
+class BulkUpdateTestCase(TestCase):
+    factory = Factory()
+
+    def test_bulk_update(self):
+        first, second, third = [
+            self.factory.make_work_experience(
+                date_start=datetime.date(2016, 1, 1)) for _ in range(3)]
+        first.date_start = datetime.date(2010, 1, 1)
+        first.is_public = True
+        second.date_end = None
+        # not in the updated fields
+        second.is_public = True
+        with self.assertNumQueries(1):
+            count = bulk_update([first, second, third], {
+                first: ['date_start', 'is_public'], second: ['date_end']})
+        self.assertEqual(count, 2)
+
+        values = dict(WorkExperience.objects.values_list('pk', 'is_public'))
+        self.assertEqual(values, {first.pk: True, second.pk: False,
+                                  third.pk: False})
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.date_start, datetime.date(2010, 1, 1))
+        self.assertIsNone(second.date_end)
+        self.assertEqual(bulk_update([third], {}), 0)
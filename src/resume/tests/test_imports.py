@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import datetime
+import io
+import json
+import shutil
+import tempfile
+import time
+import zipfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import linkedin
+from ..imports import INTERRUPTED, run_import_job
+from ..models import ImportJob, Project, WorkExperience
+
+from testings.factory import Factory
+
+
+def make_csv(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def make_archive(positions=(), projects=(), profile=None):
+    f = io.BytesIO()
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if positions:
+            archive.writestr('Positions.csv', make_csv(positions))
+        if projects:
+            archive.writestr('export/Projects.csv', make_csv(projects))
+        if profile:
+            archive.writestr('Profile.csv', '﻿' + make_csv([profile]))
+    return f.getvalue()
+
+
+POSITIONS = [{
+    'Company Name': 'Acme', 'Title': 'Engineer',
+    'Description': 'Built things', 'Location': 'Berlin',
+    'Started On': 'Mar 2016', 'Finished On': 'Dec 2017',
+}, {
+    'Company Name': 'Initech', 'Title': 'Lead', 'Description': '',
+    'Location': '', 'Started On': 'Jan 2018', 'Finished On': '',
+}]
+PROJECTS = [{'Title': 'cv', 'Description': 'A resume',
+             'Url': 'https://github.com/seawaywen/cv',
+             'Started On': '', 'Finished On': ''}]
+PROFILE = {'First Name': 'Alice', 'Last Name': 'Smith',
+           'Summary': 'Python developer', 'Geo Location': 'Berlin, Germany',
+           'Websites': '[PERSONAL:https://alice.example.com]'}
+
+
+class LinkedInImportTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user(full_name=' ')
+
+    def test_parse_date(self):
+        self.assertEqual(linkedin.parse_date('Jan 2015'), '2015-01')
+        self.assertEqual(linkedin.parse_date('September 2015'), '2015-09')
+        self.assertEqual(linkedin.parse_date('2015'), '2015')
+        self.assertIsNone(linkedin.parse_date(''))
+        with self.assertRaises(linkedin.LinkedInError):
+            linkedin.parse_date('soon')
+
+    def test_import_archive(self):
+        archive = make_archive(POSITIONS, PROJECTS, PROFILE)
+        stats = linkedin.import_linkedin_archive(
+            io.BytesIO(archive), self.user)
+        self.assertEqual(stats['work_experiences'], 2)
+        self.assertEqual(stats['projects'], 1)
+
+        acme, initech = WorkExperience.objects.filter(user=self.user)\
+            .order_by('date_start')
+        self.assertEqual(str(acme.date_start), '2016-03-01')
+        self.assertEqual(str(acme.date_end), '2017-12-01')
+        self.assertIsNone(initech.date_end)
+        translation = acme.translations.get()
+        self.assertEqual((translation.company, translation.position,
+                          translation.contribution_html),
+                         ('Acme', 'Engineer', '<p>Built things</p>'))
+        self.assertEqual(Project.objects.get(user=self.user).title, 'cv')
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.full_name, 'Alice Smith')
+        profile = self.user.profile
+        profile.refresh_from_db()
+        self.assertEqual((profile.city, profile.personal_site,
+                          profile.description),
+                         ('Berlin', 'https://alice.example.com',
+                          'Python developer'))
+        self.assertEqual(profile.translations.get().description,
+                         'Python developer')
+
+    def test_profile_keeps_the_filled_fields(self):
+        self.user.profile.city = 'Paris'
+        self.user.profile.save()
+        linkedin.import_linkedin_archive(
+            io.BytesIO(make_archive(profile=PROFILE)), self.user)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.city, 'Paris')
+
+    def test_invalid_archives(self):
+        for content in (b'not a zip', make_archive()):
+            with self.assertRaises(linkedin.LinkedInError):
+                linkedin.import_linkedin_archive(
+                    io.BytesIO(content), self.user)
+
+
+class ImportJobMixin(object):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.import_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.import_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, RESUME_IMPORT_ROOT=self.import_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = self.factory.make_user(**self.credentials)
+        self.client.login(**self.credentials)
+
+    def upload(self, content, kind=ImportJob.LINKEDIN, name='export.zip'):
+        return self.client.post(reverse('import-job-add'), {
+            'kind': kind, 'language': 'en',
+            'archive': SimpleUploadedFile(name, content)})
+
+    def make_job(self, **kwargs):
+        kwargs.setdefault('user', self.user)
+        kwargs.setdefault('kind', ImportJob.JSON_RESUME)
+        kwargs.setdefault('archive', SimpleUploadedFile(
+            'resume.json', json.dumps({
+                'work': [{'name': 'Acme', 'startDate': '2018'}],
+            }).encode('utf-8')))
+        return ImportJob.objects.create(**kwargs)
+
+
+class ImportJobTestCase(ImportJobMixin, TestCase):
+
+    def test_form_rejects_a_linkedin_file_which_is_not_a_zip(self):
+        resp = self.upload(b'{}')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('archive', resp.context['form'].errors)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_archive_is_private(self):
+        job = self.make_job()
+        self.assertRegex(job.archive.name,
+                         r'^\d{4}/\d{2}/[0-9a-f]{32}\.json$')
+        self.assertTrue(job.archive.path.startswith(self.import_root))
+        self.assertFalse(job.archive.path.startswith(self.media_root))
+        with self.assertRaises(ValueError):
+            job.archive.url
+
+    def test_run_import_job(self):
+        job = self.make_job()
+        path = job.archive.path
+        run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual(job.stats['work_experiences'], 1)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(job.archive)
+        self.assertFalse(job.archive.storage.exists(path))
+
+    def test_run_import_job_records_the_error(self):
+        job = ImportJob.objects.create(
+            user=self.user, kind=ImportJob.LINKEDIN,
+            archive=SimpleUploadedFile(
+                'export.zip', make_archive([dict(POSITIONS[0],
+                                                 **{'Started On': 'x'})])))
+        run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertEqual(job.error, "invalid date 'x'")
+        self.assertFalse(job.archive)
+        self.assertFalse(WorkExperience.objects.exists())
+
+    def test_interrupted_job_is_failed(self):
+        job = self.make_job()
+        path = job.archive.path
+        with mock.patch.dict('resume.imports.IMPORTERS', {
+                ImportJob.JSON_RESUME: mock.Mock(
+                    side_effect=KeyboardInterrupt)}):
+            with self.assertRaises(KeyboardInterrupt):
+                run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertEqual(job.error, INTERRUPTED)
+        self.assertFalse(job.archive.storage.exists(path))
+
+    def test_recover_import_jobs(self):
+        past = timezone.now() - datetime.timedelta(hours=2)
+        pending = self.make_job()
+        running = self.make_job(status=ImportJob.RUNNING)
+        running.archive.delete(save=False)
+        recent = self.make_job()
+        ImportJob.objects.filter(pk__in=[pending.pk, running.pk]).update(
+            created_at=past, started_at=past)
+        ImportJob.objects.filter(pk=pending.pk).update(started_at=None)
+
+        out = io.StringIO()
+        call_command('recover_import_jobs', stdout=out)
+        self.assertIn('Done, 1 jobs imported, 1 failed.', out.getvalue())
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, ImportJob.DONE)
+        self.assertEqual(
+            WorkExperience.objects.filter(user=self.user).count(), 1)
+        running.refresh_from_db()
+        self.assertEqual(running.status, ImportJob.FAILED)
+        self.assertEqual(running.error, INTERRUPTED)
+        self.assertFalse(running.archive)
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, ImportJob.PENDING)
+
+        call_command('recover_import_jobs', stdout=out)
+        self.assertIn('Done, 0 jobs imported, 0 failed.', out.getvalue())
+
+    def test_recover_import_jobs_fail(self):
+        job = self.make_job()
+        ImportJob.objects.filter(pk=job.pk).update(
+            created_at=job.created_at - datetime.timedelta(minutes=20))
+        call_command('recover_import_jobs', '--stale-after', '10', '--fail',
+                     stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertFalse(WorkExperience.objects.exists())
+
+    def test_detail_of_another_user(self):
+        job = ImportJob.objects.create(
+            user=self.factory.make_user(), kind=ImportJob.LINKEDIN,
+            archive=SimpleUploadedFile('export.zip', b''))
+        resp = self.client.get(job.get_absolute_url())
+        self.assertEqual(resp.status_code, 404)
+
+
+class ImportJobBackgroundTestCase(ImportJobMixin, TransactionTestCase):
+
+    def test_upload_is_imported_in_the_background(self):
+        resp = self.upload(make_archive(POSITIONS, PROJECTS))
+        job = ImportJob.objects.get(user=self.user)
+        self.assertRedirects(resp, job.get_absolute_url())
+
+        deadline = time.time() + 10
+        while not job.is_finished() and time.time() < deadline:
+            time.sleep(0.05)
+            job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual(
+            WorkExperience.objects.filter(user=self.user).count(), 2)
+
+        resp = self.client.get(job.get_absolute_url())
+        self.assertContains(resp, '2 work experiences created')
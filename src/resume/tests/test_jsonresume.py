@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import jsonresume
+from ..models import (
+    Project,
+    ProjectTranslation,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+
+from testings.factory import Factory
+
+
+RESUME = {
+    'basics': {'name': 'Alice', 'profiles': [{'network': 'Twitter'}]},
+    'work': [{
+        'name': 'Acme',
+        'position': 'Engineer',
+        'location': 'Berlin',
+        'startDate': '2016-03',
+        'endDate': '2017-12-31',
+        'summary': 'Built the <search> service',
+        'highlights': ['Cut the latency by 10x'],
+        'keywords': ['python', 'postgres'],
+    }, {
+        'company': 'Initech',
+        'position': 'Lead',
+        'startDate': '2018-01-01',
+    }],
+    'projects': [{
+        'name': 'cv',
+        'description': 'A multilingual resume',
+        'url': 'https://github.com/seawaywen/cv',
+    }],
+    'skills': [{'name': 'Web', 'keywords': ['HTML']}],
+}
+
+
+class IterJSONResumeTestCase(TestCase):
+
+    def test_streams_the_entries(self):
+        text = json.dumps(RESUME, indent=2)
+        items = list(jsonresume.iter_json_resume(StringIO(text), chunk_size=7))
+        self.assertEqual([x for x, _ in items],
+                         ['basics', 'work', 'work', 'projects', 'skills'])
+        self.assertEqual([x for _, x in items if _ == 'work'], RESUME['work'])
+
+    def test_numbers_split_across_chunks(self):
+        text = '{"meta": 12345, "work": [1234567]}'
+        self.assertEqual(
+            list(jsonresume.iter_json_resume(StringIO(text), chunk_size=3)),
+            [('meta', 12345), ('work', 1234567)])
+
+    def test_empty_sections(self):
+        self.assertEqual(
+            list(jsonresume.iter_json_resume(StringIO('{"work": []}'))), [])
+        self.assertEqual(list(jsonresume.iter_json_resume(StringIO('{}'))), [])
+
+    def test_invalid_json(self):
+        for text in ('[]', '{"work": [{"name": }]}', '{"work": [{}'):
+            with self.assertRaises(jsonresume.JSONResumeError):
+                list(jsonresume.iter_json_resume(StringIO(text)))
+
+    def test_invalid_value_is_not_read_further(self):
+        text = '{"work": [{"name": tru}, ' + '"x", ' * 10000 + '"x"]}'
+        f = StringIO(text)
+        with self.assertRaisesMessage(jsonresume.JSONResumeError,
+                                      'Expecting value'):
+            list(jsonresume.iter_json_resume(f, chunk_size=16))
+        self.assertLess(f.tell(), 100)
+
+    def test_strings_split_across_chunks(self):
+        text = '{"work": ["%s", "\\u00e9"]}' % ('x' * 100)
+        self.assertEqual(
+            list(jsonresume.iter_json_resume(StringIO(text), chunk_size=4)),
+            [('work', 'x' * 100), ('work', '\u00e9')])
+
+    def test_parse_date(self):
+        self.assertEqual(jsonresume.parse_date('2014'),
+                         datetime.date(2014, 1, 1))
+        self.assertEqual(jsonresume.parse_date('2014-06'),
+                         datetime.date(2014, 6, 1))
+        self.assertEqual(jsonresume.parse_date('2014-06-29T10:00:00Z'),
+                         datetime.date(2014, 6, 29))
+        with self.assertRaises(ValueError):
+            jsonresume.parse_date('June 2014')
+
+
+class ImportJSONResumeTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+
+    def import_resume(self, resume=RESUME, **kwargs):
+        return jsonresume.import_json_resume(
+            StringIO(json.dumps(resume)), self.user, **kwargs)
+
+    def test_import(self):
+        stats = self.import_resume(is_public=True)
+        self.assertEqual(stats, {
+            'work_experiences': 2, 'work_experience_translations': 2,
+            'projects': 1, 'project_translations': 1})
+
+        acme, initech = WorkExperience.objects.filter(user=self.user)\
+            .order_by('date_start')
+        self.assertTrue(acme.is_public)
+        self.assertEqual((acme.date_start, acme.date_end),
+                         (datetime.date(2016, 3, 1),
+                          datetime.date(2017, 12, 31)))
+        self.assertIsNone(initech.date_end)
+        translation = acme.translations.get()
+        self.assertEqual((translation.company, translation.position,
+                          translation.location),
+                         ('Acme', 'Engineer', 'Berlin'))
+        self.assertEqual(
+            translation.contribution_html,
+            '<p>Built the &lt;search&gt; service</p>'
+            '<ul><li>Cut the latency by 10x</li></ul>')
+        self.assertEqual(sorted(translation.tags.values_list(
+            'name', flat=True)), ['postgres', 'python'])
+        self.assertIsNotNone(translation.search_vector)
+        self.assertEqual(acme.translations_snapshot['en']['company'], 'Acme')
+        self.assertEqual(initech.translations.get().company, 'Initech')
+        self.assertEqual(self.user.career_timeline.get_stats()[
+            'work_experience_count'], 2)
+
+        project = Project.objects.get(user=self.user)
+        self.assertEqual((project.title, project.github),
+                         ('cv', 'https://github.com/seawaywen/cv'))
+        self.assertEqual(project.translations.get().language, 'en')
+
+    def test_writes_in_bulk(self):
+        # the queries do not depend on the number of entries of a batch,
+        # the keywords exist after the first import
+        self.import_resume()
+        with CaptureQueriesContext(connection) as two_entries:
+            self.import_resume(batch_size=10)
+        resume = dict(RESUME, work=RESUME['work'] * 5)
+        with CaptureQueriesContext(connection) as ten_entries:
+            self.import_resume(resume, batch_size=10)
+        self.assertEqual(len(two_entries), len(ten_entries))
+        self.assertEqual(WorkExperience.objects.count(), 14)
+
+    def test_import_another_language(self):
+        self.import_resume()
+        stats = self.import_resume(language='zh-hans')
+        self.assertEqual(stats['work_experiences'], 0)
+        self.assertEqual(stats['projects'], 0)
+        self.assertEqual(WorkExperience.objects.count(), 2)
+        self.assertEqual(WorkExperienceTranslation.objects.filter(
+            language='zh-hans').count(), 2)
+        self.assertEqual(ProjectTranslation.objects.filter(
+            language='zh-hans').count(), 1)
+
+        # the same language again creates new ones
+        self.assertEqual(self.import_resume()['work_experiences'], 2)
+
+    def test_invalid_entry_rolls_back(self):
+        resume = dict(RESUME, work=RESUME['work'] + [{'name': 'Broken'}])
+        with self.assertRaisesMessage(jsonresume.JSONResumeError,
+                                      "work[2]: invalid date None"):
+            self.import_resume(resume, batch_size=1)
+        self.assertFalse(WorkExperience.objects.exists())
+        self.assertFalse(Project.objects.exists())
+
+    def test_present_end_date(self):
+        resume = {'work': [{'name': 'Acme', 'startDate': '2018',
+                            'endDate': 'Present'}]}
+        self.import_resume(resume)
+        self.assertIsNone(WorkExperience.objects.get().date_end)
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'resume.json')
+        with open(path, 'w') as f:
+            json.dump(RESUME, f)
+
+        out = StringIO()
+        call_command('import_json_resume', path, '--user', self.user.email,
+                     '--language', 'zh-hans', stdout=out)
+        self.assertIn('Done, 2 work experiences', out.getvalue())
+        self.assertEqual(WorkExperienceTranslation.objects.filter(
+            language='zh-hans').count(), 2)
+
+        with self.assertRaisesMessage(CommandError, 'Unknown user'):
+            call_command('import_json_resume', path, '--user', 'x@test.com')
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cooccurrence import (
+    count_cooccurrences,
+    rebuild_cooccurrences,
+    related_keywords,
+)
+from ..forms import WorkExperienceTranslationForm
+from ..keywords import get_or_create_keywords, index_keywords, parse_keywords
+from ..models import (
+    Keyword,
+    KeywordCooccurrence,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+
+from testings.factory import Factory
+
+
+class ParseKeywordsTestCase(TestCase):
+
+    def test_parse_separated_keywords(self):
+        self.assertEqual(
+            parse_keywords('Python, Machine  Learning;django\nPYTHON|'),
+            ['python', 'machine learning', 'django'])
+
+    def test_parse_white_space_separated_keywords(self):
+        self.assertEqual(parse_keywords(' Python django  python '),
+                         ['python', 'django'])
+
+    def test_parse_empty_keywords(self):
+        self.assertEqual(parse_keywords(''), [])
+        self.assertEqual(parse_keywords(' , ;'), [])
+
+
+class KeywordIndexMixin(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+
+    def make_translation(self, keywords, language='en', is_public=True,
+                         work_experience=None):
+        if work_experience is None:
+            work_experience = self.factory.make_work_experience(
+                user=self.user, is_public=is_public)
+        return WorkExperienceTranslation.objects.create(
+            related_model=work_experience, language=language,
+            position='Engineer', company='Acme', location='Berlin',
+            keywords=keywords)
+
+    @staticmethod
+    def get_tags(translation):
+        return sorted(str(x) for x in translation.tags.all())
+
+
+class KeywordIndexTestCase(KeywordIndexMixin):
+
+    def test_keywords_are_indexed_on_save(self):
+        translation = self.make_translation('Python, Django')
+        self.assertEqual(self.get_tags(translation),
+                         ['en:django', 'en:python'])
+
+        translation.keywords = 'django, postgres'
+        translation.save()
+        self.assertEqual(self.get_tags(translation),
+                         ['en:django', 'en:postgres'])
+        # the keywords are kept for the other translations
+        self.assertTrue(Keyword.objects.filter(name='python').exists())
+
+    def test_keywords_are_shared_per_language(self):
+        english = self.make_translation('python')
+        self.make_translation('python')
+        chinese = self.make_translation(
+            'python', language='zh-hans',
+            work_experience=english.related_model)
+
+        self.assertEqual(Keyword.objects.filter(name='python').count(), 2)
+        self.assertEqual(self.get_tags(chinese), ['zh-hans:python'])
+
+    def test_index_keywords_queries_do_not_depend_on_rows(self):
+        translations = [self.make_translation('a{0}, b{0}'.format(i))
+                        for i in range(10)]
+        WorkExperienceTranslation.tags.through.objects.all().delete()
+        Keyword.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            index_keywords(translations)
+        self.assertLessEqual(len(queries), 7)
+        self.assertEqual(
+            WorkExperienceTranslation.tags.through.objects.count(), 20)
+
+    def test_keywords_created_meanwhile(self):
+        filter = Keyword.objects.filter
+        created = []
+
+        def fetch(*args, **kwargs):
+            if not created:
+                # saved by another request once the keywords were read
+                created.append(Keyword.objects.create(
+                    language='en', name='django'))
+                return Keyword.objects.none()
+            return filter(*args, **kwargs)
+
+        pairs = [('en', 'python'), ('en', 'django'), ('zh-hans', 'django')]
+        with mock.patch.object(Keyword.objects, 'filter', fetch):
+            keyword_ids = get_or_create_keywords(Keyword, pairs)
+        self.assertEqual(sorted(keyword_ids), sorted(pairs))
+        self.assertEqual(keyword_ids[('en', 'django')], created[0].pk)
+        self.assertEqual(Keyword.objects.count(), 3)
+
+    def test_rebuild_keyword_index_command(self):
+        translation = self.make_translation('python')
+        translation.tags.clear()
+
+        call_command('rebuild_keyword_index', '--batch-size', '1',
+                     stdout=StringIO())
+        self.assertEqual(self.get_tags(translation), ['en:python'])
+
+
+class WorkExperienceTaggedTestCase(KeywordIndexMixin):
+
+    def setUp(self):
+        super().setUp()
+        self.python_django = self.make_translation('python, django')
+        self.python = self.make_translation('python, flask')
+        self.private = self.make_translation('python, django', is_public=False)
+        # the tags of an experience may come from different translations
+        self.mixed = self.make_translation('python')
+        self.make_translation('django', language='zh-hans',
+                              work_experience=self.mixed.related_model)
+
+    def test_tagged(self):
+        self.assertEqual(
+            set(WorkExperience.objects.tagged('Python', 'django')),
+            {self.python_django.related_model, self.private.related_model,
+             self.mixed.related_model})
+        self.assertEqual(
+            set(WorkExperience.objects.tagged('python', 'django',
+                                              language='en')),
+            {self.python_django.related_model, self.private.related_model})
+        self.assertEqual(
+            WorkExperience.objects.tagged('python').count(), 4)
+
+    def test_keyword_facets(self):
+        queryset = WorkExperience.objects.filter(is_public=True)\
+            .tagged('python')
+        self.assertEqual(list(queryset.keyword_facets()), [
+            {'name': 'python', 'count': 3},
+            {'name': 'django', 'count': 2},
+            {'name': 'flask', 'count': 1},
+        ])
+        self.assertEqual(list(queryset.keyword_facets(language='zh-hans')), [
+            {'name': 'django', 'count': 1},
+        ])
+
+    def test_tagged_view(self):
+        resp = self.client.get(reverse('work-experience-tagged'),
+                               {'tag': ['python', 'django']})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(
+            {x['id'] for x in data['results']},
+            {self.python_django.related_model_id, self.mixed.related_model_id})
+        self.assertEqual(data['facets'], [
+            {'name': 'django', 'count': 2},
+            {'name': 'python', 'count': 2},
+        ])
+
+    def test_tagged_view_invalid_page(self):
+        resp = self.client.get(reverse('work-experience-tagged'),
+                               {'tag': 'python', 'page': 9})
+        self.assertEqual(resp.status_code, 404)
+
+
+class KeywordCooccurrenceTestCase(KeywordIndexMixin):
+
+    def setUp(self):
+        super().setUp()
+        self.make_translation('python, django, postgres')
+        self.make_translation('python, django')
+        self.make_translation('python, flask')
+        self.make_translation('python, cobol', is_public=False)
+        self.make_translation('python, django', language='zh-hans')
+
+    def get_id(self, name, language='en'):
+        return Keyword.objects.get(language=language, name=name).id
+
+    def test_count_cooccurrences(self):
+        # a pair per round trip and per flush, the result is the same
+        matrix = count_cooccurrences(chunk_size=1, flush_size=1)
+        python, django = self.get_id('python'), self.get_id('django')
+        self.assertEqual(matrix[python, django], 2)
+        self.assertEqual(matrix[django, python], 2)
+        self.assertEqual(matrix[python, self.get_id('flask')], 1)
+        self.assertEqual(matrix[python, self.get_id('cobol')], 0)
+        self.assertEqual(matrix[python, python], 0)
+        self.assertEqual(
+            matrix[self.get_id('python', 'zh-hans'),
+                   self.get_id('django', 'zh-hans')], 1)
+
+    def test_rebuild_cooccurrences_keeps_the_most_frequent(self):
+        self.assertEqual(rebuild_cooccurrences(limit=1), 6)
+        self.assertEqual(
+            KeywordCooccurrence.objects.get(
+                keyword__language='en', keyword__name='python')
+            .related_keyword.name, 'django')
+
+        # rebuilding replaces the rows
+        self.assertEqual(rebuild_cooccurrences(min_count=2), 2)
+
+    def test_related_keywords(self):
+        rebuild_cooccurrences()
+        self.assertEqual(related_keywords('en', ['python']),
+                         ['django', 'flask', 'postgres'])
+        self.assertEqual(related_keywords('en', ['python', 'django']),
+                         ['postgres', 'flask'])
+        self.assertEqual(related_keywords('zh-hans', ['python']), ['django'])
+        self.assertEqual(related_keywords('en', []), [])
+
+    def test_form_related_skills(self):
+        rebuild_cooccurrences()
+        form = WorkExperienceTranslationForm(data={
+            'language': 'en', 'keywords': 'Django'})
+        self.assertEqual(form.get_related_skills(), ['python', 'postgres'])
+        self.assertEqual(WorkExperienceTranslationForm().get_related_skills(),
+                         [])
+
+    def test_build_keyword_cooccurrence_command(self):
+        out = StringIO()
+        call_command('build_keyword_cooccurrence', '--limit', '1',
+                     stdout=out)
+        self.assertIn('6 keyword pairs kept', out.getvalue())
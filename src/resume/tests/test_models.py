@@ -1,11 +1,23 @@
 
 from datetime import timedelta
+from io import StringIO
 
 import django
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.utils import timezone, translation
 
-from ..models import WorkExperience, WorkExperienceTranslation
+from ..models import (
+    get_language_fallback_chain,
+    Project,
+    ProjectTranslation,
+    TranslatedField,
+    WorkExperience,
+    WorkExperienceTranslation,
+)
+from .. import sanitizer
+from ..multilingual import TranslationLoader
+from profile.models import ProfileTranslation
 
 from testings.factory import Factory
 
@@ -81,6 +93,24 @@ class WorkExperienceTestCase(TestCase):
         expected_error = "'WorkExperience' object has no attribute 'language'"
         self.assertTrue(expected_error in str(context.exception))
 
+    def test_multilingual_fields_are_descriptors(self):
+        for name in ('position', 'company', 'location', 'contribution'):
+            self.assertIsInstance(
+                getattr(WorkExperience, name), TranslatedField)
+            self.assertIsInstance(
+                getattr(WorkExperience, '{}_translated'.format(name)),
+                TranslatedField)
+        self.assertFalse(hasattr(WorkExperience, 'keywords'))
+
+    def test_assigned_value_takes_precedence_over_translation(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        self.factory.make_work_experience_translation(
+            related_model=work_experience, language='en', position='position')
+
+        work_experience.position = 'annotated position'
+        self.assertEqual(work_experience.position, 'annotated position')
+        self.assertEqual(work_experience.position_translated, 'position')
+
 
 class WorkExperienceTranslationTestCase(TestCase):
 
@@ -240,3 +270,278 @@ class WorkExperienceTranslationTestCase(TestCase):
                    date_end.strftime('%Y-%m-%d'), is_public, expected_trans_obj_list)
 
         self.assertEqual(str(work_experience), expected_work_expected_obj_str)
+
+    def test_translation_bundle_loaded_once_for_all_multilingual_fields(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        self.factory.make_multi_work_experience_translations(
+            work_experience=work_experience)
+        # without snapshot, the translations are loaded from their table
+        WorkExperience.objects.filter(id=work_experience.id).update(
+            translations_snapshot=None)
+        work_experience = WorkExperience.objects.get(id=work_experience.id)
+
+        translation.activate('en')
+        with self.assertNumQueries(1):
+            for name in ('position', 'company', 'location', 'contribution',
+                         'position_translated'):
+                getattr(work_experience, name)
+        translation.deactivate_all()
+
+        self.assertSetEqual(
+            set(work_experience.get_translation_bundle()), {'en', 'zh-hans'})
+
+    def test_translation_bundle_invalidated_on_translation_change(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        _translation = self.factory.make_work_experience_translation(
+            related_model=work_experience, language='en',
+            position='software engineer')
+
+        translation.activate('en')
+        self.assertEqual(work_experience.position, 'software engineer')
+
+        _translation.position = 'senior software engineer'
+        _translation.save()
+        self.assertEqual(work_experience.position, 'senior software engineer')
+
+        _translation.delete()
+        self.assertEqual(work_experience.position, '')
+        translation.deactivate_all()
+
+    def test_with_translation_annotates_fields_in_one_query(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        self.factory.make_work_experience_translation(
+            related_model=work_experience, language='en', position='engineer')
+        self.factory.make_work_experience_translation(
+            related_model=work_experience, language='zh-hans',
+            position='工程师')
+        no_translation = self.factory.make_work_experience(self.user)
+
+        with self.assertNumQueries(1):
+            experiences = {
+                obj.id: obj for obj in
+                WorkExperience.objects.with_translation('zh-hans')}
+            self.assertEqual(experiences[work_experience.id].position, '工程师')
+            self.assertEqual(experiences[no_translation.id].position, '')
+
+        # fallback to the first translation when the language is missing
+        work_experience = WorkExperience.objects.with_translation('fr')\
+            .get(id=work_experience.id)
+        self.assertEqual(work_experience.position, 'engineer')
+
+    @override_settings(MULTILINGUAL_FALLBACK_LANGUAGES={
+        'default': ['zh-hans']})
+    def test_fallback_chain_used_by_instance_and_queryset(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        for language, position in (('en', 'engineer'), ('zh-hans', '工程师')):
+            self.factory.make_work_experience_translation(
+                related_model=work_experience, language=language,
+                position=position)
+
+        self.assertListEqual(
+            get_language_fallback_chain('fr-fr'), ['fr-fr', 'fr', 'zh-hans'])
+
+        translation.activate('fr-fr')
+        self.assertEqual(work_experience.position, '工程师')
+        self.assertEqual(
+            WorkExperience.objects.with_translation()
+            .get(id=work_experience.id).position, '工程师')
+        translation.deactivate_all()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                WorkExperienceTranslation.objects.get_translation(
+                    work_experience.id, 'en-us').position, 'engineer')
+
+    def test_translations_snapshot_follows_translation_writes(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        self.assertEqual(work_experience.translations_snapshot, {})
+
+        _translation = self.factory.make_work_experience_translation(
+            related_model=work_experience, language='en',
+            position='engineer', company='memodir', location='beijing')
+        work_experience.refresh_from_db()
+        self.assertDictEqual(work_experience.translations_snapshot, {
+            'en': {'position': 'engineer', 'company': 'memodir',
+                   'location': 'beijing',
+                   'contribution': _translation.contribution,
+                   'contribution_html': _translation.contribution_html,
+                   'contribution_excerpt': _translation.contribution_excerpt}})
+
+        # reading the translated fields doesn't need any other query
+        work_experience = WorkExperience.objects.get(id=work_experience.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(work_experience.position, 'engineer')
+
+        # saving a stale instance doesn't overwrite the snapshot
+        _translation.delete()
+        work_experience.is_public = True
+        work_experience.save()
+        work_experience.refresh_from_db()
+        self.assertDictEqual(work_experience.translations_snapshot, {})
+        self.assertTrue(work_experience.is_public)
+
+    def test_save_keeps_the_model_save_contract(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        # an instance with the primary key of an existing row updates it
+        WorkExperience(pk=work_experience.pk, user=self.user,
+                       date_start=work_experience.date_start,
+                       is_public=True).save()
+        work_experience.refresh_from_db()
+        self.assertTrue(work_experience.is_public)
+        self.assertEqual(work_experience.translations_snapshot, {})
+
+    def test_rebuild_translation_snapshots_command(self):
+        translations = self.factory.make_multi_work_experience_translations(
+            user=self.user)
+        work_experience = translations[0].related_model
+        WorkExperience.objects.update(translations_snapshot=None)
+
+        call_command('rebuild_translation_snapshots', batch_size=1,
+                     stdout=StringIO())
+
+        work_experience.refresh_from_db()
+        self.assertSetEqual(
+            set(work_experience.translations_snapshot), {'en', 'zh-hans'})
+
+    def test_language_status_for_queryset_in_one_query(self):
+        work_experience = self.factory.make_work_experience(self.user)
+        self.factory.make_work_experience_translation(
+            related_model=work_experience, language='zh-hans')
+        no_translation = self.factory.make_work_experience(self.user)
+
+        with self.assertNumQueries(1):
+            status = WorkExperience.objects.filter(
+                user=self.user).get_language_status()
+        self.assertDictEqual(status, {
+            work_experience.id: ({'zh-hans'}, {'en'}),
+            no_translation.id: (set(), {'en', 'zh-hans'}),
+        })
+
+        with self.assertNumQueries(1):
+            experiences = {
+                obj.id: obj for obj in WorkExperience.objects.filter(
+                    user=self.user).with_filled_languages()}
+            self.assertListEqual(
+                experiences[work_experience.id].get_unfilled_languages(),
+                ['en'])
+            self.assertListEqual(
+                experiences[no_translation.id].get_language_status_list(),
+                [('en', 'English', False), ('zh-hans', 'Chinese', False)])
+
+
+class TranslationLoaderTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = Factory()
+        self.user = self.factory.make_user()
+
+    def test_project_translated_fields_fallback_to_columns(self):
+        project = self.factory.make_project(
+            user=self.user, title='memodir', description='cv site')
+        self.assertEqual(project.title_translated, 'memodir')
+
+        ProjectTranslation.objects.create(
+            related_model=project, language='zh-hans', title='萌迪',
+            description='简历网站')
+        with translation.override('zh-hans'):
+            self.assertEqual(project.title_translated, '萌迪')
+            self.assertEqual(project.description_translated, '简历网站')
+            # the column itself keeps the default language value
+            self.assertEqual(project.title, 'memodir')
+
+    def test_load_one_query_per_model(self):
+        profile = self.user.profile
+        ProfileTranslation.objects.create(
+            related_model=profile, language='en', description='about me')
+        for i in range(3):
+            self.factory.make_multi_work_experience_translations(
+                user=self.user)
+            project = self.factory.make_project(user=self.user)
+            ProjectTranslation.objects.create(
+                related_model=project, language='en', title='project')
+
+        WorkExperience.objects.update(translations_snapshot=None)
+        profile.refresh_from_db()
+        work_experience_list = list(WorkExperience.objects.all())
+        project_list = list(Project.objects.all())
+
+        # profile, work experiences and projects
+        with self.assertNumQueries(3):
+            TranslationLoader()\
+                .add(profile)\
+                .add_all(work_experience_list)\
+                .add_all(project_list)\
+                .load()
+
+        with translation.override('en'), self.assertNumQueries(0):
+            self.assertEqual(profile.description_translated, 'about me')
+            for work_experience in work_experience_list:
+                self.assertTrue(work_experience.position)
+            for project in project_list:
+                self.assertEqual(project.title_translated, 'project')
+
+
+class RenderedContributionTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+        self.work_experience = self.factory.make_work_experience(self.user)
+
+    def make_translation(self, contribution):
+        return WorkExperienceTranslation.objects.create(
+            related_model=self.work_experience, language='en',
+            position='engineer', company='memodir', location='beijing',
+            contribution=contribution)
+
+    def test_contribution_is_rendered_on_save(self):
+        translation = self.make_translation(
+            '<p>Built <b onclick="x()">the</b> <script>alert(1)</script>'
+            'pipeline</p>\n<p>&nbsp;</p><p>Led&nbsp;a team</p>')
+        translation.refresh_from_db()
+        self.assertEqual(
+            translation.contribution_html,
+            '<p>Built <b>the</b> pipeline</p>\n<p>Led&nbsp;a team</p>')
+        self.assertEqual(translation.contribution_excerpt,
+                         'Built the pipeline Led a team')
+        self.assertEqual(translation.contribution_version,
+                         sanitizer.POLICY_VERSION)
+
+    def test_contribution_is_rendered_with_update_fields(self):
+        translation = self.make_translation('<p>old</p>')
+        translation.contribution = '<p>new</p>'
+        translation.save(update_fields=['contribution'])
+        translation.refresh_from_db()
+        self.assertEqual(translation.contribution_html, '<p>new</p>')
+        self.assertEqual(translation.contribution_excerpt, 'new')
+
+    def test_excerpt_is_truncated_on_word_boundary(self):
+        self.assertEqual(
+            sanitizer.make_excerpt('<p>Hello world</p><p>again</p>', 14),
+            'Hello world\u2026')
+        self.assertEqual(sanitizer.make_excerpt('<p>short</p>', 14), 'short')
+
+    def test_unsafe_links_are_removed(self):
+        self.assertEqual(
+            sanitizer.sanitize_contribution(
+                '<a href="javascript:alert(1)" target="_blank">x</a>'
+                '<a href="https://example.com">y</a>'),
+            '<a>x</a><a href="https://example.com">y</a>')
+
+    def test_render_contributions_command(self):
+        translation = self.make_translation('<p>text<img src=x></p>')
+        WorkExperienceTranslation.objects.update(
+            contribution_html='stale', contribution_version=0)
+        self.work_experience.refresh_from_db()
+
+        call_command('render_contributions', '--outdated-only',
+                     stdout=StringIO())
+
+        translation.refresh_from_db()
+        self.assertEqual(translation.contribution_html, '<p>text</p>')
+        self.assertEqual(translation.contribution_version,
+                         sanitizer.POLICY_VERSION)
+        self.work_experience.refresh_from_db()
+        self.assertEqual(
+            self.work_experience.translations_snapshot['en']
+            ['contribution_html'], '<p>text</p>')
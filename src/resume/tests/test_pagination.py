@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import WorkExperience
+from ..pagination import InvalidCursor, KeysetPaginator
+
+from testings.factory import Factory
+
+
+class KeysetPaginatorTestCase(TestCase):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.user = self.factory.make_user(**self.credentials)
+        for i in range(25):
+            # the same start dates, ordered by the ids
+            self.factory.make_work_experience(
+                user=self.user, is_public=True,
+                date_start=datetime.date(2000 + i // 3, 1, 1))
+        self.factory.make_work_experience()
+        self.queryset = WorkExperience.objects.filter(user=self.user)
+        self.ids = list(self.queryset.order_by('-date_start', '-id')
+                        .values_list('id', flat=True))
+
+    def get_ids(self, page):
+        return [x.id for x in page]
+
+    def test_pages(self):
+        paginator = KeysetPaginator(self.queryset, 10)
+        pages = []
+        with self.assertNumQueries(3):
+            page = paginator.page()
+            pages.append(self.get_ids(page))
+            while page.has_next():
+                page = paginator.page(page.next_cursor())
+                pages.append(self.get_ids(page))
+        self.assertEqual(pages, [self.ids[:10], self.ids[10:20],
+                                 self.ids[20:]])
+        self.assertTrue(page.has_previous())
+
+        page = paginator.page(page.previous_cursor())
+        self.assertEqual(self.get_ids(page), self.ids[10:20])
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+        page = paginator.page(page.previous_cursor())
+        self.assertEqual(self.get_ids(page), self.ids[:10])
+        self.assertFalse(page.has_previous())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 25)
+
+    def test_query_of_a_deep_page(self):
+        paginator = KeysetPaginator(self.queryset, 10)
+        cursor = paginator.page().next_cursor()
+        queryset = self.queryset.order_by('-date_start', '-id').filter(
+            paginator.get_condition(paginator.decode_cursor(cursor)[1],
+                                    reverse=False))
+        sql = str(queryset.query)
+        self.assertNotIn('OFFSET', sql)
+        self.assertIn('"date_start" <=', sql)
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(self.queryset, 10)
+        for cursor in ('x', 'WzFd', paginator.encode_cursor(
+                self.queryset.first(), 'x')):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+    def test_list_view(self):
+        self.client.login(**self.credentials)
+        url = reverse('work-experience-list')
+        resp = self.client.get(url)
+        page = resp.context['page_obj']
+        self.assertEqual(
+            self.get_ids(resp.context['work_experience_list']),
+            self.ids[:10])
+        self.assertContains(resp, '?cursor={}'.format(page.next_cursor()))
+
+        resp = self.client.get(url, {'cursor': page.next_cursor()})
+        self.assertEqual(
+            self.get_ids(resp.context['work_experience_list']),
+            self.ids[10:20])
+
+        # no OFFSET pagination
+        resp = self.client.get(url, {'page': 3})
+        self.assertEqual(
+            self.get_ids(resp.context['work_experience_list']),
+            self.ids[:10])
+
+        resp = self.client.get(url, {'cursor': 'x'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_public_list_view(self):
+        url = reverse('work-experience-public-list',
+                      kwargs={'username': self.user.email})
+        resp = self.client.get(url)
+        page = resp.context['page_obj']
+        resp = self.client.get(url, {'cursor': page.next_cursor()})
+        self.assertEqual(
+            self.get_ids(resp.context['work_experience_list']),
+            self.ids[10:20])
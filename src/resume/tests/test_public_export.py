@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from profile.models import Profile, ProfileTranslation
+
+from .. import public_export
+from ..models import ProjectTranslation, WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class PublicExportTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.alice = self.make_resume('alice@test.com')
+        # a private profile, and private rows of a public profile
+        self.make_resume('bob@test.com', profile_is_public=False)
+        self.factory.make_work_experience(user=self.alice, is_public=False)
+        self.factory.make_project(user=self.alice, is_public=False)
+
+    def make_resume(self, email, profile_is_public=True):
+        user = self.factory.make_user(email=email, full_name='Alice Smith')
+        Profile.objects.filter(user=user).update(
+            is_public=profile_is_public, city='Berlin',
+            github='https://github.com/alice')
+        ProfileTranslation.objects.create(
+            related_model=user.profile, language='en',
+            description='Python developer')
+        work_experience = self.factory.make_work_experience(
+            user=user, is_public=True, date_start=datetime.date(2017, 1, 1),
+            date_end=datetime.date(2017, 12, 31))
+        for language, position in (('en', 'Engineer'), ('zh-hans', '工程师')):
+            WorkExperienceTranslation.objects.create(
+                related_model=work_experience, language=language,
+                position=position, company='Acme', location='Berlin',
+                contribution='<p>Built <b>it</b></p>', keywords='python')
+        project = self.factory.make_project(
+            user=user, title='cv', is_public=True)
+        ProjectTranslation.objects.create(
+            related_model=project, language='en', title='cv',
+            description='A resume')
+        return user
+
+    def export(self, **kwargs):
+        return [json.loads(x) for x in public_export.export_lines(**kwargs)]
+
+    def test_ndjson(self):
+        document, = self.export(base_url='http://testserver')
+        self.assertEqual(document['url'],
+                         'http://testserver/profile/alice@test.com')
+        self.assertEqual(document['full_name'], 'Alice Smith')
+        self.assertEqual(document['links'],
+                         {'github': 'https://github.com/alice'})
+        self.assertEqual(document['description'], {'en': 'Python developer'})
+        work, = document['work']
+        self.assertEqual(work['date_start'], '2017-01-01')
+        self.assertEqual(work['translations']['en'], {
+            'position': 'Engineer', 'company': 'Acme', 'location': 'Berlin',
+            'contribution_html': '<p>Built <b>it</b></p>',
+            'keywords': 'python'})
+        self.assertEqual(work['translations']['zh-hans']['position'],
+                         '工程师')
+        project, = document['projects']
+        self.assertEqual(project['translations'],
+                         {'en': {'title': 'cv', 'description': 'A resume'}})
+
+    def test_json_resume(self):
+        document, = self.export(format='jsonresume', language='zh-hans')
+        self.assertEqual(document['basics']['name'], 'Alice Smith')
+        self.assertEqual(document['basics']['label'], '工程师')
+        # no chinese description, falls back
+        self.assertEqual(document['basics']['summary'], 'Python developer')
+        self.assertEqual(document['basics']['profiles'], [
+            {'network': 'GitHub', 'url': 'https://github.com/alice'}])
+        self.assertEqual(document['work'], [{
+            'name': 'Acme', 'position': '工程师', 'location': 'Berlin',
+            'startDate': '2017-01-01', 'endDate': '2017-12-31',
+            'summary': 'Built it'}])
+        self.assertEqual(document['projects'], [
+            {'name': 'cv', 'description': 'A resume', 'url': ''}])
+
+    def test_queries_depend_on_the_chunks_only(self):
+        with CaptureQueriesContext(connection) as one_resume:
+            self.export(chunk_size=10)
+        for i in range(5):
+            self.make_resume('user{}@test.com'.format(i))
+        with CaptureQueriesContext(connection) as six_resumes:
+            self.assertEqual(len(self.export(chunk_size=10)), 6)
+        self.assertEqual(len(one_resume), len(six_resumes))
+
+        with CaptureQueriesContext(connection) as two_chunks:
+            self.export(chunk_size=3)
+        self.assertGreater(len(two_chunks), len(six_resumes))
+
+    def test_view_streams(self):
+        resp = self.client.get(reverse('public-resume-export'),
+                               {'format': 'jsonresume', 'language': 'en'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['basics']['label'], 'Engineer')
+
+    def test_view_invalid_parameters(self):
+        for params in ({'format': 'xml'}, {'language': 'fr'}):
+            resp = self.client.get(reverse('public-resume-export'), params)
+            self.assertEqual(resp.status_code, 400)
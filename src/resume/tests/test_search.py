@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class WorkExperienceSearchMixin(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+        self.public_experience = self.factory.make_work_experience(
+            user=self.user, is_public=True)
+        self.private_experience = self.factory.make_work_experience(
+            user=self.user, is_public=False)
+
+    def make_translation(self, work_experience, language='en', **kwargs):
+        values = {
+            'position': 'Engineer',
+            'company': 'Acme',
+            'location': 'Berlin',
+            'contribution': '',
+            'keywords': '',
+        }
+        values.update(kwargs)
+        return WorkExperienceTranslation.objects.create(
+            related_model=work_experience, language=language, **values)
+
+
+class WorkExperienceTranslationSearchTestCase(WorkExperienceSearchMixin):
+
+    def test_search_vector_is_built_on_save(self):
+        translation = self.make_translation(
+            self.public_experience, position='Python Developer')
+        translation.refresh_from_db()
+        self.assertIn("'python':1A", translation.search_vector)
+
+        translation.position = 'Rust Developer'
+        translation.save()
+        translation.refresh_from_db()
+        self.assertIn("'rust':1A", translation.search_vector)
+        self.assertNotIn('python', translation.search_vector)
+
+    def test_search_uses_the_language_configuration(self):
+        # 'english' stems the words, 'simple' does not
+        english = self.make_translation(
+            self.public_experience, position='Managing databases')
+        chinese = self.make_translation(
+            self.private_experience, language='zh-hans',
+            position='Managing databases')
+
+        result = WorkExperienceTranslation.objects.search('manage')
+        self.assertEqual(list(result), [english])
+
+        result = WorkExperienceTranslation.objects.search('managing')
+        self.assertEqual(set(result), {english, chinese})
+
+    def test_search_strips_the_html_of_contribution(self):
+        translation = self.make_translation(
+            self.public_experience,
+            contribution='<p class="kubernetes">Built the <b>pipeline</b></p>')
+
+        self.assertEqual(
+            list(WorkExperienceTranslation.objects.search('pipeline')),
+            [translation])
+        self.assertFalse(
+            WorkExperienceTranslation.objects.search('kubernetes').exists())
+
+    def test_search_ranks_the_position_above_the_contribution(self):
+        in_contribution = self.make_translation(
+            self.public_experience, contribution='<p>django</p>')
+        in_position = self.make_translation(
+            self.private_experience, position='Django developer')
+
+        result = WorkExperienceTranslation.objects.search('django')\
+            .order_by('-rank')
+        self.assertEqual(list(result), [in_position, in_contribution])
+
+    @override_settings(RESUME_SEARCH_CONFIGS={})
+    def test_search_without_configuration_uses_simple(self):
+        translation = self.make_translation(
+            self.public_experience, position='Managing databases')
+        self.assertFalse(
+            WorkExperienceTranslation.objects.search('manage').exists())
+        self.assertEqual(
+            list(WorkExperienceTranslation.objects.search('managing')),
+            [translation])
+
+    def test_search_uses_the_gin_index(self):
+        self.make_translation(self.public_experience)
+        queryset = WorkExperienceTranslation.objects.search('engineer')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute('SET enable_seqscan = on')
+        self.assertIn('resume_wet_search_vector_gin', plan)
+
+    def test_rebuild_search_vectors_command(self):
+        translation = self.make_translation(
+            self.public_experience, position='Python Developer')
+        WorkExperienceTranslation.objects.update(search_vector=None)
+
+        call_command('rebuild_search_vectors', '--missing-only',
+                     '--batch-size', '1', stdout=StringIO())
+
+        translation.refresh_from_db()
+        self.assertIn("'python':1A", translation.search_vector)
+
+
+class WorkExperienceSearchViewTestCase(WorkExperienceSearchMixin):
+
+    def test_view_returns_only_public_matches(self):
+        public = self.make_translation(self.public_experience)
+        self.make_translation(self.private_experience)
+
+        resp = self.client.get(
+            reverse('work-experience-search'), {'q': 'engineer'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'work_experience_search.html')
+        self.assertEqual(list(resp.context['translation_list']), [public])
+
+    def test_view_without_query_returns_nothing(self):
+        self.make_translation(self.public_experience)
+        resp = self.client.get(reverse('work-experience-search'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.context['translation_list']), [])
+
+    def test_view_paginated_by_10(self):
+        for i in range(12):
+            work_experience = self.factory.make_work_experience(
+                user=self.user, is_public=True)
+            self.make_translation(work_experience)
+
+        resp = self.client.get(
+            reverse('work-experience-search'), {'q': 'engineer'})
+        self.assertTrue(resp.context['is_paginated'])
+        self.assertEqual(len(resp.context['translation_list']), 10)
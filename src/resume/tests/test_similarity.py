@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import similarity
+from ..models import WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class TokenizeTestCase(TestCase):
+
+    def test_tokenize_words(self):
+        self.assertEqual(
+            similarity.tokenize('Built C++ and node.js APIs, in 2018; a CI.'),
+            ['built', 'c++', 'and', 'node.js', 'apis', 'in', 'ci'])
+
+    def test_tokenize_cjk_into_bigrams(self):
+        self.assertEqual(similarity.tokenize('软件工程 python'),
+                         ['软件', '件工', '工程', 'python'])
+
+
+class SimilarityIndexMixin(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(RESUME_SIMILARITY_DIR=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        similarity._loaded_indexes.clear()
+
+        self.alice = self.make_user('python django postgres web')
+        self.bob = self.make_user('python django web developer')
+        self.carol = self.make_user('pastry chef bakery')
+
+    def make_user(self, keywords, is_public=True, profile_is_public=True,
+                  language='en'):
+        user = self.factory.make_user(is_public=profile_is_public)
+        self.make_translation(user, keywords, is_public, language)
+        return user
+
+    def make_translation(self, user, keywords, is_public=True,
+                         language='en'):
+        work_experience = self.factory.make_work_experience(
+            user=user, is_public=is_public)
+        return WorkExperienceTranslation.objects.create(
+            related_model=work_experience, language=language,
+            position='', company='Acme', location='Berlin',
+            keywords=keywords)
+
+
+class SimilarityIndexTestCase(SimilarityIndexMixin):
+
+    def test_similar_users(self):
+        similarity.build_indexes()
+
+        result = similarity.similar_users(self.alice.pk)
+        self.assertEqual([x for x, _ in result], [self.bob.pk])
+        self.assertTrue(0 < result[0][1] < 1)
+        self.assertEqual(similarity.similar_users(self.carol.pk), [])
+
+    def test_private_users_are_not_indexed(self):
+        private_experience = self.make_user(
+            'python django postgres web', is_public=False)
+        private_profile = self.make_user(
+            'python django postgres web', profile_is_public=False)
+        similarity.build_indexes()
+
+        self.assertEqual(
+            [x for x, _ in similarity.similar_users(self.alice.pk)],
+            [self.bob.pk])
+        self.assertEqual(similarity.similar_users(private_experience.pk), [])
+        self.assertEqual(similarity.similar_users(private_profile.pk), [])
+
+    def test_index_is_memory_mapped(self):
+        similarity.build_indexes()
+        index = similarity.get_index('en')
+        for array in (index.matrix.data, index.matrix.indices,
+                      index.matrix.indptr, index.users):
+            self.assertFalse(array.flags.owndata)
+            self.assertFalse(array.flags.writeable)
+
+    def test_unchanged_users_are_not_tokenized_again(self):
+        similarity.build_indexes()
+        index = similarity.get_index('en')
+
+        with mock.patch.object(similarity, 'tokenize',
+                               wraps=similarity.tokenize) as tokenize:
+            self.assertEqual(similarity.build_indexes(),
+                             {'en': None, 'zh-hans': None})
+            self.assertEqual(tokenize.call_count, 0)
+
+            self.make_translation(self.carol, 'python django')
+            build_id = similarity.build_indexes()['en']
+            self.assertEqual(tokenize.call_count, 1)
+
+        self.assertNotEqual(build_id, index.build_id)
+        # the workers pick the new build
+        self.assertEqual(similarity.get_index('en').build_id, build_id)
+        self.assertEqual(
+            {x for x, _ in similarity.similar_users(self.alice.pk)},
+            {self.bob.pk, self.carol.pk})
+
+    def test_incremental_build_matches_full_build(self):
+        similarity.build_indexes()
+        self.make_translation(self.carol, 'python flask')
+        similarity.build_indexes()
+        incremental = similarity.similar_users(self.alice.pk)
+
+        similarity.build_indexes(full=True)
+        full = similarity.similar_users(self.alice.pk)
+        self.assertEqual([x for x, _ in incremental], [x for x, _ in full])
+        for (_, x), (_, y) in zip(incremental, full):
+            self.assertAlmostEqual(x, y, places=5)
+
+    def test_old_builds_are_removed(self):
+        for keywords in ('a1', 'a2', 'a3'):
+            self.make_translation(self.carol, keywords)
+            similarity.build_indexes()
+        # the 2 last builds and CURRENT
+        self.assertEqual(len(os.listdir(os.path.join(self.root, 'en'))), 3)
+
+    def test_build_similarity_index_command(self):
+        out = StringIO()
+        call_command('build_similarity_index', stdout=out)
+        self.assertIn('en: built', out.getvalue())
+        call_command('build_similarity_index', stdout=out)
+        self.assertIn('en: up to date', out.getvalue())
+
+
+class SimilarProfilesViewTestCase(SimilarityIndexMixin):
+
+    def test_view_returns_similar_public_users(self):
+        similarity.build_indexes()
+        resp = self.client.get(
+            reverse('similar-profiles', args=(self.alice.email,)))
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()['results']
+        self.assertEqual([x['full_name'] for x in results],
+                         [self.bob.get_full_name()])
+
+    def test_view_without_index(self):
+        resp = self.client.get(
+            reverse('similar-profiles', args=(self.alice.email,)))
+        self.assertEqual(resp.json(), {'results': []})
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import timeline
+from ..models import CareerTimeline, WorkExperience, WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+def day(value):
+    return datetime.date(*map(int, value.split('-')))
+
+
+TODAY = day('2018-12-31')
+
+
+class ComputeStatsTestCase(TestCase):
+
+    def compute(self, *rows):
+        return timeline.compute_stats(
+            [(i, day(start), end and day(end), company)
+             for i, (start, end, company) in enumerate(rows, 1)], TODAY)
+
+    def test_no_work_experience(self):
+        stats = self.compute()
+        self.assertEqual(stats['work_experience_count'], 0)
+        self.assertEqual(stats['total_days'], 0)
+        self.assertIsNone(stats['first_date'])
+        self.assertEqual(stats['gaps'], [])
+        self.assertEqual(stats['overlaps'], [])
+
+    def test_gaps_between_experiences(self):
+        stats = self.compute(('2018-03-01', '2018-03-31', 'B'),
+                             ('2018-01-01', '2018-01-31', 'A'))
+        self.assertEqual(stats['total_days'], 62)
+        self.assertEqual(stats['first_date'], '2018-01-01')
+        self.assertEqual(stats['gap_days'], 28)
+        self.assertEqual(stats['gaps'], [
+            {'start': '2018-02-01', 'end': '2018-02-28', 'days': 28}])
+        self.assertEqual(stats['overlap_days'], 0)
+
+    def test_overlapping_experiences(self):
+        stats = self.compute(('2018-01-01', '2018-01-31', 'A'),
+                             ('2018-01-21', '2018-02-09', 'B'),
+                             ('2018-01-26', '2018-01-30', 'C'))
+        self.assertEqual(stats['total_days'], 40)
+        self.assertEqual(stats['gap_days'], 0)
+        # from the 21st to the 31st, counted once
+        self.assertEqual(stats['overlap_days'], 11)
+        self.assertEqual(stats['overlaps'], [
+            {'work_experiences': [1, 2], 'days': 11},
+            {'work_experiences': [1, 3], 'days': 5},
+            {'work_experiences': [2, 3], 'days': 5}])
+
+    def test_adjacent_experiences_do_not_overlap(self):
+        stats = self.compute(('2018-01-01', '2018-01-31', 'A'),
+                             ('2018-02-01', '2018-02-28', 'B'))
+        self.assertEqual(stats['gap_days'], 0)
+        self.assertEqual(stats['overlap_days'], 0)
+        self.assertEqual(stats['overlaps'], [])
+
+    def test_ongoing_experience_ends_today(self):
+        stats = self.compute(('2018-12-01', None, 'A'))
+        self.assertTrue(stats['is_current'])
+        self.assertEqual(stats['total_days'], 31)
+
+    def test_companies_are_grouped_case_insensitively(self):
+        stats = self.compute(('2018-01-01', '2018-01-31', 'Acme'),
+                             ('2018-01-15', '2018-02-14', ' ACME'),
+                             ('2018-06-01', '2018-06-10', 'Other'))
+        self.assertEqual(stats['companies'], [
+            {'company': 'Acme', 'days': 45, 'work_experiences': [1, 2]},
+            {'company': 'Other', 'days': 10, 'work_experiences': [3]}])
+
+    def test_format_days(self):
+        self.assertEqual(timeline.format_days(0), '0 months')
+        self.assertEqual(timeline.format_days(31), '1 month')
+        self.assertEqual(timeline.format_days(365), '1 year')
+        self.assertEqual(timeline.format_days(800), '2 years 2 months')
+
+
+class CareerTimelineTestCase(TestCase):
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user()
+        self.public = self.factory.make_work_experience(
+            user=self.user, is_public=True, date_start=day('2017-01-01'),
+            date_end=day('2017-12-31'))
+        self.private = self.factory.make_work_experience(
+            user=self.user, date_start=day('2018-06-01'),
+            date_end=day('2018-06-30'))
+        WorkExperienceTranslation.objects.create(
+            related_model=self.public, language='en', position='Engineer',
+            company='Acme', location='Berlin')
+
+    def test_rebuild_career_timelines(self):
+        self.assertEqual(
+            timeline.rebuild_career_timelines([self.user.pk, 0], TODAY)[0]
+            .user_id, self.user.pk)
+
+        career_timeline = CareerTimeline.objects.get(user=self.user)
+        self.assertEqual(career_timeline.stats['computed_on'], '2018-12-31')
+        all_stats = career_timeline.get_stats(public_only=False)
+        self.assertEqual(all_stats['work_experience_count'], 2)
+        self.assertEqual(all_stats['gap_days'], 151)
+        public_stats = career_timeline.get_stats()
+        self.assertEqual(public_stats['work_experience_count'], 1)
+        self.assertEqual(public_stats['companies'], [
+            {'company': 'Acme', 'days': 365,
+             'work_experiences': [self.public.pk]}])
+
+    def test_get_career_stats_extends_ongoing_experiences(self):
+        WorkExperience.objects.filter(pk=self.public.pk).update(date_end=None)
+        timeline.rebuild_career_timelines([self.user.pk], TODAY)
+
+        stats = timeline.get_career_stats(
+            self.user, today=TODAY + datetime.timedelta(days=1))
+        self.assertEqual(stats['total_days'], 731)
+        self.assertEqual(stats['total'], '2 years')
+        # computed for the read only
+        self.assertEqual(CareerTimeline.objects.get(user=self.user)
+                         .stats['computed_on'], '2018-12-31')
+
+    def test_rebuild_career_timelines_upserts(self):
+        timeline.rebuild_career_timelines([self.user.pk], TODAY)
+        WorkExperience.objects.filter(pk=self.private.pk).delete()
+        timeline.rebuild_career_timelines([self.user.pk], TODAY)
+        career_timeline = CareerTimeline.objects.get(user=self.user)
+        self.assertEqual(career_timeline.get_stats(public_only=False)
+                         ['work_experience_count'], 1)
+
+    def test_get_career_stats_does_not_write(self):
+        stats = timeline.get_career_stats(self.user, today=TODAY)
+        self.assertEqual(stats['work_experience_count'], 1)
+        self.assertFalse(CareerTimeline.objects.exists())
+
+    def test_get_career_stats_without_public_experience(self):
+        WorkExperience.objects.filter(pk=self.public.pk).update(
+            is_public=False)
+        self.assertIsNone(timeline.get_career_stats(self.user))
+        self.assertEqual(timeline.get_career_stats(
+            self.user, public_only=False)['work_experience_count'], 2)
+
+    def test_rebuild_career_timelines_command(self):
+        self.factory.make_user()
+        out = StringIO()
+        call_command('rebuild_career_timelines', '--batch-size', '1',
+                     stdout=out)
+        self.assertIn('Done, 2 timelines computed.', out.getvalue())
+        self.assertEqual(CareerTimeline.objects.count(), 2)
+
+    def test_public_list_shows_the_public_stats(self):
+        resp = self.client.get(
+            reverse('work-experience-public-list', args=(self.user.email,)))
+        self.assertEqual(
+            resp.context['career_stats']['work_experience_count'], 1)
+        self.assertContains(resp, 'Acme: 1 year')
+
+
+class CareerTimelineSignalTestCase(TransactionTestCase):
+    factory = Factory()
+
+    def test_timeline_is_refreshed_on_commit(self):
+        user = self.factory.make_user()
+        work_experience = self.factory.make_work_experience(
+            user=user, date_start=day('2018-01-01'),
+            date_end=day('2018-01-31'))
+        stats = CareerTimeline.objects.get(user=user).get_stats(
+            public_only=False)
+        self.assertEqual(stats['total_days'], 31)
+
+        WorkExperienceTranslation.objects.create(
+            related_model=work_experience, language='en', position='',
+            company='Acme', location='')
+        stats = CareerTimeline.objects.get(user=user).get_stats(
+            public_only=False)
+        self.assertEqual(stats['companies'][0]['company'], 'Acme')
+
+        work_experience.delete()
+        stats = CareerTimeline.objects.get(user=user).get_stats(
+            public_only=False)
+        self.assertEqual(stats['work_experience_count'], 0)
+
+    def test_deleting_the_user_deletes_the_timeline(self):
+        user = self.factory.make_user()
+        self.factory.make_work_experience(user=user)
+        user.delete()
+        self.assertFalse(CareerTimeline.objects.exists())
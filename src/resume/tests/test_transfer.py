@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import transfer
+from ..models import WorkExperience, WorkExperienceTranslation
+
+from testings.factory import Factory
+
+
+class TransferMixin(TestCase):
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+    factory = Factory()
+
+    def setUp(self):
+        self.user = self.factory.make_user(**self.credentials)
+        self.work_experience = self.factory.make_work_experience(
+            user=self.user, is_public=True,
+            date_start=datetime.date(2017, 1, 1), date_end=None)
+        WorkExperience.objects.filter(pk=self.work_experience.pk)\
+            .update(date_end=None)
+        for language, position in (('en', 'Engineer'), ('zh-hans', '工程师')):
+            WorkExperienceTranslation.objects.create(
+                related_model=self.work_experience, language=language,
+                position=position, company='Acme', location='Berlin',
+                contribution='<p>Built <b>it</b></p>',
+                keywords='python, django')
+        self.empty = self.factory.make_work_experience(
+            user=self.user, date_start=datetime.date(2016, 1, 1),
+            date_end=datetime.date(2016, 12, 31))
+
+    def export(self, format='jsonl', **kwargs):
+        return ''.join(transfer.export_lines(
+            WorkExperience.objects.filter(user=self.user), format=format,
+            **kwargs))
+
+    def import_text(self, text, format='jsonl', **kwargs):
+        return transfer.import_records(transfer.read_records(
+            StringIO(text, newline=''), format=format), **kwargs)
+
+
+class ExportTestCase(TransferMixin):
+
+    def test_export_jsonl(self):
+        records = [json.loads(x) for x in self.export().splitlines()]
+        self.assertEqual([x['id'] for x in records],
+                         [self.work_experience.pk, self.empty.pk])
+        self.assertEqual(records[0]['user'], 'alice@test.com')
+        self.assertEqual(records[0]['date_end'], None)
+        self.assertEqual(
+            [(x['language'], x['position']) for x in
+             records[0]['translations']],
+            [('en', 'Engineer'), ('zh-hans', '工程师')])
+        self.assertEqual(records[1]['translations'], [])
+
+    def test_export_reads_in_batches(self):
+        with self.assertNumQueries(5):
+            self.assertEqual(len(self.export(batch_size=1).splitlines()), 2)
+
+    def test_export_csv(self):
+        lines = self.export('csv').splitlines()
+        self.assertEqual(lines[0], ','.join(transfer.CSV_COLUMNS))
+        # a row per translation, a row for the experience without any
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[3].startswith(
+            '{},alice@test.com,false,2016-01-01,2016-12-31,,'.format(
+                self.empty.pk)))
+
+
+class ImportTestCase(TransferMixin):
+
+    def test_import_for_another_user(self):
+        bob = self.factory.make_user()
+        stats = self.import_text(self.export(), user=bob)
+
+        self.assertEqual(stats['work_experiences']['created'], 2)
+        self.assertEqual(stats['translations']['created'], 2)
+        copy = WorkExperience.objects.get(user=bob, is_public=True)
+        self.assertNotEqual(copy.pk, self.work_experience.pk)
+        self.assertIsNone(copy.date_end)
+        translation = copy.translations.get(language='en')
+        self.assertEqual(translation.contribution_html,
+                         '<p>Built <b>it</b></p>')
+        self.assertEqual(sorted(translation.tags.values_list(
+            'name', flat=True)), ['django', 'python'])
+        self.assertIsNotNone(translation.search_vector)
+        self.assertEqual(copy.translations_snapshot['en']['company'], 'Acme')
+        self.assertEqual(bob.career_timeline.get_stats()[
+            'work_experience_count'], 1)
+
+    def test_import_upserts(self):
+        records = [json.loads(x) for x in self.export().splitlines()]
+        records[0]['is_public'] = False
+        records[0]['translations'][0]['contribution'] = '<p>New</p>'
+        text = ''.join(transfer.iter_jsonl(records))
+        self.work_experience.translations.filter(language='zh-hans').delete()
+
+        stats = self.import_text(text)
+        self.assertEqual(dict(stats['work_experiences']),
+                         {'updated': 1, 'unchanged': 1})
+        self.assertEqual(dict(stats['translations']),
+                         {'created': 1, 'updated': 1})
+        self.assertEqual(WorkExperience.objects.count(), 2)
+        self.work_experience.refresh_from_db()
+        self.assertFalse(self.work_experience.is_public)
+        self.assertEqual(
+            self.work_experience.translations_snapshot['en'][
+                'contribution_html'], '<p>New</p>')
+
+        stats = self.import_text(text)
+        self.assertEqual(dict(stats['translations']), {'unchanged': 2})
+
+    def test_import_updates_a_batch_with_one_statement(self):
+        WorkExperienceTranslation.objects.create(
+            related_model=self.empty, language='en', position='Dev',
+            company='Initech', location='Berlin')
+        records = [json.loads(x) for x in self.export().splitlines()]
+        for record in records:
+            record['is_public'] = not record['is_public']
+            for translation in record['translations']:
+                translation['location'] = 'Paris'
+        text = ''.join(transfer.iter_jsonl(records))
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = self.import_text(text)
+        self.assertEqual(dict(stats['work_experiences']), {'updated': 2})
+        self.assertEqual(dict(stats['translations']), {'updated': 3})
+        for model in (WorkExperience, WorkExperienceTranslation):
+            updates = [x['sql'] for x in queries.captured_queries
+                       if x['sql'].startswith('UPDATE "{}" SET "{}"'.format(
+                           model._meta.db_table,
+                           'is_public' if model is WorkExperience
+                           else 'location'))]
+            self.assertEqual(len(updates), 1, model)
+        self.assertEqual(
+            WorkExperienceTranslation.objects.filter(location='Paris')
+            .count(), 3)
+        self.assertEqual(
+            WorkExperience.objects.filter(is_public=True).get(),
+            self.empty)
+
+    def test_import_csv(self):
+        text = self.export('csv')
+        WorkExperienceTranslation.objects.filter(language='en')\
+            .update(position='Manager')
+
+        stats = self.import_text(text, format='csv')
+        self.assertEqual(dict(stats['work_experiences']), {'unchanged': 2})
+        self.assertEqual(dict(stats['translations']),
+                         {'updated': 1, 'unchanged': 1})
+        self.assertEqual(self.work_experience.translations.get(
+            language='en').position, 'Engineer')
+
+    def test_import_csv_rows_without_id(self):
+        header = ','.join(transfer.CSV_COLUMNS)
+        rows = [',alice@test.com,false,2015-01-01,,en,Dev,{},Paris,,'.format(
+            company) for company in ('Acme', 'Initech')]
+        stats = self.import_text('\n'.join([header] + rows), format='csv',
+                                 user=self.user)
+        self.assertEqual(dict(stats['work_experiences']), {'created': 2})
+        self.assertEqual(
+            sorted(WorkExperienceTranslation.objects
+                   .filter(related_model__date_start='2015-01-01')
+                   .values_list('company', flat=True)), ['Acme', 'Initech'])
+
+    def test_invalid_csv(self):
+        header = ','.join(transfer.CSV_COLUMNS)
+        with self.assertRaisesMessage(transfer.TransferError,
+                                      'after line 1: line contains NUL'):
+            self.import_text(header + '\n"a\0b",', format='csv')
+
+    def test_import_is_one_transaction(self):
+        text = self.export() + '{"date_start": "x"}\n'
+        WorkExperience.objects.all().delete()
+        with self.assertRaisesMessage(transfer.TransferError, 'line 3: '):
+            self.import_text(text, batch_size=1)
+        self.assertFalse(WorkExperience.objects.exists())
+
+    def test_import_keeps_the_free_ids(self):
+        text = self.export()
+        WorkExperience.objects.all().delete()
+
+        self.import_text(text, keep_ids=True)
+        self.assertEqual(
+            set(WorkExperience.objects.values_list('pk', flat=True)),
+            {self.work_experience.pk, self.empty.pk})
+        # the sequence continues after the imported ids
+        self.assertGreater(
+            self.factory.make_work_experience(user=self.user).pk,
+            self.empty.pk)
+
+    def test_import_ids_of_another_user_are_not_updated(self):
+        bob = self.factory.make_user()
+        self.import_text(self.export(), user=bob, keep_ids=True)
+        self.assertEqual(WorkExperience.objects.filter(user=bob).count(), 2)
+        self.assertEqual(
+            WorkExperience.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_records(self):
+        for line, error in (
+                ('{"date_start": "2018-01-01", "user": "x@test.com"}',
+                 "line 2: unknown user 'x@test.com'"),
+                ('{"date_start": "2018-13-01"}',
+                 "line 2: invalid date_start '2018-13-01'"),
+                ('{"date_start": "2018-01-01", "translations": '
+                 '[{"language": "fr"}]}', "line 2: unknown language 'fr'"),
+                ('{"date_start": ', 'line 2: Expecting value')):
+            with self.assertRaisesMessage(transfer.TransferError, error):
+                self.import_text('\n' + line)
+        self.assertEqual(WorkExperience.objects.count(), 2)
+
+
+class TransferViewTestCase(TransferMixin):
+
+    def test_export_requires_login(self):
+        resp = self.client.get(reverse('work-experience-export'))
+        self.assertEqual(resp.status_code, 302)
+
+    def test_export_streams_the_user_data(self):
+        self.factory.make_work_experience()
+        self.client.login(**self.credentials)
+        resp = self.client.get(reverse('work-experience-export'),
+                               {'format': 'csv'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(resp.streaming_content).decode('utf-8')
+        self.assertEqual(content, self.export('csv'))
+
+        resp = self.client.get(reverse('work-experience-export'),
+                               {'format': 'xml'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_import(self):
+        bob = self.factory.make_user(email='bob@test.com', password='abc')
+        self.client.login(email='bob@test.com', password='abc')
+        upload = SimpleUploadedFile(
+            'work-experiences.csv', self.export('csv').encode('utf-8'))
+        resp = self.client.post(reverse('work-experience-import'),
+                                {'file': upload})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['translations'], {'created': 2})
+        self.assertEqual(WorkExperience.objects.filter(user=bob).count(), 2)
+
+    def test_import_invalid_file(self):
+        self.client.login(**self.credentials)
+        upload = SimpleUploadedFile('work-experiences.jsonl', b'{"id": 1}')
+        resp = self.client.post(reverse('work-experience-import'),
+                                {'file': upload})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json(),
+                         {'error': 'line 1: date_start is required'})
+
+        upload = SimpleUploadedFile(
+            'work-experiences.csv',
+            (','.join(transfer.CSV_COLUMNS) + '\n"a\0b",').encode())
+        resp = self.client.post(reverse('work-experience-import'),
+                                {'file': upload})
+        self.assertEqual(resp.status_code, 400)
+
+
+class TransferCommandTestCase(TransferMixin):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_export_and_import(self):
+        path = os.path.join(self.directory, 'export.csv')
+        call_command('export_work_experiences', '--output', path,
+                     '--user', 'alice@test.com', stderr=StringIO())
+        with open(path, encoding='utf-8', newline='') as f:
+            self.assertEqual(f.read(), self.export('csv'))
+
+        bob = self.factory.make_user()
+        out = StringIO()
+        call_command('import_work_experiences', path, '--user', bob.email,
+                     '--batch-size', '1', stdout=out)
+        self.assertIn('translations: 2 created, 0 updated, 0 unchanged',
+                      out.getvalue())
+        self.assertEqual(WorkExperience.objects.filter(user=bob).count(), 2)
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_work_experiences', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+    def test_import_errors(self):
+        path = os.path.join(self.directory, 'export.jsonl')
+        with open(path, 'w') as f:
+            f.write('[]\n')
+        with self.assertRaisesMessage(
+                CommandError, 'line 1: a record should be an object'):
+            call_command('import_work_experiences', path)
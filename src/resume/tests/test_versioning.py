@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import WorkExperience, WorkExperienceTranslation
+from ..versioning import VersionConflict
+
+from testings.factory import Factory
+
+
+class VersioningTestCase(TestCase):
+    factory = Factory()
+    credentials = {
+        'email': 'alice@test.com',
+        'password': 'abc123',
+    }
+
+    def setUp(self):
+        self.user = self.factory.make_user(**self.credentials)
+        self.client.login(**self.credentials)
+        self.work_experience = self.factory.make_work_experience(
+            user=self.user, date_start=datetime.date(2016, 1, 1),
+            date_end=datetime.date(2017, 1, 1))
+        self.translation = WorkExperienceTranslation.objects.create(
+            related_model=self.work_experience, language='en',
+            position='Engineer', company='Acme', location='Berlin')
+
+    def test_conditional_update(self):
+        first = WorkExperienceTranslation.objects.get(pk=self.translation.pk)
+        second = WorkExperienceTranslation.objects.get(pk=self.translation.pk)
+        self.assertEqual(first.version, 1)
+
+        first.position = 'Lead'
+        with CaptureQueriesContext(connection) as queries:
+            first.save(update_fields=['position'])
+        self.assertEqual(first.version, 2)
+        update, = [x['sql'] for x in queries.captured_queries
+                   if x['sql'].startswith('UPDATE') and 'version' in x['sql']]
+        self.assertIn('"version" = 1', update)
+
+        second.company = 'Initech'
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            second.save()
+        self.translation.refresh_from_db()
+        self.assertEqual((self.translation.position,
+                          self.translation.company, self.translation.version),
+                         ('Lead', 'Acme', 2))
+
+    def test_new_object_with_a_primary_key(self):
+        work_experience = WorkExperience(
+            pk=self.work_experience.pk + 100, user=self.user,
+            date_start=datetime.date(2018, 1, 1))
+        work_experience.save()
+        self.assertEqual(work_experience.version, 1)
+        work_experience.is_public = True
+        work_experience.save()
+        self.assertEqual(work_experience.version, 2)
+
+    def test_save_without_changes_keeps_the_version(self):
+        work_experience = WorkExperience.objects.get(
+            pk=self.work_experience.pk)
+        work_experience.save()
+        work_experience.refresh_from_db()
+        self.assertEqual(work_experience.version, 1)
+
+        # checked all the same
+        WorkExperience.objects.filter(pk=work_experience.pk)\
+            .update(version=2)
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            work_experience.save()
+
+    def test_save_of_a_deleted_row_inserts_it(self):
+        work_experience = WorkExperience.objects.get(
+            pk=self.work_experience.pk)
+        work_experience.date_end = datetime.date(2018, 1, 1)
+        WorkExperience.objects.filter(pk=work_experience.pk).delete()
+        work_experience.save()
+        self.assertEqual(
+            WorkExperience.objects.get(pk=work_experience.pk).date_end,
+            datetime.date(2018, 1, 1))
+
+    def post_update(self, version, **changes):
+        data = {
+            'language': 'en', 'position': 'Engineer', 'company': 'Acme',
+            'location': 'Berlin', 'contribution': '', 'keywords': '',
+            'date_start': '2016-01-01', 'date_end': '2017-01-01',
+            'version': version,
+        }
+        data.update(changes)
+        return self.client.post(
+            reverse('work-experience-translation-update',
+                    args=(self.translation.pk,)), data)
+
+    def test_update_view_reports_the_conflicts(self):
+        # saved meanwhile in another tab
+        self.translation.position = 'Lead'
+        self.translation.save()
+
+        resp = self.post_update(1, position='Engineer II', company='Initech')
+        self.assertEqual(resp.status_code, 200)
+        form = resp.context['form']
+        self.assertEqual(form.errors['position'],
+                         ['Saved meanwhile as: Lead'])
+        self.assertEqual(form.errors['company'], ['Saved meanwhile as: Acme'])
+        self.assertNotIn('location', form.errors)
+        self.assertIn('changed meanwhile', form.non_field_errors()[0])
+        self.assertEqual(form['version'].value(), 2)
+        self.translation.refresh_from_db()
+        self.assertEqual(self.translation.company, 'Acme')
+
+        # posted again from the updated form
+        resp = self.post_update(2, position='Engineer II', company='Initech')
+        self.assertEqual(resp.status_code, 302)
+        self.translation.refresh_from_db()
+        self.assertEqual(
+            (self.translation.position, self.translation.company,
+             self.translation.version), ('Engineer II', 'Initech', 3))
+
+    def test_update_view_checks_the_version_of_the_dates(self):
+        resp = self.client.get(reverse('work-experience-translation-update',
+                                       args=(self.translation.pk,)))
+        self.assertEqual(resp.context['form']['work_experience_version']
+                         .value(), 1)
+        # the dates saved meanwhile in the editor
+        self.work_experience.date_end = datetime.date(2018, 1, 1)
+        self.work_experience.save()
+
+        resp = self.post_update(1, position='Lead', work_experience_version=1)
+        self.assertEqual(resp.status_code, 200)
+        form = resp.context['form']
+        self.assertEqual(form.errors['date_end'],
+                         ['Saved meanwhile as: 2018-01-01'])
+        self.assertEqual(form['work_experience_version'].value(), 2)
+        self.work_experience.refresh_from_db()
+        self.assertEqual(self.work_experience.date_end,
+                         datetime.date(2018, 1, 1))
+        self.translation.refresh_from_db()
+        self.assertEqual(self.translation.position, 'Engineer')
+
+        # posted again from the updated form
+        resp = self.post_update(1, position='Lead', work_experience_version=2)
+        self.assertEqual(resp.status_code, 302)
+        self.work_experience.refresh_from_db()
+        self.assertEqual(
+            (self.work_experience.date_end, self.work_experience.version),
+            (datetime.date(2017, 1, 1), 3))
+        self.translation.refresh_from_db()
+        self.assertEqual(self.translation.position, 'Lead')
+
+    def test_editor_saves_nothing_on_conflict(self):
+        url = reverse('work-experience-edit', args=(self.work_experience.pk,))
+        data = {
+            'work_experience-date_start': '2016-01-01',
+            'work_experience-date_end': '2018-01-01',
+            'work_experience-version': 1,
+            'translations-TOTAL_FORMS': 2,
+            'translations-INITIAL_FORMS': 1,
+            'translations-MIN_NUM_FORMS': 0,
+            'translations-MAX_NUM_FORMS': 1000,
+            'translations-0-id': self.translation.pk,
+            'translations-0-related_model': self.work_experience.pk,
+            'translations-0-position': 'Lead',
+            'translations-0-company': 'Acme',
+            'translations-0-location': 'Berlin',
+            'translations-0-version': 1,
+            'translations-1-related_model': self.work_experience.pk,
+        }
+        WorkExperienceTranslation.objects.filter(pk=self.translation.pk)\
+            .update(location='Paris', version=2)
+
+        resp = self.client.post(url, data)
+        self.assertEqual(resp.status_code, 200)
+        translation_form = resp.context['formset'][0]
+        self.assertEqual(translation_form.errors['location'],
+                         ['Saved meanwhile as: Paris'])
+        self.assertEqual(translation_form.errors['position'],
+                         ['Saved meanwhile as: Engineer'])
+        self.assertFalse(resp.context['form'].errors)
+        self.work_experience.refresh_from_db()
+        self.assertEqual(self.work_experience.date_end,
+                         datetime.date(2017, 1, 1))
+        self.assertEqual(self.work_experience.version, 1)
+
+    def test_admin_form(self):
+        admin = self.factory.make_user(is_admin=True)
+        self.client.force_login(admin)
+        resp = self.client.get(reverse(
+            'admin:resume_workexperience_change',
+            args=(self.work_experience.pk,)))
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'name="version"')
+        self.assertContains(resp, 'name="translations-0-version"')
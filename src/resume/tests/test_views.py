@@ -2,7 +2,9 @@
 
 import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -87,6 +89,28 @@ class WorkExperiencePublicListViewTestCase(WorkExperienceMixin):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(len(resp.context['object_list']), 2)
 
+    def test_public_list_view_queries_do_not_grow_with_rows(self):
+        url = reverse('work-experience-public-list', kwargs={
+            'username': self.user.email})
+        experiences = WorkExperience.objects.filter(user=self.user)
+
+        experiences.filter(
+            id__in=experiences.values_list('id', flat=True)[:2])\
+            .update(is_public=True)
+        # a first view, so both measured views start from the same state
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as two_rows:
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context['object_list']), 2)
+
+        experiences.update(is_public=True)
+        with CaptureQueriesContext(connection) as ten_rows:
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context['object_list']), 10)
+
+        self.assertEqual(len(two_rows), len(ten_rows))
+        self.assertContains(resp, resp.context['object_list'][0].company)
+
 
 class WorkExperienceTranslationListTestCase(TestCase):
     credentials = {
@@ -305,6 +329,54 @@ class WorkExperienceTranslationUpdateViewTestCase(TestCase):
             resp, reverse('work-experience-translation-list',
                           args=(self.work_experience.id,)))
 
+    def _post_unchanged(self, **changes):
+        data = {
+            'language': self.translation.language,
+            'position': self.translation.position,
+            'company': self.translation.company,
+            'location': self.translation.location,
+            'contribution': self.translation.contribution,
+            'keywords': self.translation.keywords,
+            'date_start': self.work_experience.date_start,
+            'date_end': self.work_experience.date_end,
+        }
+        data.update(changes)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(self._url, data)
+        self.assertEqual(302, resp.status_code)
+        return [x['sql'] for x in queries.captured_queries
+                if x['sql'].startswith('UPDATE')]
+
+    def test_post_unchanged_form_writes_nothing(self):
+        self.client.login(**self.credentials)
+        self.assertEqual(self._post_unchanged(), [])
+
+    def test_post_writes_the_changed_fields_only(self):
+        self.client.login(**self.credentials)
+        updates = self._post_unchanged(
+            position='new position',
+            date_start=self.work_experience.date_start - datetime.timedelta(
+                days=1))
+
+        work_experience_update, = [
+            x for x in updates
+            if x.startswith('UPDATE "resume_workexperience" SET "date_')]
+        self.assertIn('"date_start"', work_experience_update)
+        self.assertNotIn('"date_end"', work_experience_update)
+        self.assertNotIn('"is_public"', work_experience_update)
+        translation_update = [
+            x for x in updates
+            if x.startswith('UPDATE "resume_workexperiencetranslation" SET '
+                            '"position"')]
+        self.assertEqual(len(translation_update), 1)
+        self.assertNotIn('"company"', translation_update[0])
+
+        self.translation.refresh_from_db()
+        self.assertEqual(self.translation.position, 'new position')
+        self.assertEqual(self.translation.related_model.date_start,
+                         self.work_experience.date_start -
+                         datetime.timedelta(days=1))
+
 
 class PublicWorkExperienceTestCase(WorkExperienceMixin):
     def setUp(self):
@@ -360,6 +432,77 @@ class PublicWorkExperienceTestCase(WorkExperienceMixin):
         # Now we expect nothing display on the public list page
         self.assertEqual(len(resp.context['object_list']), 0)
 
+    def test_switching_public_status_is_one_statement(self):
+        self.client.login(**self.credentials)
+        with CaptureQueriesContext(connection) as queries:
+            self._change_public_status_for_work_experience(
+                self.public_experience_id)
+        updates = [x['sql'] for x in queries.captured_queries
+                   if x['sql'].startswith('UPDATE "resume_workexperience"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"is_public" = NOT "resume_workexperience"."is_public"',
+                      updates[0])
+        self.assertFalse([x for x in queries.captured_queries if x['sql']
+                          .startswith('SELECT "resume_workexperience"')])
+        self.public_experience.refresh_from_db()
+        self.assertTrue(self.public_experience.is_public)
+        self.assertEqual(self.public_experience.version, 2)
+
+    def test_switching_public_status_of_another_user(self):
+        self.client.login(**self.credentials)
+        work_experience = self.factory.make_work_experience()
+        resp = self._change_public_status_for_work_experience(
+            work_experience.id)
+        self.assertEqual(resp.status_code, 404)
+        work_experience.refresh_from_db()
+        self.assertFalse(work_experience.is_public)
+
+
+class WorkExperienceBulkPublicViewTestCase(WorkExperienceMixin):
+    element_number = 3
+
+    def setUp(self):
+        super().setUp()
+        self._url = reverse('work-experience-bulk-public')
+        self.ids = list(WorkExperience.objects.filter(user=self.user)
+                        .order_by('id').values_list('id', flat=True))
+        self.other = self.factory.make_work_experience()
+
+    def _post(self, ids, is_public):
+        return self.client.post(self._url, {
+            'ids': ','.join(str(x) for x in ids), 'is_public': is_public})
+
+    def test_without_auth(self):
+        resp = self._post(self.ids, '1')
+        self.assertEqual(resp.status_code, 302)
+        self.assertFalse(WorkExperience.objects.filter(is_public=True))
+
+    def test_publish_and_unpublish(self):
+        self._login()
+        WorkExperience.objects.filter(pk=self.ids[0]).update(is_public=True)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self._post(self.ids + [self.other.id], '1')
+        self.assertEqual(resp.json(), {
+            'is_public': True, 'updated': 2, 'forbidden': [self.other.id]})
+        self.assertEqual(len([x for x in queries.captured_queries
+                              if x['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(
+            set(WorkExperience.objects.filter(is_public=True)
+                .values_list('id', flat=True)), set(self.ids))
+
+        resp = self._post(self.ids[:2], '0')
+        self.assertEqual(resp.json(), {
+            'is_public': False, 'updated': 2, 'forbidden': []})
+        self.assertEqual(
+            list(WorkExperience.objects.filter(is_public=True)
+                 .values_list('id', flat=True)), self.ids[2:])
+
+    def test_invalid_parameters(self):
+        self._login()
+        for ids, is_public in ((self.ids, 'yes'), (['x'], '1')):
+            resp = self._post(ids, is_public)
+            self.assertEqual(resp.status_code, 400)
+
 
 class WorkExperienceDeleteViewTestCase(WorkExperienceMixin):
     factory = Factory()
@@ -416,7 +559,7 @@ class WorkExperienceBatchDeleteViewTestCase(WorkExperienceMixin):
     def test_batch_delete_experience_with_auth(self):
         self._login()
 
-        qs = WorkExperience.objects.filter(user=self.user)[:3]
+        qs = WorkExperience.objects.filter(user=self.user).order_by('pk')[:3]
         ids = list(qs.values_list('id', flat=True))
 
         to_be_deleted_ids = {
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+"""Career timeline statistics of the users.
+
+The statistics are computed from the date ranges of the work experiences
+with vectorized interval arithmetic, a date range being the half-open
+interval `[date_start, date_end + 1 day)` of the date ordinals, an ongoing
+experience ending today. They are stored in `CareerTimeline.stats`, for all
+the experiences of the user and for the public ones only:
+
+    {'all': {...}, 'public': {...}, 'computed_on': '2018-10-31'}
+
+and refreshed after each write of a work experience or of a translation
+(the company names), or in bulk by the `rebuild_career_timelines` command,
+e.g. daily to extend the ongoing experiences.
+"""
+
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone, translation
+from django.utils.translation import ngettext
+
+from resume.models import CareerTimeline, WorkExperience
+from resume.multilingual import TranslationLoader
+
+
+User = get_user_model()
+
+
+def _to_date(ordinal):
+    return datetime.date.fromordinal(int(ordinal)).isoformat()
+
+
+def merge_intervals(starts, ends):
+    """Return the `(starts, ends)` of the union of the half-open intervals,
+    sorted and disjoint."""
+    if not len(starts):
+        return starts, ends
+    order = np.argsort(starts, kind='mergesort')
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # an interval opens a new block when it starts after all the previous
+    # intervals ended
+    is_first = np.empty(len(starts), dtype=bool)
+    is_first[0] = True
+    is_first[1:] = starts[1:] > reach[:-1]
+    block_ends = np.append(reach[np.flatnonzero(is_first)[1:] - 1], reach[-1])
+    return starts[is_first], block_ends
+
+
+def covered_days(starts, ends, min_depth):
+    """Return the number of days covered by at least `min_depth` of the
+    intervals."""
+    if not len(starts):
+        return 0
+    points = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64),
+                             -np.ones(len(ends), dtype=np.int64)])
+    # the ends come before the starts on the same day, the intervals are
+    # half-open
+    order = np.lexsort((deltas, points))
+    points, depth = points[order], np.cumsum(deltas[order])
+    lengths = np.diff(points)
+    return int(lengths[depth[:-1] >= min_depth].sum())
+
+
+def compute_stats(work_experiences, today):
+    """Return the statistics of the `(id, date_start, date_end, company)`
+    work experiences."""
+    ids = np.array([x[0] for x in work_experiences], dtype=np.int64)
+    starts = np.array([x[1].toordinal() for x in work_experiences],
+                      dtype=np.int64)
+    ends = np.array([(x[2] or today).toordinal() + 1
+                     for x in work_experiences], dtype=np.int64)
+    ends = np.maximum(ends, starts)
+
+    block_starts, block_ends = merge_intervals(starts, ends)
+    gap_starts, gap_ends = block_ends[:-1], block_starts[1:]
+
+    # the pairwise overlaps, from the upper triangle of the n x n matrix
+    first, second = np.triu_indices(len(ids), k=1)
+    overlaps = np.minimum(ends[first], ends[second]) - \
+        np.maximum(starts[first], starts[second])
+    overlapping = np.flatnonzero(overlaps > 0)
+
+    companies = {}
+    for index, work_experience in enumerate(work_experiences):
+        company = (work_experience[3] or '').strip()
+        key = company.casefold()
+        companies.setdefault(key, (company, []))[1].append(index)
+    company_stats = []
+    for company, indexes in companies.values():
+        company_starts, company_ends = merge_intervals(
+            starts[indexes], ends[indexes])
+        company_stats.append({
+            'company': company,
+            'days': int((company_ends - company_starts).sum()),
+            'work_experiences': ids[indexes].tolist(),
+        })
+    company_stats.sort(key=lambda x: (-x['days'], x['company']))
+
+    return {
+        'work_experience_count': len(ids),
+        'total_days': int((block_ends - block_starts).sum()),
+        'first_date': _to_date(starts.min()) if len(ids) else None,
+        'is_current': any(x[2] is None for x in work_experiences),
+        'gap_days': int((gap_ends - gap_starts).sum()),
+        'gaps': [{'start': _to_date(start), 'end': _to_date(end - 1),
+                  'days': int(end - start)}
+                 for start, end in zip(gap_starts, gap_ends)],
+        'overlap_days': covered_days(starts, ends, 2),
+        'overlaps': [{'work_experiences': [int(ids[first[x]]),
+                                           int(ids[second[x]])],
+                      'days': int(overlaps[x])} for x in overlapping],
+        'companies': company_stats,
+    }
+
+
+UPSERT_SQL = """
+INSERT INTO resume_careertimeline (user_id, stats, updated_at)
+VALUES {}
+ON CONFLICT (user_id) DO UPDATE
+SET stats = EXCLUDED.stats, updated_at = EXCLUDED.updated_at
+"""
+
+
+def compute_career_timelines(user_ids, today=None):
+    """Return the unsaved timelines of the users, computed with one query
+    for their work experiences and one for their translations if needed."""
+    today = today or timezone.now().date()
+    user_ids = set(User.objects.filter(pk__in=user_ids)
+                   .values_list('pk', flat=True))
+    if not user_ids:
+        return []
+
+    work_experiences = list(WorkExperience.objects
+                            .filter(user_id__in=user_ids)
+                            .order_by('date_start', 'id'))
+    TranslationLoader().add_all(work_experiences).load()
+
+    rows = {x: {'all': [], 'public': []} for x in user_ids}
+    # the company names are grouped in the default language
+    with translation.override(settings.LANGUAGE_CODE):
+        for work_experience in work_experiences:
+            row = (work_experience.id, work_experience.date_start,
+                   work_experience.date_end, work_experience.company)
+            rows[work_experience.user_id]['all'].append(row)
+            if work_experience.is_public:
+                rows[work_experience.user_id]['public'].append(row)
+
+    now = timezone.now()
+    return [
+        CareerTimeline(user_id=user_id, updated_at=now, stats={
+            'all': compute_stats(user_rows['all'], today),
+            'public': compute_stats(user_rows['public'], today),
+            'computed_on': today.isoformat(),
+        }) for user_id, user_rows in rows.items()]
+
+
+def rebuild_career_timelines(user_ids, today=None):
+    """Compute and store the timelines of the users, see
+    `compute_career_timelines`.
+
+    They are upserted with one `INSERT ... ON CONFLICT DO UPDATE`, so
+    concurrent rebuilds for the same user do not conflict, the last one
+    wins."""
+    timelines = compute_career_timelines(user_ids, today=today)
+    if not timelines:
+        return timelines
+    stats_field = CareerTimeline._meta.get_field('stats')
+    updated_at_field = CareerTimeline._meta.get_field('updated_at')
+    params = []
+    for timeline in timelines:
+        params.extend([
+            timeline.user_id,
+            stats_field.get_db_prep_save(timeline.stats, connection),
+            updated_at_field.get_db_prep_save(timeline.updated_at,
+                                              connection),
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(
+            ', '.join(['(%s, %s, %s)'] * len(timelines))), params)
+    return timelines
+
+
+def format_days(days):
+    """Return e.g. '2 years 3 months' for a number of days."""
+    months = int(round(days / 30.4375))
+    years, months = divmod(months, 12)
+    parts = []
+    if years:
+        parts.append(ngettext('%d year', '%d years', years) % years)
+    if months or not years:
+        parts.append(ngettext('%d month', '%d months', months) % months)
+    return ' '.join(parts)
+
+
+def get_career_stats(user, public_only=True, today=None):
+    """Return the stored statistics of `user` with their durations
+    formatted. They are computed, and not stored, if the user has no
+    timeline yet or if an ongoing experience was last extended before
+    `today`: the reads do not write, the timelines are stored by the
+    writes of the work experiences and the `rebuild_career_timelines`
+    command."""
+    today = today or timezone.now().date()
+    try:
+        timeline = CareerTimeline.objects.get(user=user)
+    except CareerTimeline.DoesNotExist:
+        timeline = None
+    if timeline is None or (
+            timeline.get_stats(public_only=False).get('is_current') and
+            timeline.stats.get('computed_on') != today.isoformat()):
+        timeline = compute_career_timelines([user.pk], today=today)[0]
+
+    stats = dict(timeline.get_stats(public_only=public_only))
+    if not stats.get('work_experience_count'):
+        return None
+    stats.update({
+        'total': format_days(stats['total_days']),
+        'gap': format_days(stats['gap_days']),
+        'overlap': format_days(stats['overlap_days']),
+        'companies': [dict(x, duration=format_days(x['days']))
+                      for x in stats['companies']],
+    })
+    return stats
+
+
+def post_change_work_experience_handler(sender, instance, **kwargs):
+    """Refresh the career timeline of the owner once the transaction
+    writing the work experience, or one of its translations, commits."""
+    if sender is WorkExperience:
+        user_id = instance.user_id
+    else:
+        user_id = WorkExperience.objects.filter(
+            pk=instance.related_model_id).values_list(
+            'user_id', flat=True).first()
+    if user_id is not None:
+        transaction.on_commit(lambda: rebuild_career_timelines([user_id]))
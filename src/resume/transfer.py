@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+"""Bulk export and import of the work experiences with their translations.
+
+A work experience is exported as one JSON object per line::
+
+    {"id": 1, "user": "alice@example.com", "is_public": true,
+     "date_start": "2017-01-01", "date_end": null,
+     "translations": [{"language": "en", "position": "...", ...}]}
+
+or as CSV rows, one per translation, the work experience columns repeated
+on each row. The rows are read in keyset batches, so an export never holds
+more than a batch in memory.
+
+An import reads the records a batch at a time and upserts them, all the
+batches in one transaction: a work experience is updated when its `id` belongs
+to the same user, else it is created, and a translation is updated when its
+`(related_model, language)` exists, else it is created. The new rows are
+inserted with `bulk_create`, the changed ones with one UPDATE per table,
+see `resume.bulk`, and the search vectors, the keyword index and the
+translation snapshots are then refreshed per batch. The translations missing from the file are kept.
+"""
+
+import csv
+import itertools
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date
+
+from resume.bulk import bulk_update
+from resume.keywords import index_keywords
+from resume.models import WorkExperience, WorkExperienceTranslation
+from resume.timeline import rebuild_career_timelines
+from resume.versioning import VersionConflict
+
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+WORK_EXPERIENCE_FIELDS = ('is_public', 'date_start', 'date_end')
+TRANSLATION_FIELDS = ('language', 'position', 'company', 'location',
+                      'contribution', 'keywords')
+CSV_COLUMNS = ('id', 'user') + WORK_EXPERIENCE_FIELDS + TRANSLATION_FIELDS
+
+
+class TransferError(ValueError):
+    """An invalid record, the message names its line."""
+
+
+def guess_format(filename, default='jsonl'):
+    extension = filename.rsplit('.', 1)[-1].lower() if filename else ''
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    return 'csv' if extension == 'csv' else default
+
+
+# export
+
+def iter_records(queryset, batch_size=500):
+    """Yield the records of the work experiences of `queryset`, with two
+    queries per `batch_size` work experiences."""
+    queryset = queryset.order_by('pk').values(
+        'id', 'user__email', *WORK_EXPERIENCE_FIELDS)
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            break
+        translations = defaultdict(list)
+        for row in WorkExperienceTranslation.objects\
+                .filter(related_model_id__in=[x['id'] for x in rows])\
+                .order_by('related_model_id', 'language')\
+                .values('related_model_id', *TRANSLATION_FIELDS):
+            translations[row.pop('related_model_id')].append(row)
+
+        for row in rows:
+            yield {
+                'id': row['id'],
+                'user': row['user__email'],
+                'is_public': row['is_public'],
+                'date_start': row['date_start'].isoformat(),
+                'date_end': row['date_end'] and row['date_end'].isoformat(),
+                'translations': translations[row['id']],
+            }
+        last_pk = rows[-1]['id']
+
+
+class _Echo(object):
+    """A file-like object returning what is written, for `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+def iter_jsonl(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def iter_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    empty = dict.fromkeys(TRANSLATION_FIELDS, '')
+    for record in records:
+        values = [record['id'], record['user'],
+                  'true' if record['is_public'] else 'false',
+                  record['date_start'], record['date_end'] or '']
+        for translation in record['translations'] or [empty]:
+            yield writer.writerow(
+                values + [translation[x] for x in TRANSLATION_FIELDS])
+
+
+def export_lines(queryset, format='jsonl', batch_size=500):
+    """Yield the text lines of the export of `queryset` in `format`."""
+    records = iter_records(queryset, batch_size=batch_size)
+    return iter_csv(records) if format == 'csv' else iter_jsonl(records)
+
+
+# import
+
+def read_jsonl(lines):
+    """Yield `(line number, record)` of the JSON lines."""
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            raise TransferError('line {}: {}'.format(number, e))
+
+
+def _read_csv_rows(reader):
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        raise TransferError('after line {}: {}'.format(reader.line_num, e))
+
+
+def read_csv(lines):
+    """Yield `(line number, record)` of the CSV rows, the consecutive rows
+    with the same `id` make one record, each row without an id is a new
+    work experience."""
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as e:
+        raise TransferError('line 1: {}'.format(e))
+    missing = set(CSV_COLUMNS) - set(fieldnames or ())
+    if missing:
+        raise TransferError('line 1: missing columns {}'.format(
+            ', '.join(sorted(missing))))
+
+    def key(item):
+        number, row = item
+        return (row['id'], row['user']) if row['id'] else number
+
+    for _, group in itertools.groupby(_read_csv_rows(reader), key=key):
+        group = list(group)
+        number, first = group[0]
+        yield number, {
+            'id': first['id'] or None,
+            'user': first['user'],
+            'is_public': first['is_public'],
+            'date_start': first['date_start'],
+            'date_end': first['date_end'] or None,
+            'translations': [
+                {x: row[x] for x in TRANSLATION_FIELDS}
+                for _, row in group if row['language']],
+        }
+
+
+def read_records(lines, format='jsonl'):
+    return read_csv(lines) if format == 'csv' else read_jsonl(lines)
+
+
+def _clean_date(value, name, required=True):
+    if value in (None, ''):
+        if required:
+            raise ValueError('{} is required'.format(name))
+        return None
+    try:
+        date = parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValueError('invalid {} {!r}'.format(name, value))
+    return date
+
+
+def _clean_text(values, name, max_length=None, required=False):
+    value = values.get(name)
+    value = '' if value is None else value
+    if not isinstance(value, str):
+        raise ValueError('{} should be a string'.format(name))
+    if required and not value.strip():
+        raise ValueError('{} is required'.format(name))
+    if max_length is not None and len(value) > max_length:
+        raise ValueError('{} is longer than {} characters'.format(
+            name, max_length))
+    return value
+
+
+def clean_record(record):
+    """Return the validated values of a record, raise `ValueError`."""
+    if not isinstance(record, dict):
+        raise ValueError('a record should be an object')
+
+    pk = record.get('id')
+    if pk not in (None, ''):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise ValueError('invalid id {!r}'.format(pk))
+    else:
+        pk = None
+
+    is_public = record.get('is_public', False)
+    if isinstance(is_public, str):
+        is_public = is_public.strip().lower() in ('1', 'true', 'yes')
+
+    date_start = _clean_date(record.get('date_start'), 'date_start')
+    date_end = _clean_date(record.get('date_end'), 'date_end',
+                           required=False)
+    if date_end is not None and date_end < date_start:
+        raise ValueError('date_end is earlier than date_start')
+
+    languages = {x for x, _ in settings.LANGUAGES}
+    translations = {}
+    for values in record.get('translations') or ():
+        if not isinstance(values, dict):
+            raise ValueError('a translation should be an object')
+        language = values.get('language')
+        if language not in languages:
+            raise ValueError('unknown language {!r}'.format(language))
+        if language in translations:
+            raise ValueError('duplicated language {!r}'.format(language))
+        translations[language] = {
+            'language': language,
+            'position': _clean_text(values, 'position', 255, True),
+            'company': _clean_text(values, 'company', 255, True),
+            'location': _clean_text(values, 'location', 255, True),
+            'contribution': _clean_text(values, 'contribution'),
+            'keywords': _clean_text(values, 'keywords'),
+        }
+
+    return {
+        'id': pk,
+        'user': record.get('user'),
+        'is_public': bool(is_public),
+        'date_start': date_start,
+        'date_end': date_end,
+        'translations': list(translations.values()),
+    }
+
+
+def _bulk_update(fields_by_object):
+    """Write the changed rows of a batch with one UPDATE, at the version
+    they were read at."""
+    try:
+        bulk_update(fields_by_object, fields_by_object, versioned=True)
+    except VersionConflict:
+        raise TransferError(
+            'the work experiences were changed during the import, import '
+            'the file again')
+
+
+def _import_batch(records, user, keep_ids, stats):
+    if user is None:
+        users = dict(User.objects.filter(
+            email__in={x['user'] for _, x in records}).values_list(
+            'email', 'pk'))
+        for number, record in records:
+            if record['user'] not in users:
+                raise TransferError('line {}: unknown user {!r}'.format(
+                    number, record['user']))
+            record['user_id'] = users[record['user']]
+    else:
+        for _, record in records:
+            record['user_id'] = user.pk
+
+    existing = {
+        row['id']: row for row in WorkExperience.objects
+        .filter(pk__in=[x['id'] for _, x in records if x['id']])
+        .values('id', 'user_id', 'version', *WORK_EXPERIENCE_FIELDS)}
+    taken = set(existing)
+    changed_ids = set()
+    changed_work_experiences = {}
+    new_work_experiences = []
+    for _, record in records:
+        row = existing.get(record['id'])
+        if row is not None and row['user_id'] == record['user_id']:
+            record['pk'] = row['id']
+            fields = [x for x in WORK_EXPERIENCE_FIELDS
+                      if row[x] != record[x]]
+            if fields:
+                row.update((x, record[x]) for x in fields)
+                work_experience = WorkExperience(
+                    id=row['id'], user_id=row['user_id'],
+                    version=row['version'],
+                    **{x: row[x] for x in WORK_EXPERIENCE_FIELDS})
+                changed_work_experiences[work_experience] = fields
+                changed_ids.add(row['id'])
+                stats['work_experiences']['updated'] += 1
+            else:
+                stats['work_experiences']['unchanged'] += 1
+            continue
+
+        # an id of another environment is kept when it is free
+        pk = None
+        if keep_ids and record['id'] and record['id'] not in taken:
+            pk = record['id']
+            taken.add(pk)
+        work_experience = WorkExperience(
+            id=pk, user_id=record['user_id'], translations_snapshot={},
+            **{x: record[x] for x in WORK_EXPERIENCE_FIELDS})
+        new_work_experiences.append((record, work_experience))
+
+    _bulk_update(changed_work_experiences)
+    if new_work_experiences:
+        WorkExperience.objects.bulk_create(
+            [x for _, x in new_work_experiences])
+        for record, work_experience in new_work_experiences:
+            record['pk'] = work_experience.pk
+            changed_ids.add(work_experience.pk)
+            existing[work_experience.pk] = {
+                'id': work_experience.pk, 'user_id': record['user_id']}
+        stats['work_experiences']['created'] += len(new_work_experiences)
+        if keep_ids:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                        no_style(), [WorkExperience]):
+                    cursor.execute(sql)
+
+    translations = {
+        (x.related_model_id, x.language): x
+        for x in WorkExperienceTranslation.objects.filter(
+            related_model_id__in={x['pk'] for _, x in records})}
+    new_translations, changed_translations = [], {}
+    for _, record in records:
+        for values in record['translations']:
+            translation = translations.get((record['pk'], values['language']))
+            if translation is None:
+                translation = WorkExperienceTranslation(
+                    related_model_id=record['pk'], **values)
+                translation.render_contribution()
+                translations[(record['pk'], values['language'])] = \
+                    translation
+                new_translations.append(translation)
+                continue
+            fields = [x for x in TRANSLATION_FIELDS
+                      if getattr(translation, x) != values[x]]
+            if not fields:
+                stats['translations']['unchanged'] += 1
+                continue
+            for name in fields:
+                setattr(translation, name, values[name])
+            if 'contribution' in fields:
+                fields += translation.render_contribution()
+            changed_translations[translation] = fields
+            stats['translations']['updated'] += 1
+
+    _bulk_update(changed_translations)
+    if new_translations:
+        WorkExperienceTranslation.objects.bulk_create(new_translations)
+        stats['translations']['created'] += len(new_translations)
+    touched = list(changed_translations) + new_translations
+    if touched:
+        WorkExperienceTranslation.objects\
+            .filter(pk__in=[x.pk for x in touched])\
+            .update_search_vectors()
+        index_keywords(touched)
+        changed_ids.update(x.related_model_id for x in touched)
+
+    if changed_ids:
+        WorkExperience.objects.filter(pk__in=changed_ids)\
+            .rebuild_translation_snapshots()
+    return {existing[x]['user_id'] for x in changed_ids}
+
+
+def import_records(records, user=None, keep_ids=False, batch_size=500):
+    """Upsert the `(line number, record)` records in one transaction,
+    return the counts of the created, updated and unchanged rows. Nothing
+    is imported when a record is invalid.
+
+    The records of another `user` than their own are imported for `user`,
+    and the ids are only kept for the new work experiences with
+    `keep_ids`, e.g. to move the data between environments."""
+    stats = {'work_experiences': Counter(), 'translations': Counter()}
+    user_ids = set()
+    records = iter(records)
+    with transaction.atomic():
+        while True:
+            batch = []
+            for number, record in itertools.islice(records, batch_size):
+                try:
+                    batch.append((number, clean_record(record)))
+                except ValueError as e:
+                    raise TransferError('line {}: {}'.format(number, e))
+            if not batch:
+                break
+            user_ids |= _import_batch(batch, user, keep_ids, stats)
+
+    if user_ids:
+        rebuild_career_timelines(user_ids)
+    return stats
@@ -7,11 +7,23 @@ from resume.views import (
     home,
     ProjectView,
     list_public_work_experience,
+    similar_profiles,
+    export_public_resumes,
+    search_work_experience,
+    autocomplete_work_experience,
+    tagged_work_experience,
     list_work_experience,
     add_work_experience,
     public_work_experience,
+    bulk_public_work_experience,
     batch_delete_work_experience,
+    batch_job_detail,
+    export_work_experience,
+    import_work_experience,
+    add_import_job,
+    import_job_detail,
     delete_work_experience,
+    edit_work_experience,
     add_work_experience_translation,
     list_work_experience_translation,
     update_work_experience_translation,
@@ -35,6 +47,9 @@ urlpatterns = [
          update_work_experience_translation,
          name='work-experience-translation-update'),
 
+    path('work-experience/<int:pk>/edit/', edit_work_experience,
+         name='work-experience-edit'),
+
     path('work-experience/<int:pk>/delete/', delete_work_experience,
          name='work-experience-delete'),
 
@@ -44,12 +59,44 @@ urlpatterns = [
     path('work-experience/<int:pk>/public/', public_work_experience,
          name='change-work-experience-public-status'),
 
+    path('work-experience/public/', bulk_public_work_experience,
+         name='work-experience-bulk-public'),
+
+    path('work-experience/batch/<int:pk>/', batch_job_detail,
+         name='batch-job-detail'),
+
+    path('work-experience/search/', search_work_experience,
+         name='work-experience-search'),
+
+    path('work-experience/autocomplete/<str:field>/',
+         autocomplete_work_experience,
+         name='work-experience-autocomplete'),
+
+    path('work-experience/tagged/', tagged_work_experience,
+         name='work-experience-tagged'),
+
+    path('work-experience/export/', export_work_experience,
+         name='work-experience-export'),
+
+    path('work-experience/import/', import_work_experience,
+         name='work-experience-import'),
+
+    path('import/', add_import_job, name='import-job-add'),
+
+    path('import/<int:pk>/', import_job_detail, name='import-job-detail'),
+
     path('work-experience/add/', add_work_experience,
          name='work-experience-add'),
 
+    path('public/export/', export_public_resumes,
+         name='public-resume-export'),
+
     path('<str:username>/work-experience/', list_public_work_experience,
          name='work-experience-public-list'),
 
+    path('<str:username>/similar/', similar_profiles,
+         name='similar-profiles'),
+
     path('work-experience/', list_work_experience,
          name='work-experience-list'),
 
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""Optimistic concurrency control of the edits.
+
+The versioned models carry a `version` column incremented by each save
+changing a field of an existing row. `VersionedModel.save` first runs the
+conditional `UPDATE ... SET version = version + 1 WHERE id = %s AND
+version = %s` with the version the editor started from, and then the save
+itself in the same transaction. The writes take no explicit lock: when no
+row is updated the row was changed meanwhile and `VersionConflict` is
+raised. A save changing no field read from the database is checked the
+same way but keeps the version.
+
+The versioned forms post the version of their instance in a hidden field.
+On a conflict `add_conflict_errors` reports the saved value of each field
+differing from the posted one and takes the current version, so posting
+the form again, once merged, overwrites them.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+
+class VersionConflict(Exception):
+    """Rows were changed, or deleted, since their version was read.
+
+    Raised by `save`, which then marks the current transaction for
+    rollback: save in an atomic block and catch it outside."""
+
+
+class VersionedModel(models.Model):
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._set_loaded_values()
+
+    def _set_loaded_values(self, fields=None):
+        loaded_values = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname not in deferred and (
+                    fields is None or field.name in fields):
+                loaded_values[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded_values
+
+    def get_changed_fields(self, update_fields=None):
+        """Return the names of the fields, among `update_fields`, whose value
+        differs from the one read from the database."""
+        loaded_values = getattr(self, '_loaded_values', {})
+        missing = object()
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != 'version' and
+            (update_fields is None or field.name in update_fields) and
+            loaded_values.get(field.attname, missing) !=
+            getattr(self, field.attname)]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or args or kwargs.get('force_insert'):
+            super().save(*args, **kwargs)
+            self._set_loaded_values()
+            return
+        changed = self.get_changed_fields(kwargs.get('update_fields'))
+        using = kwargs.get('using') or self._state.db
+        with transaction.atomic(using=using):
+            queryset = type(self)._base_manager.using(using)\
+                .filter(pk=self.pk)
+            if queryset.filter(version=self.version).update(
+                    version=F('version') + (1 if changed else 0)):
+                if changed:
+                    self.version += 1
+            elif queryset.exists():
+                raise VersionConflict(
+                    '{} {} is not at version {} anymore'.format(
+                        self._meta.label, self.pk, self.version))
+            # else deleted meanwhile, inserted again by the save
+            super().save(*args, **kwargs)
+        self._set_loaded_values(kwargs.get('update_fields'))
+
+
+class VersionedFormMixin(object):
+    """A model form posting the version of its instance, which is checked
+    when the instance is saved."""
+    check_version_on_clean = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'version' not in self.fields:
+            self.fields['version'] = forms.IntegerField(
+                required=False, widget=forms.HiddenInput())
+        if self.instance.pk is not None:
+            self.initial['version'] = self.instance.version
+
+    def has_changed(self):
+        return bool([x for x in self.changed_data if x != 'version'])
+
+    def _post_clean(self):
+        super()._post_clean()
+        version = self.cleaned_data.get('version')
+        if self.instance.pk is None or version is None:
+            return
+        self.instance.version = version
+        # for the forms saved by code not handling `VersionConflict`, e.g.
+        # the admin, at the cost of a query
+        if self.check_version_on_clean:
+            current = self.get_current()
+            if self.has_conflict(current):
+                self.add_conflict_errors(current)
+
+    def get_current(self):
+        return type(self.instance)._base_manager\
+            .filter(pk=self.instance.pk).first()
+
+    def has_conflict(self, current):
+        return current is None or \
+            current.version != self.cleaned_data.get('version')
+
+    def add_conflict_errors(self, current=None):
+        """Report the saved value of the fields differing from the posted
+        ones, and take the current version so that posting the form again
+        overwrites them."""
+        if current is None:
+            current = self.get_current()
+        if current is None:
+            self.add_error(None, ValidationError(
+                _('This item was deleted meanwhile.'), code='conflict'))
+            return
+
+        for name in self._meta.fields:
+            if name not in self.cleaned_data or not hasattr(current, name):
+                continue
+            value = getattr(current, name)
+            if value != self.cleaned_data[name]:
+                self.add_error(name, ValidationError(
+                    _('Saved meanwhile as: %(value)s'),
+                    code='conflict', params={'value': value}))
+        self.add_error(None, ValidationError(
+            _('This item was changed meanwhile, review the changes and '
+              'save again to overwrite them.'), code='conflict'))
+
+        self.data = self.data.copy()
+        self.data[self.add_prefix('version')] = current.version
+        self.instance.version = current.version
@@ -1,25 +1,64 @@
 # -*- coding: utf-8 -*-
 
+import io
 import logging
 
 from django.conf import settings
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, render  #noqa
-from django.http import HttpResponseRedirect  # noqa
+from django.db import transaction
+from django.http import (  # noqa
+    Http404,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _  # noqa
 from django.utils import translation
-from django.views.generic import CreateView, UpdateView, DeleteView, ListView
+from django.views.generic import (
+    CreateView,
+    DeleteView,
+    DetailView,
+    ListView,
+    UpdateView,
+)
 from django.views.generic.base import View, RedirectView
 
 from resume.models import (
+    BatchJob,
+    ImportJob,
     WorkExperience,
     Project,
     WorkExperienceTranslation
 )
+from resume import batch
+from resume.autocomplete import AUTOCOMPLETE_FIELDS, get_suggestions
+from resume.changes import ChangedFieldsMixin, save_changes
+from resume.public_export import (
+    FORMATS as PUBLIC_EXPORT_FORMATS,
+    export_lines as export_public_lines,
+)
+from resume.similarity import similar_users
+from resume.timeline import get_career_stats, rebuild_career_timelines
+from resume.versioning import VersionConflict
+from resume.transfer import (
+    FORMATS,
+    TransferError,
+    export_lines,
+    guess_format,
+    import_records,
+    read_records,
+)
+from resume.multilingual import TranslationLoader
+from resume.pagination import KeysetPaginationMixin
+from resume.imports import start_import_job
 from resume.forms import (
+    ImportJobForm,
     ProjectForm,
+    WorkExperienceEditor,
     WorkExperienceForm,
     WorkExperienceTranslationForm,
 )
@@ -80,12 +119,15 @@ class ProjectView(View):
 
     def get(self, request, **kwargs):
 
-        include_list = {'title': _('Title'), 'download_link': _('Download Link'),
+        include_list = {'title_translated': _('Title'),
+                        'download_link': _('Download Link'),
                         'live_link': _('Live Link'), 'github': _('Github'),
-                        'description': _('Description')
+                        'description_translated': _('Description')
                        }
+        projects = list(Project.objects.all())
+        TranslationLoader().add_all(projects).load()
         project_list = []
-        for project in Project.objects.all():
+        for project in projects:
             _fields = {}
             for _key, _value in include_list.items():
                 _fields[_value] = getattr(project, _key)
@@ -114,16 +156,24 @@ class WorkExperienceBaseMixin(LoginRequiredMixin):
     pass
 
 
-class WorkExperiencesListView(WorkExperienceBaseMixin, ListView):
+class WorkExperiencesListView(WorkExperienceBaseMixin, KeysetPaginationMixin,
+                              ListView):
     template_name = 'work_experience_list.html'
     context_object_name = 'work_experience_list'
     paginate_by = 10
 
     def get_queryset(self):
         work_experience_list = WorkExperience.objects.filter(
-            user=self.request.user).order_by('-date_start')
+            user=self.request.user).order_by('-date_start', '-id')\
+            .with_translation().with_filled_languages()
         return work_experience_list
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['career_stats'] = get_career_stats(
+            self.request.user, public_only=False)
+        return context
+
 
 list_work_experience = WorkExperiencesListView.as_view()
 
@@ -161,22 +211,169 @@ class PublicViewMixin(object):
         return super().get(request, *args, **kwargs)
 
 
-class WorkExperiencesPublicListView(PublicViewMixin, ListView):
+class WorkExperiencesPublicListView(PublicViewMixin, KeysetPaginationMixin,
+                                    ListView):
     template_name = 'work_experience_list.html'
     context_object_name = 'work_experience_list'
     paginate_by = 10
 
     def get_queryset(self):
         if self.user:
+            # the translated fields are read from `translations_snapshot`
             work_experience_list = WorkExperience.objects.filter(
-                user=self.user, is_public=True).order_by('-date_start')
+                user=self.user, is_public=True).order_by('-date_start', '-id')
             return work_experience_list
         return None
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.user:
+            context['career_stats'] = get_career_stats(self.user)
+        return context
+
 
 list_public_work_experience = WorkExperiencesPublicListView.as_view()
 
 
+class PublicResumeExportView(View):
+    """Stream all the public resumes as JSON lines, see
+    `resume.public_export`: `?format=ndjson` (the default) with all the
+    languages, or `?format=jsonresume&language=en` as JSON Resume
+    documents."""
+    chunk_size = 200
+
+    def get(self, request, *args, **kwargs):
+        format = request.GET.get('format', 'ndjson')
+        language = request.GET.get('language') or settings.LANGUAGE_CODE
+        if format not in PUBLIC_EXPORT_FORMATS:
+            return JsonResponse({'error': _('Invalid format.')}, status=400)
+        if language not in dict(settings.LANGUAGES):
+            return JsonResponse({'error': _('Invalid language.')}, status=400)
+
+        lines = export_public_lines(
+            format=format, language=language,
+            base_url=request.build_absolute_uri('/')[:-1],
+            chunk_size=self.chunk_size)
+        return StreamingHttpResponse(
+            lines, content_type='application/x-ndjson; charset=utf-8')
+
+
+export_public_resumes = PublicResumeExportView.as_view()
+
+
+class SimilarProfilesView(PublicViewMixin, View):
+    """Return the JSON list of the public users whose work experiences are
+    the most similar to the ones of `username`, see `resume.similarity`."""
+    limit = 10
+
+    def get(self, request, *args, **kwargs):
+        user = self.find_user_by_username(self.kwargs.get('username'))
+        if user is None:
+            return JsonResponse({'results': []})
+
+        scores = similar_users(user.pk, k=self.limit)
+        users = User.objects.filter(
+            pk__in=[x for x, _ in scores], profile__is_public=True).in_bulk()
+        return JsonResponse({'results': [{
+            'username': users[user_id].username,
+            'full_name': users[user_id].get_full_name(),
+            'score': round(score, 4),
+        } for user_id, score in scores if user_id in users]})
+
+
+similar_profiles = SimilarProfilesView.as_view()
+
+
+class WorkExperienceSearchView(ListView):
+    """Full-text search over the public work experiences, the best matching
+    translations first."""
+    template_name = 'work_experience_search.html'
+    context_object_name = 'translation_list'
+    paginate_by = 10
+
+    def get_search_text(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        text = self.get_search_text()
+        if not text:
+            return WorkExperienceTranslation.objects.none()
+        return WorkExperienceTranslation.objects\
+            .filter(related_model__is_public=True)\
+            .search(text)\
+            .select_related('related_model__user')\
+            .order_by('-rank', 'id')
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data.update({
+            'search_text': self.get_search_text()
+        })
+        return context_data
+
+
+search_work_experience = WorkExperienceSearchView.as_view()
+
+
+class WorkExperienceAutocompleteView(WorkExperienceBaseMixin, View):
+    """Return the JSON suggestions of a translation field for the `q`
+    prefix, e.g. `{"field": "company", "results": ["Google"]}`"""
+
+    def get(self, request, field, **kwargs):
+        if field not in AUTOCOMPLETE_FIELDS:
+            return JsonResponse(
+                {'error': _('Unknown field: {}').format(field)}, status=400)
+        results = get_suggestions(
+            request.user, field, request.GET.get('q', ''))
+        return JsonResponse({'field': field, 'results': results})
+
+
+autocomplete_work_experience = WorkExperienceAutocompleteView.as_view()
+
+
+class WorkExperienceTaggedView(View):
+    """Faceted filter of the public work experiences by keywords, e.g.
+    `?tag=python&tag=django&language=en&page=2`, returned as JSON with the
+    keyword counts of the matching experiences."""
+    paginate_by = 10
+    facets_limit = 20
+
+    def get(self, request, **kwargs):
+        tags = request.GET.getlist('tag')
+        language = request.GET.get('language') or None
+
+        work_experience_list = WorkExperience.objects\
+            .filter(is_public=True)\
+            .tagged(*tags, language=language)\
+            .select_related('user')\
+            .order_by('-date_start', '-id')
+        paginator = Paginator(work_experience_list, self.paginate_by)
+        try:
+            page = paginator.page(request.GET.get('page', 1))
+        except (EmptyPage, PageNotAnInteger):
+            return JsonResponse({'error': _('Invalid page.')}, status=404)
+
+        facets = work_experience_list.keyword_facets(language=language)
+        return JsonResponse({
+            'tags': tags,
+            'count': paginator.count,
+            'page': page.number,
+            'num_pages': paginator.num_pages,
+            'results': [{
+                'id': work_experience.id,
+                'username': work_experience.user.username,
+                'position': work_experience.position,
+                'company': work_experience.company,
+                'date_start': work_experience.date_start,
+                'date_end': work_experience.date_end,
+            } for work_experience in page.object_list],
+            'facets': list(facets[:self.facets_limit]),
+        })
+
+
+tagged_work_experience = WorkExperienceTaggedView.as_view()
+
+
 class WorkExperienceTranslationEditMixin(WorkExperienceBaseMixin):
     model = WorkExperienceTranslation
     form_class = WorkExperienceTranslationForm
@@ -231,15 +428,26 @@ class WorkExperiencesCreateView(WorkExperienceTranslationEditMixin, CreateView):
 add_work_experience = WorkExperiencesCreateView.as_view()
 
 
+def refresh_career_timeline(user):
+    # the public statistics depend on `is_public`, which is updated without
+    # sending the signals
+    transaction.on_commit(lambda: rebuild_career_timelines([user.pk]))
+
+
 class WorkExperiencePublicView(WorkExperienceBaseMixin, RedirectView):
     """After this view changed the is_public status, it will redirect
     back to the previous page"""
 
     @staticmethod
-    def change_public_status(work_experience_id):
-        work_experience = WorkExperience.objects.get(pk=work_experience_id)
-        work_experience.is_public = not work_experience.is_public
-        work_experience.save()
+    def change_public_status(user, work_experience_id):
+        """Toggle the status with one statement, return False when the
+        user has no such work experience."""
+        updated = WorkExperience.objects\
+            .filter(pk=work_experience_id, user=user)\
+            .toggle_public()
+        if updated:
+            refresh_career_timeline(user)
+        return bool(updated)
 
     def get_redirect_url(self, *args, **kwargs):
         redirect_to = self.request.GET.get('next')
@@ -247,13 +455,52 @@ class WorkExperiencePublicView(WorkExperienceBaseMixin, RedirectView):
             redirect_to = reverse('work-experience-list')
 
         work_experience_id = kwargs.get('pk')
-        self.change_public_status(work_experience_id)
+        if not self.change_public_status(self.request.user,
+                                         work_experience_id):
+            raise Http404
         return redirect_to
 
 
 public_work_experience = WorkExperiencePublicView.as_view()
 
 
+class WorkExperienceBulkPublicView(WorkExperienceBaseMixin, View):
+    """Publish, with `is_public=1`, or unpublish, with `is_public=0`, the
+    work experiences of the comma separated `ids` in bulk, see
+    `resume.batch`. Return as JSON the number of changed work experiences
+    and the `forbidden` ids of the other users which are ignored, or with
+    the status 202 the URL of the `job` updating a large batch in the
+    background."""
+
+    def post(self, request, *args, **kwargs):
+        is_public = {'1': True, '0': False}.get(request.POST.get('is_public'))
+        if is_public is None:
+            return JsonResponse({'error': _('Invalid status.')}, status=400)
+        try:
+            ids = batch.parse_ids(request.POST.get('ids'))
+        except ValueError:
+            return JsonResponse({'error': _('Invalid ids.')}, status=400)
+
+        owned, forbidden = batch.select(request.user, ids)
+        updated, job = batch.submit(
+            batch.PUBLISH if is_public else batch.UNPUBLISH,
+            request.user, owned)
+        if job is not None:
+            return JsonResponse({
+                'is_public': is_public,
+                'job': job.get_absolute_url(),
+                'forbidden': forbidden,
+            }, status=202)
+        return JsonResponse({
+            'is_public': is_public,
+            'updated': updated,
+            'forbidden': forbidden,
+        })
+
+
+bulk_public_work_experience = WorkExperienceBulkPublicView.as_view()
+
+
 class WorkExperienceDeleteView(WorkExperienceBaseMixin, DeleteView):
     model = WorkExperience
     template_name = 'confirm_delete.html'
@@ -276,6 +523,112 @@ class WorkExperienceDeleteView(WorkExperienceBaseMixin, DeleteView):
 delete_work_experience = WorkExperienceDeleteView.as_view()
 
 
+class WorkExperienceExportView(WorkExperienceBaseMixin, View):
+    """Stream the work experiences of the user with their translations as
+    `?format=jsonl` (the default) or `?format=csv`, see `resume.transfer`.
+    `?ids=` restricts the export to the comma separated ids, the staff
+    export the whole site with `?all=1`."""
+    content_types = {
+        'jsonl': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, *args, **kwargs):
+        format = request.GET.get('format', 'jsonl')
+        if format not in FORMATS:
+            return JsonResponse({'error': _('Invalid format.')}, status=400)
+
+        if 'ids' in request.GET:
+            try:
+                ids = batch.parse_ids(request.GET['ids'])
+            except ValueError:
+                return JsonResponse({'error': _('Invalid ids.')}, status=400)
+            lines = batch.export(request.user, ids, format=format)
+        else:
+            queryset = WorkExperience.objects.all()
+            if not (request.user.is_staff and request.GET.get('all')):
+                queryset = queryset.filter(user=request.user)
+            lines = export_lines(queryset, format=format)
+        response = StreamingHttpResponse(
+            lines,
+            content_type=self.content_types[format])
+        response['Content-Disposition'] = \
+            'attachment; filename="work-experiences.{}"'.format(format)
+        return response
+
+
+export_work_experience = WorkExperienceExportView.as_view()
+
+
+class WorkExperienceImportView(WorkExperienceBaseMixin, View):
+    """Upsert the work experiences of the uploaded `file` for the user, the
+    format is `format` or guessed from the file name. Return the counts of
+    the created, updated and unchanged rows as JSON."""
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'error': _('No file uploaded.')}, status=400)
+        format = request.POST.get('format') or guess_format(upload.name)
+        if format not in FORMATS:
+            return JsonResponse({'error': _('Invalid format.')}, status=400)
+
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        try:
+            stats = import_records(
+                read_records(lines, format=format), user=request.user)
+        except (TransferError, UnicodeDecodeError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse(stats)
+
+
+import_work_experience = WorkExperienceImportView.as_view()
+
+
+class ImportJobCreateView(WorkExperienceBaseMixin, CreateView):
+    """Upload a LinkedIn data export or a JSON Resume file, imported in the
+    background, see `resume.imports`."""
+    model = ImportJob
+    form_class = ImportJobForm
+    template_name = 'import_job_form.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['import_job_list'] = ImportJob.objects.filter(
+            user=self.request.user)[:10]
+        return context
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        self.object = start_import_job(form.instance)
+        return HttpResponseRedirect(self.object.get_absolute_url())
+
+
+add_import_job = ImportJobCreateView.as_view()
+
+
+class ImportJobDetailView(WorkExperienceBaseMixin, DetailView):
+    template_name = 'import_job_detail.html'
+    context_object_name = 'import_job'
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(user=self.request.user)
+
+
+import_job_detail = ImportJobDetailView.as_view()
+
+
+class BatchJobDetailView(WorkExperienceBaseMixin, DetailView):
+    template_name = 'batch_job_detail.html'
+    context_object_name = 'batch_job'
+
+    def get_queryset(self):
+        return BatchJob.objects.filter(user=self.request.user)
+
+
+batch_job_detail = BatchJobDetailView.as_view()
+
+
 class WorkExperienceBatchDeleteView(WorkExperienceBaseMixin, View):
     template_name = 'confirm_delete.html'
     success_url = reverse_lazy('work-experience-list')
@@ -292,30 +645,22 @@ class WorkExperienceBatchDeleteView(WorkExperienceBaseMixin, View):
         })
         return context_data
 
+    # the confirmation lists the first ones, each takes queries to display
+    displayed_number = 20
+
     @staticmethod
     def get_to_be_deleted_list(request, method='GET'):
-        delete_ids = getattr(request, method).get('batch_delete_ids')
-        if delete_ids is not None:
-            id_list = delete_ids.split(',')
-
-            all_user_wp_qs = WorkExperience.objects.filter(user=request.user)
-            delete_object_list = all_user_wp_qs.filter(id__in=id_list)
-
-            # Following logic is to check if any object not belong to
-            # the current user:
-            # step1: get user's all related objects id
-            all_user_wp_list = [str(i) for i in list(
-                all_user_wp_qs.values_list('id', flat=True))]
-
-            delete_id_list = [str(i) for i in list(
-                delete_object_list.values_list('id', flat=True))]
-            delete_ids = ','.join(delete_id_list)
-
-            # find out the ones not belong to user
-            forbid_delete_list = list(set(id_list) - set(all_user_wp_list))
-
-            return delete_object_list, delete_ids, forbid_delete_list
-        return WorkExperience.objects.none(), '', []
+        """Return the queryset and the comma separated ids of the work
+        experiences of the user in `batch_delete_ids`, and the other ids,
+        see `resume.batch.select`."""
+        try:
+            ids = batch.parse_ids(
+                getattr(request, method).get('batch_delete_ids'))
+        except ValueError:
+            ids = []
+        owned, forbidden = batch.select(request.user, ids)
+        return batch.get_queryset(request.user, owned), \
+            ','.join(str(x) for x in owned), [str(x) for x in forbidden]
 
     def get(self, request, **kwargs):
         context = {
@@ -324,9 +669,11 @@ class WorkExperienceBatchDeleteView(WorkExperienceBaseMixin, View):
         delete_object_list, delete_ids, \
             forbid_delete_list = self.get_to_be_deleted_list(request)
 
-        if delete_object_list.exists():
+        if delete_ids:
             context.update({
-                'delete_object_list': delete_object_list,
+                'delete_object_list':
+                    delete_object_list[:self.displayed_number],
+                'delete_count': delete_ids.count(',') + 1,
                 'delete_ids': delete_ids,
                 'forbid_delete_list': forbid_delete_list
             })
@@ -338,8 +685,12 @@ class WorkExperienceBatchDeleteView(WorkExperienceBaseMixin, View):
         return render(request, self.template_name, context)
 
     def post(self, request, **kwargs):
-        delete_object_list, _, _ = self.get_to_be_deleted_list(request, 'POST')
-        delete_object_list.delete()
+        delete_object_list, delete_ids, \
+            forbid_delete_list = self.get_to_be_deleted_list(request, 'POST')
+        ids = [int(x) for x in delete_ids.split(',') if x]
+        deleted, job = batch.submit(batch.DELETE, request.user, ids)
+        if job is not None:
+            return HttpResponseRedirect(job.get_absolute_url())
         return HttpResponseRedirect(self.success_url)
 
 
@@ -361,8 +712,8 @@ class WorkExperienceTranslationListView(WorkExperienceBaseMixin, ListView):
 
         work_experience_id = self.kwargs.get('work_experience_id')
         try:
-            work_experience = WorkExperience.objects.get(
-                id=work_experience_id)
+            work_experience = WorkExperience.objects.with_filled_languages()\
+                .get(id=work_experience_id)
             # check if the translation languages exist, if all the available
             # translation languages were all created, use the
             # `are_all_language_created` flag to control the form rendering
@@ -449,7 +800,8 @@ class WorkExperienceTranslationCreateView(WorkExperienceTranslationEditMixin,
 add_work_experience_translation = WorkExperienceTranslationCreateView.as_view()
 
 
-class WorkExperienceTranslationUpdateView(WorkExperienceTranslationEditMixin,
+class WorkExperienceTranslationUpdateView(ChangedFieldsMixin,
+                                          WorkExperienceTranslationEditMixin,
                                           UpdateView):
     title = _('Update work experience translation')
 
@@ -457,6 +809,7 @@ class WorkExperienceTranslationUpdateView(WorkExperienceTranslationEditMixin,
         initial = super().get_initial()
         initial.update({
             'related_model': self.object.related_model.id,
+            'work_experience_version': self.object.related_model.version,
             'date_start': self.object.related_model.date_start,
             'date_end': self.object.related_model.date_end,
         })
@@ -470,11 +823,16 @@ class WorkExperienceTranslationUpdateView(WorkExperienceTranslationEditMixin,
         kwargs['override_languages'] = language_choices
         return kwargs
 
-    def form_valid(self, form):
-        self.object.related_model.date_start = form.cleaned_data['date_start']
-        self.object.related_model.date_end = form.cleaned_data['date_end']
-        self.object.related_model.save()
-        return super().form_valid(form)
+    def save_form(self, form):
+        # the dates are saved at the version they were displayed at
+        version = form.cleaned_data.get('work_experience_version')
+        if version is not None:
+            self.object.related_model.version = version
+        save_changes(self.object.related_model, {
+            'date_start': form.cleaned_data['date_start'],
+            'date_end': form.cleaned_data['date_end'],
+        })
+        super().save_form(form)
 
     def get_success_url(self):
         return reverse('work-experience-translation-list', kwargs={
@@ -486,6 +844,48 @@ update_work_experience_translation = \
     WorkExperienceTranslationUpdateView.as_view()
 
 
+class WorkExperienceEditorView(WorkExperienceBaseMixin, View):
+    """Edit the dates and all the translations of a work experience on one
+    page, see `WorkExperienceEditor`."""
+    template_name = 'work_experience_editor.html'
+
+    def get_work_experience(self):
+        return get_object_or_404(
+            WorkExperience, pk=self.kwargs['pk'], user=self.request.user)
+
+    def render_editor(self, editor):
+        return render(self.request, self.template_name, {
+            'title': _('Edit work experience'),
+            'work_experience': editor.work_experience,
+            'form': editor.form,
+            'formset': editor.formset,
+            'back_url': self.get_success_url(),
+        })
+
+    def get_success_url(self):
+        return reverse('work-experience-translation-list', kwargs={
+            'work_experience_id': self.kwargs['pk']
+        })
+
+    def get(self, request, *args, **kwargs):
+        return self.render_editor(
+            WorkExperienceEditor(self.get_work_experience()))
+
+    def post(self, request, *args, **kwargs):
+        editor = WorkExperienceEditor(self.get_work_experience(), request.POST)
+        if not editor.is_valid():
+            return self.render_editor(editor)
+        try:
+            editor.save()
+        except VersionConflict:
+            editor.add_conflict_errors()
+            return self.render_editor(editor)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+edit_work_experience = WorkExperienceEditorView.as_view()
+
+
 class WorkExperienceTranslationDeleteView(WorkExperienceBaseMixin, DeleteView):
     model = WorkExperienceTranslation
     template_name = 'confirm_delete.html'
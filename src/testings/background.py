@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Executor, Future
+from unittest import mock
+
+
+class SynchronousExecutor(Executor):
+    """Run the tasks of `resume.background` in the calling thread, when the
+    transaction commits, so the tests do not wait for the threads."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def run_in_foreground():
+    """Patch `resume.background` to run its tasks synchronously, to be used
+    in a `TransactionTestCase` where the transactions commit."""
+    return mock.patch('resume.background.get_executor',
+                      return_value=SynchronousExecutor())
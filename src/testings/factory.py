@@ -17,6 +17,7 @@ from requests import Response
 
 from profile.models import Profile
 from resume.models import (
+    Project,
     WorkExperience,
     WorkExperienceTranslation,
 )
@@ -230,4 +231,11 @@ class Factory():
             translation_list.append(translation)
         return translation_list
 
-
+    def make_project(self, user=None, title=None, description='',
+                     is_public=False):
+        user = self.make_user() if user is None else user
+        title = self.make_unique_string('title-') if title is None else title
+        project = Project.objects.create(
+            user=user, title=title, description=description,
+            is_public=is_public)
+        return project